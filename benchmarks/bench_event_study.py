@@ -0,0 +1,87 @@
+"""
+이벤트 스터디 벤치마크 (종목/날짜별 calc_cumulative_return 반복 vs strided view 일괄 계산)
+
+사용법:
+    python -m benchmarks.bench_event_study
+    python -m benchmarks.bench_event_study --events 20000 --tickers 3000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools.event_study import event_summary, forward_returns
+
+
+def make_data(n_days, n_tickers, n_events, seed=0):
+    """랜덤워크 가격 행렬(일부 결측)과 이벤트 시그널 행렬 생성"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=n_days)
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    prices = 100 * np.exp(rng.normal(0, 0.02, (n_days, n_tickers)).cumsum(axis=0))
+    prices[rng.random(prices.shape) < 0.001] = np.nan
+    prices = pd.DataFrame(prices, index=dates, columns=tickers)
+
+    signals = np.zeros((n_days, n_tickers), dtype=bool)
+    signals.flat[rng.choice(signals.size, n_events, replace=False)] = True
+    signals = pd.DataFrame(signals, index=dates, columns=tickers)
+    return signals, prices
+
+
+def calc_cumulative_return(adjclose_df, ticker, date, max_days=15):
+    """seibro.ipynb의 기존 함수"""
+    if ticker not in adjclose_df.columns:
+        return None
+    if date not in adjclose_df.index:
+        return None
+
+    idx = adjclose_df.index.get_loc(date)
+    if idx + max_days >= len(adjclose_df):
+        return None
+
+    price_series = adjclose_df[ticker].iloc[idx:(idx + max_days + 1)]
+    if price_series.isnull().any() or price_series.iloc[0] == 0:
+        return None
+
+    normed = price_series / price_series.iloc[0]
+    return normed.values
+
+
+def legacy(signals, prices, max_days):
+    cumulative_returns = []
+    for date, row in signals.iterrows():
+        for ticker in row.index[row]:
+            cum_rtn = calc_cumulative_return(prices, ticker, date, max_days=max_days)
+            if cum_rtn is not None:
+                cumulative_returns.append(cum_rtn)
+    return np.array(cumulative_returns)
+
+
+def run(n_days, n_tickers, n_events, max_days):
+    signals, prices = make_data(n_days, n_tickers, n_events)
+    print(f"가격 {n_days}일 x {n_tickers}종목, 이벤트 {n_events}개, {max_days}일 후까지")
+
+    start = time.perf_counter()
+    expected = legacy(signals, prices, max_days)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    events = forward_returns(signals, prices, max_days=max_days)
+    summary = event_summary(events, horizons=[1, 5, 10, max_days])
+    fast_time = time.perf_counter() - start
+
+    assert np.allclose(events.to_numpy(), expected), "두 방식의 결과가 다릅니다"
+    print(f"{'calc_cumulative_return 반복':<28} {len(expected)}개 {legacy_time:.3f}s")
+    print(f"{'forward_returns + summary':<28} {len(events)}개 {fast_time:.3f}s  ({legacy_time / fast_time:,.0f}x)")
+    print(summary.round(2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--max-days", type=int, default=15)
+    args = parser.parse_args()
+    run(args.days, args.tickers, args.events, args.max_days)
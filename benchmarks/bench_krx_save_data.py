@@ -0,0 +1,89 @@
+"""
+KrxClient.save_data 저장 속도 벤치마크 (iterrows + replace_one vs bulk upsert)
+
+사용법:
+    python -m benchmarks.bench_krx_save_data                 # mongomock 사용
+    python -m benchmarks.bench_krx_save_data --uri mongodb://localhost:27017
+
+mongomock은 네트워크 왕복 비용이 없어 두 방식의 차이가 거의 드러나지 않습니다.
+실제 차이(왕복 횟수 1,400회 -> 2회)는 로컬 mongod(--uri)로 측정하세요.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools.krx_client import KrxClient
+
+
+def make_index_data(n_rows):
+    """fetch_data 결과와 같은 형태의 KOSPI 인덱스 데이터 생성"""
+    dates = pd.bdate_range("2020-01-02", periods=n_rows)
+    rng = np.random.default_rng(0)
+    close = 2000 + rng.normal(0, 10, n_rows).cumsum()
+    return pd.DataFrame({
+        "date": dates,
+        "close": close,
+        "open": close + rng.normal(0, 5, n_rows),
+        "high": close + 10,
+        "low": close - 10,
+        "tvolWon": rng.uniform(5e12, 2e13, n_rows),
+        "mktcapWon": rng.uniform(1.5e15, 2.5e15, n_rows),
+    })
+
+
+def legacy_save_data(collection, data):
+    """기존 방식: 행마다 replace_one"""
+    inserted_count = 0
+    updated_count = 0
+    for _, row in data.iterrows():
+        result = collection.replace_one({"date": row["date"]}, row.to_dict(), upsert=True)
+        if result.upserted_id:
+            inserted_count += 1
+        elif result.modified_count > 0:
+            updated_count += 1
+    return inserted_count, updated_count
+
+
+def get_collection(uri):
+    if uri:
+        from pymongo import MongoClient
+        client = MongoClient(uri)
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+    collection = client["bench"]["krx_index_daily"]
+    collection.drop()
+    return collection
+
+
+def run(uri, n_rows, repeat):
+    data = make_index_data(n_rows)
+    collection = get_collection(uri)
+
+    # __init__의 .env / MongoDB 연결 없이 save_data만 사용
+    krx = KrxClient.__new__(KrxClient)
+    krx.collection = collection
+
+    for label, func in [
+        ("iterrows + replace_one", lambda: legacy_save_data(collection, data)),
+        ("to_dict + bulk_write", lambda: krx.save_data(data)),
+    ]:
+        timings = []
+        for _ in range(repeat):
+            collection.delete_many({})
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{label:<25} {n_rows}행 {best:.3f}s  ({n_rows / best:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default=None, help="MongoDB URI (생략 시 mongomock)")
+    parser.add_argument("--rows", type=int, default=1400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.uri, args.rows, args.repeat)
@@ -0,0 +1,122 @@
+"""
+ETF 1년치 조회 벤치마크 (find + DataFrame(list) vs projection + raw BSON 배치 디코딩) - 시간/최대 메모리
+
+사용법:
+    python -m benchmarks.bench_mongo_reads                 # 오프라인: 서버가 보낼 BSON 배치를 미리 만들어 디코딩만 측정
+    python -m benchmarks.bench_mongo_reads --uri mongodb://localhost:27017
+
+--uri를 주면 합성 데이터를 bench.krx_etf_daily에 넣고 실제 get_etf_data 경로로 비교합니다.
+오프라인 모드는 서버 쪽 projection으로 줄어드는 전송량을 프로젝션된 문서의 BSON으로 흉내 냅니다.
+"""
+import argparse
+import time
+import tracemalloc
+
+import bson
+import numpy as np
+import pandas as pd
+
+from tools.mongo_reader import docs_to_dataframe, find_dataframe
+
+HEATMAP_COLUMNS = ["TRD_DD", "TDD_CLSPRC", "ACC_TRDVAL", "MKTCAP", "ISU_ABBRV"]
+
+
+def make_etf_docs(n_days, n_etfs):
+    """update_etf_data로 저장되는 문서와 같은 형태의 ETF 일별 시세 생성"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-02", periods=n_days).to_pydatetime()
+    docs = []
+    for j in range(n_etfs):
+        price = 10000 + rng.normal(0, 50, n_days).cumsum()
+        for i, day in enumerate(dates):
+            docs.append({
+                "TRD_DD": day,
+                "ISU_CD": f"KR7{j:09d}",
+                "ISU_ABBRV": f"ETF{j}",
+                "TDD_CLSPRC": float(price[i]),
+                "FLUC_TP_CD": 1,
+                "CMPPREVDD_PRC": float(rng.normal(0, 50)),
+                "FLUC_RT": float(rng.normal(0, 1)),
+                "NAV": float(price[i] + 5),
+                "TDD_OPNPRC": float(price[i] - 10),
+                "TDD_HGPRC": float(price[i] + 30),
+                "TDD_LWPRC": float(price[i] - 30),
+                "ACC_TRDVOL": int(rng.integers(1000, 10**6)),
+                "ACC_TRDVAL": int(rng.integers(10**7, 10**10)),
+                "MKTCAP": int(rng.integers(10**9, 10**12)),
+                "LIST_SHRS": int(rng.integers(10**5, 10**8)),
+                "IDX_IND_NM": f"지수{j}",
+                "OBJ_STKPRC_IDX": float(price[i] / 10),
+                "CMPPREVDD_IDX": float(rng.normal(0, 1)),
+                "FLUC_RT_IDX": float(rng.normal(0, 1)),
+            })
+    return docs
+
+
+def encode_batches(docs, batch_size=1000):
+    """서버가 보내는 것처럼 문서를 BSON 배치(bytes)로 묶음"""
+    return [
+        b"".join(bson.encode(doc) for doc in docs[i:i + batch_size])
+        for i in range(0, len(docs), batch_size)
+    ]
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {len(df)}행 x {len(df.columns)}열 {elapsed:.3f}s  peak {peak / 1e6:,.1f}MB")
+
+
+def run_offline(docs):
+    full_batches = encode_batches([{"_id": bson.ObjectId(), **doc} for doc in docs])
+    projected_batches = encode_batches([{col: doc[col] for col in HEATMAP_COLUMNS} for doc in docs])
+    print(f"전송량: 전체 {sum(map(len, full_batches)) / 1e6:.1f}MB / "
+          f"projection {sum(map(len, projected_batches)) / 1e6:.1f}MB")
+
+    def legacy():
+        data = [doc for batch in full_batches for doc in bson.decode_all(batch)]
+        return pd.DataFrame(data).drop("_id", axis=1)
+
+    def fast():
+        docs_iter = (doc for batch in projected_batches for doc in bson.decode_all(batch))
+        return docs_to_dataframe(docs_iter, HEATMAP_COLUMNS)
+
+    measure("decode + DataFrame(list)", legacy)
+    measure("projection + column decode", fast)
+
+
+def run_mongo(uri, docs):
+    from pymongo import MongoClient
+
+    collection = MongoClient(uri)["bench"]["krx_etf_daily"]
+    collection.drop()
+    collection.insert_many(docs)
+    collection.create_index([("TRD_DD", 1)])
+    query = {"TRD_DD": {"$gte": docs[0]["TRD_DD"], "$lte": docs[-1]["TRD_DD"]}}
+
+    def legacy():
+        df = pd.DataFrame(list(collection.find(query).sort("TRD_DD", 1)))
+        return df.drop("_id", axis=1)
+
+    measure("find + DataFrame(list)", legacy)
+    measure("find_dataframe (전체 컬럼)", lambda: find_dataframe(collection, query, sort=[("TRD_DD", 1)]))
+    measure("find_dataframe (heatmap 컬럼)",
+            lambda: find_dataframe(collection, query, columns=HEATMAP_COLUMNS, sort=[("TRD_DD", 1)]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default=None, help="MongoDB URI (생략 시 오프라인 디코딩만 측정)")
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--etfs", type=int, default=600)
+    args = parser.parse_args()
+
+    docs = make_etf_docs(args.days, args.etfs)
+    if args.uri:
+        run_mongo(args.uri, docs)
+    else:
+        run_offline(docs)
@@ -0,0 +1,108 @@
+"""
+리포트 PDF 텍스트 추출 벤치마크 (전체 페이지 extract_text vs 가벼운 페이지 분류 + 조기 중단)
+
+사용법:
+    python -m benchmarks.bench_pdf_extract --folder ./sample_pdfs   # 저장해 둔 리포트 PDF 폴더
+    python -m benchmarks.bench_pdf_extract                          # reportlab으로 합성 PDF 생성
+
+합성 PDF는 문단 페이지와 숫자 표/차트 페이지가 섞인 리포트 형태이며 reportlab이 필요합니다.
+"""
+import argparse
+import glob
+import io
+import os
+import time
+import warnings
+
+import numpy as np
+
+from tools.naver_client import NaverReportScraper, pypdfium2
+
+
+def make_report_pdf(n_pages, seed):
+    """문단 페이지와 숫자 표 페이지(격자선 포함)가 번갈아 나오는 리포트 PDF 생성"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    rng = np.random.default_rng(seed)
+    words = ("demand outlook margin capacity semiconductor memory earnings guidance "
+             "recovery inventory valuation target price investment opinion").split()
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    for page in range(n_pages):
+        if page % 3 == 2:
+            # 표/차트 페이지: 격자선 + 숫자
+            for row in range(45):
+                y = 800 - row * 17
+                pdf.line(40, y - 4, 560, y - 4)
+                for col in range(8):
+                    pdf.drawString(45 + col * 65, y, f"{rng.normal(0, 1000):,.1f}")
+        else:
+            for line in range(50):
+                pdf.drawString(40, 800 - line * 15, " ".join(rng.choice(words, 11)))
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def load_pdfs(folder, n_files, n_pages):
+    if folder:
+        pdfs = []
+        for path in sorted(glob.glob(os.path.join(folder, "*.pdf"))):
+            with open(path, "rb") as f:
+                pdfs.append(f.read())
+        return pdfs
+    return [make_report_pdf(n_pages, seed) for seed in range(n_files)]
+
+
+def count_pages(pdfs):
+    import pdfplumber
+    total = 0
+    for content in pdfs:
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            total += len(pdf.pages)
+    return total
+
+
+def run(pdfs, max_chars, repeat):
+    n_pages = count_pages(pdfs)
+    print(f"PDF {len(pdfs)}개, {n_pages}페이지 (가벼운 분류: {'pypdfium2' if pypdfium2 else 'pdfplumber chars'})")
+
+    cases = [
+        ("extract_text 전체", dict()),
+        ("분류 후 추출", dict(fast=True)),
+        (f"분류 후 추출 + {max_chars}자 중단", dict(fast=True, max_chars=max_chars)),
+    ]
+    baseline = None
+    for label, kwargs in cases:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                texts = [
+                    NaverReportScraper._extract_pdf_text(io.BytesIO(content), skip_last_page=True, **kwargs)
+                    for content in pdfs
+                ]
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        if baseline is None:
+            baseline = texts
+            same = "기준"
+        else:
+            # 조기 중단 결과는 앞 max_chars자가 같아야 함
+            limit = kwargs.get("max_chars")
+            same = sum(a[:limit] == b[:limit] for a, b in zip(baseline, texts))
+            same = f"동일 {same}/{len(texts)}"
+        print(f"{label:<28} {best:.2f}s  ({n_pages / best:,.1f} pages/sec, {same})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", default=None, help="리포트 PDF 폴더 (생략 시 합성 PDF)")
+    parser.add_argument("--files", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=15)
+    parser.add_argument("--max-chars", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    run(load_pdfs(args.folder, args.files, args.pages), args.max_chars, args.repeat)
@@ -0,0 +1,169 @@
+"""
+리포트 전문 검색 벤치마크 (전체 스캔 vs SQLite FTS5 trigram 인덱스)
+
+사용법:
+    python -m benchmarks.bench_report_search                      # 합성 리포트 30,000건
+    python -m benchmarks.bench_report_search --reports 50000
+    python -m benchmarks.bench_report_search --mongo-uri mongodb://localhost:27017   # MongoDB $regex 스캔도 측정
+
+전체 스캔은 naver_reports를 $regex로 찾을 때처럼 모든 리포트의 제목/이름/요약/본문을 확인합니다.
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+
+from tools.report_search import ReportSearchIndex
+
+COMPANIES = ["삼성전자", "SK하이닉스", "LG에너지솔루션", "현대차", "기아", "NAVER", "카카오", "셀트리온",
+             "POSCO홀딩스", "LG화학", "삼성바이오로직스", "한화에어로스페이스", "HD현대중공업", "KB금융", "LG"]
+INDUSTRIES = ["반도체", "2차전지", "자동차", "조선", "방산", "인터넷", "바이오", "은행", "화학", "철강"]
+TOPICS = ("실적 개선 수요 회복 재고 조정 가격 상승 점유율 확대 수주 증가 마진 개선 투자의견 목표주가 "
+          "상향 하향 업황 둔화 환율 신제품 출시 증설 HBM AI 데이터센터 전기차 수출 밸류에이션 배당 "
+          "자사주 매입 규제 완화 경쟁 심화 원가 부담 파운드리 ESS 수소 원전 LNG선 K9 플랫폼 광고 "
+          "신약 임상 금리 NIM 유가 스프레드 중국 미국 관세 보조금").split()
+
+
+def make_vocabulary(rng, n_words=20000):
+    """2~4음절 가상 단어 (본문 대부분을 채우는 일반 어휘)"""
+    syllables = [chr(0xAC00 + i) for i in range(0, 11172, 7)]
+    return ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(n_words)]
+
+
+def make_docs(n_reports, text_words, seed=0):
+    """
+    합성 리포트: 본문은 Zipf 분포의 일반 어휘 + 리포트마다 몇 개의 주제어(TOPICS) + 종목/산업명
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    start = date(2024, 1, 2)
+    docs = []
+    for i in range(n_reports):
+        which = "industry" if i % 5 == 0 else "company"
+        name = rng.choice(INDUSTRIES if which == "industry" else COMPANIES)
+        topics = rng.sample(TOPICS, 4)
+        words = rng.choices(vocabulary, weights, k=text_words)
+        for _ in range(text_words // 20):
+            words[rng.randrange(text_words)] = rng.choice(topics + [name])
+        doc = {
+            "pdf_url": f"https://stock.pstatic.net/stock-research/{i}.pdf",
+            "date": (start + timedelta(days=i * 640 // n_reports)).strftime("%y.%m.%d"),
+            "which": which,
+            "securities": f"증권{i % 20}",
+            "report_title": f"{name} {topics[0]} {topics[1]}",
+            "summary": " ".join(rng.choices(vocabulary, weights, k=30) + topics),
+            "text": " ".join(words),
+        }
+        doc["company_name" if which == "company" else "industry_name"] = name
+        docs.append(doc)
+    return docs
+
+
+QUERIES = [
+    ("삼성전자", None, None),
+    ("HBM 데이터센터 SK하이닉스", None, None),
+    ('"목표주가 상향" 현대차', ("2025-01-01", "2025-06-30"), "company"),
+    ("2차전지 수요", None, "industry"),
+    ("LG 배당", ("2025-07-01", None), None),  # 2글자 검색어 (trigram 불가, 직접 확인)
+    ("NIM 금리", None, None),
+]
+
+
+def scan_search(docs, query, date_range, which):
+    """모든 리포트를 확인하는 기준 구현 (naver_reports $regex 스캔과 같은 방식)"""
+    terms = ReportSearchIndex._split_query(query)
+    patterns = [re.compile(re.escape(term), re.IGNORECASE) for term in terms]
+    start, end = date_range or (None, None)
+    results = []
+    for doc in docs:
+        doc_date = "20" + doc["date"].replace(".", "-")
+        if (start and doc_date < start) or (end and doc_date > end) or (which and doc["which"] != which):
+            continue
+        fields = [doc["report_title"], doc.get("company_name") or doc.get("industry_name"), doc["summary"], doc["text"]]
+        if all(any(pattern.search(field) for field in fields) for pattern in patterns):
+            results.append(doc["pdf_url"])
+    return results
+
+
+def mongo_search(collection, query, date_range, which):
+    terms = ReportSearchIndex._split_query(query)
+    fields = ["report_title", "company_name", "industry_name", "summary", "text"]
+    conditions = [{"$or": [{field: {"$regex": re.escape(term), "$options": "i"}} for field in fields]} for term in terms]
+    if which:
+        conditions.append({"which": which})
+    start, end = date_range or (None, None)
+    # naver_reports의 date는 "yy.mm.dd" 문자열이므로 같은 형식으로 비교
+    if start:
+        conditions.append({"date": {"$gte": start[2:].replace("-", ".")}})
+    if end:
+        conditions.append({"date": {"$lte": end[2:].replace("-", ".")}})
+    return [doc["pdf_url"] for doc in collection.find({"$and": conditions}, {"_id": 0, "pdf_url": 1})]
+
+
+def run(n_reports, text_words, repeat, mongo_uri):
+    docs = make_docs(n_reports, text_words)
+    print(f"리포트 {n_reports:,}건 (본문 평균 {sum(len(doc['text']) for doc in docs) / n_reports:,.0f}자)")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_report_search_"), "index.sqlite")
+    index = ReportSearchIndex(path)
+    start = time.perf_counter()
+    for i in range(0, n_reports, 1000):
+        index.add(docs[i:i + 1000])
+    print(f"인덱스 생성 {time.perf_counter() - start:.1f}s, 파일 {os.path.getsize(path) / 1e6:,.0f}MB")
+
+    start = time.perf_counter()
+    index.add(docs[:100])
+    print(f"100건 재저장(upsert) {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    collection = None
+    if mongo_uri:
+        from pymongo import MongoClient
+        collection = MongoClient(mongo_uri)["quant"]["naver_reports_search_bench"]
+        collection.drop()
+        collection.insert_many([dict(doc) for doc in docs])
+
+    print(f"\n{'검색어':<34} {'결과':>6} {'전체 스캔':>10} {'FTS5 전체':>10} {'FTS5 상위50':>11}"
+          + (f" {'Mongo $regex':>13}" if collection is not None else ""))
+    for query, date_range, which in QUERIES:
+        timings = {}
+        for name, func in [("scan", lambda: scan_search(docs, query, date_range, which)),
+                           ("fts", lambda: index.search(query, date_range, which, limit=None, snippet=False))]:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = func()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = (best, result)
+        expected = set(timings["scan"][1])
+        found = set(timings["fts"][1]["pdf_url"])
+        assert found == expected, f"검색 결과 불일치: {query}"
+        start = time.perf_counter()
+        index.search(query, date_range, which, limit=50)
+        top50 = time.perf_counter() - start
+        line = (f"{query + (' ' + which if which else '') + (' 기간' if date_range else ''):<34} "
+                f"{len(found):>6,} {timings['scan'][0] * 1000:>8.0f}ms {timings['fts'][0] * 1000:>8.1f}ms "
+                f"{top50 * 1000:>9.1f}ms")
+        if collection is not None:
+            start = time.perf_counter()
+            mongo_search(collection, query, date_range, which)
+            line += f" {(time.perf_counter() - start) * 1000:>11.0f}ms"
+        print(line)
+
+    print("\n" + index.search("HBM 데이터센터", limit=3)[["date", "name", "title", "snippet"]].to_string())
+    if collection is not None:
+        collection.drop()
+    index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=30000)
+    parser.add_argument("--text-words", type=int, default=400, help="리포트 본문 단어 수")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mongo-uri", default=None, help="MongoDB $regex 스캔도 측정할 때 지정")
+    args = parser.parse_args()
+    run(args.reports, args.text_words, args.repeat, args.mongo_uri)
@@ -0,0 +1,96 @@
+"""
+SEIBRO XML 응답 파싱 벤치마크 (ET.fromstring + dict + to_numeric vs 스트리밍 컬럼 파서)
+
+사용법:
+    python -m benchmarks.bench_seibro_parse                       # 합성 응답(약 5MB) 사용
+    python -m benchmarks.bench_seibro_parse --fixture response.xml # 실제로 저장해 둔 응답 사용
+"""
+import argparse
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from tools.seibro_client import SeibroClient
+
+
+def make_response(n_rows):
+    """SEIBRO 응답과 같은 구조의 XML 바이트 생성"""
+    rng = np.random.default_rng(0)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><vector result="1">']
+    for i in range(n_rows):
+        parts.append(
+            "<data><result>"
+            f'<RNUM value="{i + 1}"/>'
+            f'<NATION_NM value="미국"/>'
+            f'<ISIN value="US{i:010d}"/>'
+            f'<KOR_SECN_NM value="종목{i}"/>'
+            f'<SUM_FRSEC_BUY_AMT value="{rng.integers(0, 10**9):,}"/>'
+            f'<SUM_FRSEC_SELL_AMT value="{rng.integers(0, 10**9):,}"/>'
+            f'<SUM_FRSEC_NET_BUY_AMT value="{rng.integers(-10**9, 10**9):,}"/>'
+            f'<SUM_FRSEC_TOT_AMT value="{rng.integers(0, 2 * 10**9):,}"/>'
+            "</result></data>"
+        )
+    parts.append("</vector>")
+    return "".join(parts).encode("utf-8")
+
+
+def legacy_parse(content, current_date):
+    """기존 방식: 전체 트리 생성 -> dict 행 -> DataFrame -> 컬럼별 to_numeric"""
+    root = ET.fromstring(content.decode("utf-8"))
+    rows = []
+    for data in root.findall(".//data"):
+        result = data.find("result")
+        if result is not None:
+            row = {child.tag: child.attrib.get("value", "") for child in result}
+            row["DATE"] = current_date
+            rows.append(row)
+    df = pd.DataFrame(rows).drop(columns=["RNUM", "NATION_NM"], errors="ignore")
+    for col in df.columns:
+        if col == "DATE":
+            continue
+        try:
+            df[col] = pd.to_numeric(df[col].str.replace(",", ""), errors="raise")
+        except Exception:
+            pass
+    return df
+
+
+def streaming_parse(client, content, current_date, chunk_size=64 * 1024):
+    chunks = (content[i:i + chunk_size] for i in range(0, len(content), chunk_size))
+    return client._process_dataframe(client._parse_xml_response(chunks, current_date))
+
+
+def run(content, repeat):
+    # __init__의 .env / MongoDB 연결 없이 파서만 사용
+    client = SeibroClient.__new__(SeibroClient)
+    current_date = pd.Timestamp("2025-01-02")
+    print(f"응답 크기: {len(content) / 1e6:.1f}MB")
+
+    for label, func in [
+        ("fromstring + to_numeric", lambda: legacy_parse(content, current_date)),
+        ("streaming columns", lambda: streaming_parse(client, content, current_date)),
+    ]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            df = func()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{label:<25} {len(df)}행 {best:.3f}s  ({len(df) / best:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixture", default=None, help="저장해 둔 SEIBRO XML 응답 파일")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture, "rb") as f:
+            content = f.read()
+    else:
+        content = make_response(args.rows)
+    run(content, args.repeat)
@@ -0,0 +1,199 @@
+"""
+리포트 요약 벤치마크
+- summarize_report 순차 호출 vs summarize_reports 동시 요청 vs 요약 캐시 재실행
+- 긴 리포트: 한 번에 요약 vs 청크별 동시 요약 후 합치기 (chunk_tokens)
+
+OpenAI Responses API(POST /v1/responses)를 흉내 내는 로컬 스텁 서버를 띄워서 측정하므로
+API 키나 비용 없이 동시성/토큰 예산/재시도 동작을 확인할 수 있습니다.
+
+사용법:
+    python -m benchmarks.bench_summarize
+    python -m benchmarks.bench_summarize --reports 40 --latency 0.5 --rate-limit-ratio 0.1
+    python -m benchmarks.bench_summarize --long-pages 60 --chunk-tokens 6000
+
+aiohttp가 필요합니다.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+from aiohttp import web
+
+
+class StubResponsesServer:
+    """
+    응답 지연과 일정 비율의 429를 흉내 내는 /v1/responses 스텁 서버 (별도 스레드에서 실행)
+    응답 지연 = latency + 입력 1,000자당 latency_per_1k초 (긴 프롬프트일수록 느림)
+    """
+
+    def __init__(self, latency, rate_limit_ratio, latency_per_1k=0.05, port=8765, seed=0):
+        self.latency = latency
+        self.latency_per_1k = latency_per_1k
+        self.rate_limit_ratio = rate_limit_ratio
+        self.port = port
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    async def handle(self, request):
+        body = await request.json()
+        self.requests += 1
+        if self.random.random() < self.rate_limit_ratio:
+            self.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429, headers={"retry-after-ms": "200"}
+            )
+
+        text = body["input"][-1]["content"]
+        n_chars = sum(len(message["content"]) for message in body["input"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency + self.latency_per_1k * n_chars / 1000)
+        finally:
+            self.in_flight -= 1
+
+        return web.json_response({
+            "id": f"resp_{self.requests}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body["model"],
+            "status": "completed",
+            "output": [{
+                "type": "message",
+                "id": f"msg_{self.requests}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": f"요약: {text[:20]}", "annotations": []}],
+            }],
+            "usage": {"input_tokens": n_chars, "output_tokens": 50, "total_tokens": n_chars + 50},
+        })
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_post("/v1/responses", self.handle)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", self.port).start())
+        self._ready.set()
+        loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def reset(self):
+        self.requests = self.rate_limited = self.max_in_flight = 0
+
+
+def make_items(n_reports, seed=0):
+    rng = random.Random(seed)
+    words = "반도체 수요 회복 재고 조정 실적 개선 목표주가 상향 투자의견 매수 유지 전망".split()
+    return [
+        (" ".join(rng.choice(words) for _ in range(rng.randint(300, 1500))), "industry" if i % 4 == 0 else "company")
+        for i in range(n_reports)
+    ]
+
+
+def make_long_items(n_reports, n_pages, seed=0):
+    """페이지(\f 구분)당 약 1,500자인 긴 산업 리포트"""
+    rng = random.Random(seed)
+    words = "업황 회복 수요 공급 증설 가격 상승 점유율 확대 규제 변화 수출 증가 밸류에이션 매력".split()
+    return [
+        ("\f".join(" ".join(rng.choice(words) for _ in range(500)) for _ in range(n_pages)), "industry")
+        for _ in range(n_reports)
+    ]
+
+
+def run_long(server, n_reports, n_pages, chunk_tokens, concurrency):
+    from tools.openai_client import summarize_reports
+
+    items = make_long_items(n_reports, n_pages, seed=1)
+    print(f"\n긴 리포트 {n_reports}건 x {n_pages}페이지 (리포트당 {len(items[0][0]):,}자)")
+    cases = [
+        ("한 번에 요약 (앞 20000자)", items, {}),
+        ("한 번에 요약 (전체)", [(text, "company") for text, _ in items], {}),  # 기업 리포트는 잘라내지 않음
+        (f"청크 요약 ({chunk_tokens}토큰)", items, {"chunk_tokens": chunk_tokens}),
+    ]
+    for label, case_items, kwargs in cases:
+        server.reset()
+        start = time.perf_counter()
+        _, usages = asyncio.run(summarize_reports(
+            case_items, max_concurrency=concurrency, tokens_per_minute=10_000_000, base_delay=0.2,
+            use_cache=False, return_usage=True, **kwargs
+        ))
+        elapsed = time.perf_counter() - start
+        print(f"{label:<28} {elapsed:6.2f}s  요청 {server.requests}, 청크 {usages[0]['chunks']}, "
+              f"리포트당 입력 토큰 {usages[0]['input_tokens']:,}")
+
+
+def run(n_reports, latency, rate_limit_ratio, concurrency, tokens_per_minute, long_pages, chunk_tokens):
+    server = StubResponsesServer(latency, rate_limit_ratio)
+    server.start()
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["REPORT_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_summary_cache_")
+
+    from tools.openai_client import summarize_report, summarize_reports, estimate_tokens, summary_cache
+
+    items = make_items(n_reports)
+    print(f"리포트 {n_reports}건, 추정 입력 토큰 {sum(estimate_tokens(text) for text, _ in items):,}, "
+          f"스텁 지연 {latency}s, 429 비율 {rate_limit_ratio:.0%}")
+
+    start = time.perf_counter()
+    sequential = [summarize_report(text, report_type, use_cache=False) for text, report_type in items]
+    elapsed = time.perf_counter() - start
+    failed = sum(summary.startswith("요약 실패") for summary in sequential)
+    print(f"{'순차 summarize_report':<28} {elapsed:6.2f}s  요청 {server.requests}, 429 {server.rate_limited}, "
+          f"실패 {failed}")
+
+    server.reset()
+    start = time.perf_counter()
+    concurrent = asyncio.run(summarize_reports(
+        items, max_concurrency=concurrency, tokens_per_minute=tokens_per_minute, base_delay=0.2
+    ))
+    elapsed = time.perf_counter() - start
+    failed = sum(summary.startswith("요약 실패") for summary in concurrent)
+    print(f"{f'summarize_reports (동시 {concurrency})':<28} {elapsed:6.2f}s  요청 {server.requests}, "
+          f"429 {server.rate_limited}, 실패 {failed}, 최대 동시 처리 {server.max_in_flight}")
+    print(f"결과 일치: {sum(a == b for a, b in zip(sequential, concurrent))}/{n_reports}")
+
+    # 같은 리포트를 다시 요약하면 summary_cache에서 바로 반환 (API 호출 없음)
+    server.reset()
+    start = time.perf_counter()
+    cached = asyncio.run(summarize_reports(items, max_concurrency=concurrency, tokens_per_minute=tokens_per_minute))
+    elapsed = time.perf_counter() - start
+    print(f"{'재실행 (요약 캐시)':<28} {elapsed:6.2f}s  요청 {server.requests}, 캐시 {summary_cache.stats()}")
+    print(f"결과 일치: {sum(a == b for a, b in zip(sequential, cached))}/{n_reports}")
+
+    if long_pages:
+        server.rate_limit_ratio = 0
+        run_long(server, 4, long_pages, chunk_tokens, concurrency * 4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3, help="스텁 서버 응답 지연 (초)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.1, help="429로 응답할 요청 비율")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="분당 토큰 한도")
+    parser.add_argument("--long-pages", type=int, default=40, help="긴 리포트 페이지 수 (0이면 생략)")
+    parser.add_argument("--chunk-tokens", type=int, default=6000)
+    args = parser.parse_args()
+    run(args.reports, args.latency, args.rate_limit_ratio, args.concurrency, args.tpm,
+        args.long_pages, args.chunk_tokens)
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from tools.columnar_cache import ParquetCache
+from tools.mongo_reader import find_dataframe
+
+DOCS = [
+    {"TRD_DD": datetime(2025, 1, 2), "ISU_CD": "069500", "NAV": 35000.5},
+    {"TRD_DD": datetime(2025, 1, 2), "ISU_CD": "114800", "NAV": "-"},  # 같은 날 숫자/문자열 혼재
+    {"TRD_DD": datetime(2025, 1, 2), "ISU_CD": "122630", "NAV": None},
+    {"TRD_DD": datetime(2025, 1, 3), "ISU_CD": "069500", "NAV": 35100.0},
+    {"TRD_DD": datetime(2025, 1, 3), "ISU_CD": "114800", "NAV": 4100.5},
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    collection = mongomock.MongoClient()["quant"]["krx_etf"]
+    collection.insert_many([dict(doc) for doc in DOCS])
+    cache = ParquetCache(collection, "krx_etf", "TRD_DD", cache_dir=str(tmp_path))
+    assert cache.refresh() == len(DOCS)
+    return cache
+
+
+@pytest.mark.parametrize("start, end, columns", [
+    ("2025-01-01", "2025-01-31", None),
+    ("2025-01-01", "2025-01-31", ["TRD_DD", "NAV"]),
+    ("2025-01-03", "2025-01-03", None),  # 문자열이 섞인 날짜가 없는 범위
+])
+def test_cache_read_matches_mongo(cache, start, end, columns):
+    assert cache._partitions() == ["20250102", "20250103"]
+
+    query = {"TRD_DD": {"$gte": pd.Timestamp(start).to_pydatetime(), "$lte": pd.Timestamp(end).to_pydatetime()}}
+    expected = find_dataframe(cache.collection, query, columns=columns, sort=[("TRD_DD", 1)])
+    cached = cache.read(start, end, columns=columns)
+
+    pd.testing.assert_frame_equal(cached, expected)
+    assert cached["NAV"].map(type).tolist() == expected["NAV"].map(type).tolist()
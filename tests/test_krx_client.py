@@ -0,0 +1,46 @@
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from tools import krx_client
+from tools.krx_client import KrxClient
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("PARQUET_CACHE_DIR", str(tmp_path))
+    with mock.patch.object(krx_client, "MongoClient", mongomock.MongoClient):
+        client = KrxClient()
+    client.etf_collection.insert_many([
+        {"TRD_DD": datetime(2025, 1, day), "ISU_CD": code, "ISU_ABBRV": code, "TDD_CLSPRC": 100.0 + day}
+        for day in (2, 3) for code in ("069500", "114800")
+    ])
+    return client
+
+
+def test_etf_panel_memo_is_bounded_lru(client):
+    client.etf_panel_memo_size = 2
+    for end in ("2025-01-02", "2025-01-03", "2025-01-04"):
+        client.get_etf_panel(["TDD_CLSPRC"], "2025-01-01", end)
+    assert len(client._etf_panel_memo) == 2
+    assert [key[2].day for key in client._etf_panel_memo] == [3, 4]
+
+
+def test_etf_panel_memo_detects_writes_from_other_clients(client):
+    panel = client.get_etf_panel(["TDD_CLSPRC"], "2025-01-01", "2025-01-31")["TDD_CLSPRC"]
+    assert panel.shape == (2, 2)
+
+    with mock.patch.object(client, "_aggregate_etf_panel", wraps=client._aggregate_etf_panel) as aggregate:
+        client.get_etf_panel(["TDD_CLSPRC"], "2025-01-01", "2025-01-31")
+        assert aggregate.call_count == 0
+
+        # 다른 KrxClient/프로세스가 저장한 것처럼 컬렉션에 직접 추가
+        client.etf_collection.insert_one(
+            {"TRD_DD": datetime(2025, 1, 6), "ISU_CD": "069500", "ISU_ABBRV": "069500", "TDD_CLSPRC": 110.0}
+        )
+        panel = client.get_etf_panel(["TDD_CLSPRC"], "2025-01-01", "2025-01-31")["TDD_CLSPRC"]
+        assert aggregate.call_count == 1
+    assert panel.shape == (3, 2)
@@ -0,0 +1,64 @@
+import threading
+from unittest import mock
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from tools import naver_client
+from tools.naver_client import NaverReportScraper
+
+
+@pytest.fixture
+def scraper(monkeypatch, tmp_path):
+    monkeypatch.setenv("REPORT_CACHE_DIR", str(tmp_path))
+    with mock.patch.object(naver_client, "MongoClient", mongomock.MongoClient):
+        scraper = NaverReportScraper()
+    scraper.download_workers = 2
+    scraper.extract_workers = 1
+    scraper.summary_workers = 2
+    scraper.queue_size = 2
+    return scraper
+
+
+def _make_reports(n):
+    return [
+        {"종류": "company", "증권사": "테스트증권", "리포트명": f"리포트 {i}", "회사명": "삼성전자",
+         "pdf주소": f"https://stock.pstatic.net/stock-research/{i}.pdf", "날짜": "25.01.02", "텍스트": "", "요약": ""}
+        for i in range(n)
+    ]
+
+
+def _run(scraper, reports):
+    """파이프라인이 멈추면 테스트가 끝나지 않으므로 별도 스레드에서 실행하고 제한 시간 안에 끝나는지 확인"""
+    thread = threading.Thread(target=scraper._process_reports, args=(reports, "company"), daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), "_process_reports가 끝나지 않았습니다"
+
+
+def test_process_reports_survives_summary_cache_errors(scraper):
+    cache = mock.Mock()
+    cache.get_hash.return_value = "hash"
+    cache.get_text.return_value = "반도체 업황 회복"
+    cache.get_summary.side_effect = RuntimeError("cache broken")
+    scraper.cache = cache
+
+    reports = _make_reports(12)  # 요약 스레드 수 + 큐 크기보다 많게
+    with mock.patch.object(naver_client, "summarize_report") as summarize:
+        _run(scraper, reports)
+
+    summarize.assert_not_called()
+    assert all(report["요약"] == "요약 실패: cache broken" for report in reports)
+
+
+def test_process_reports_survives_download_cache_errors(scraper):
+    cache = mock.Mock()
+    cache.get_hash.side_effect = OSError("disk error")
+    scraper.cache = cache
+
+    reports = _make_reports(12)
+    _run(scraper, reports)
+
+    assert all(report["텍스트"] == "PDF 추출 실패: disk error" for report in reports)
+    assert all(report["요약"] == "텍스트 없음 또는 PDF 추출 실패" for report in reports)
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+
+from tools import openai_client
+
+
+class FakeClient:
+    """responses.create 호출 수와 최대 동시 호출 수를 기록하는 가짜 OpenAI 클라이언트"""
+
+    def __init__(self, latency=0.02, fail_first=0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.responses = SimpleNamespace(create=self.create)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def create(self, **body):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.fail_first:
+                request = SimpleNamespace(method="POST", url="https://api.openai.com/v1/responses")
+                response = SimpleNamespace(status_code=429, headers={"retry-after-ms": "1"}, request=request)
+                raise openai.RateLimitError("Rate limit reached", response=response, body=None)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return SimpleNamespace(output_text="요약", usage=None)
+
+
+def test_chunked_summaries_share_request_limit():
+    client = FakeClient()
+    text = "\f".join("반도체 업황 회복 " * 300 for _ in range(12))
+    with mock.patch.object(openai_client, "get_client", return_value=client):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            summaries = list(executor.map(
+                lambda _: openai_client.summarize_report(text, "industry", use_cache=False, chunk_tokens=1000),
+                range(4)
+            ))
+
+    assert summaries == ["요약"] * 4
+    assert client.calls > 4 * openai_client.MAX_CONCURRENT_REQUESTS
+    assert client.max_in_flight <= openai_client.MAX_CONCURRENT_REQUESTS
+
+
+def test_summarize_report_retries_rate_limit():
+    client = FakeClient(latency=0, fail_first=2)
+    with mock.patch.object(openai_client, "get_client", return_value=client):
+        summary, usage = openai_client.summarize_report("반도체 업황 회복", use_cache=False, return_usage=True)
+
+    assert summary == "요약"
+    assert client.calls == 3
+    assert usage["requests"] == 1
@@ -0,0 +1,21 @@
+from unittest import mock
+
+import requests
+
+from tools import openfigi_client
+from tools.openfigi_client import OpenFIGIClient
+
+
+def test_request_batch_backs_off_after_network_error(monkeypatch):
+    monkeypatch.delenv("MONGODB_URI", raising=False)
+    client = OpenFIGIClient(mongo_uri=None, max_retries=2)
+    ok = mock.Mock(status_code=200, headers={})
+    ok.json.return_value = [{"data": []}]
+
+    with mock.patch.object(openfigi_client.requests, "post",
+                           side_effect=[requests.ConnectionError("reset"), requests.ConnectionError("reset"), ok]), \
+            mock.patch.object(openfigi_client.time, "sleep") as sleep, \
+            mock.patch.object(openfigi_client.random, "uniform", side_effect=lambda low, high: high):
+        assert client._request_batch(["US0378331005"]) == [{"data": []}]
+
+    assert [call.args[0] for call in sleep.call_args_list] == [2.0, 4.0]
@@ -0,0 +1,178 @@
+import json
+import threading
+from datetime import datetime
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from tools import seibro_client
+from tools.rate_limiter import AdaptivePacer
+from tools.seibro_client import SeibroClient
+
+ROW_XML = (
+    '<vector result="1"><data><result>'
+    '<ISIN value="US0378331005"/><KOR_SECN_NM value="애플"/><SETL_AMT value="1,234.5"/>'
+    '</result></data></vector>'
+).encode("utf-8")
+EMPTY_XML = b'<vector result="0"></vector>'
+BROKEN_XML = b'<vector result="1"><data><result><ISIN value="US0378331005"'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("USER_AGENT", "test-agent")
+    with mock.patch.object(seibro_client, "MongoClient", mongomock.MongoClient):
+        yield SeibroClient(mongo_uri="mongodb://localhost:27017")
+
+
+def _collect(client, responses, checkpoint_path, start="2024-03-04", end="2024-03-09"):
+    """날짜(YYYYMMDD)별 응답 바이트를 돌려주도록 요청 부분만 바꿔서 병렬 수집 실행"""
+    requested = []
+
+    def post_and_parse(session, payload, current_date):
+        date_str = current_date.strftime("%Y%m%d")
+        requested.append(date_str)
+        return client._parse_xml_response(responses[date_str], current_date)
+
+    pacer = AdaptivePacer(initial_delay=0, min_delay=0, jitter=0)
+    with mock.patch.object(client, "_post_and_parse", side_effect=post_and_parse):
+        df = client.collect_settlement_data_parallel(
+            start, end, skip_existing=False, checkpoint_path=str(checkpoint_path), pacer=pacer
+        )
+    return df, sorted(requested)
+
+
+def test_parallel_checkpoint_retries_empty_and_unparseable_trading_days(client, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    responses = {
+        "20240304": ROW_XML,
+        "20240305": BROKEN_XML,  # 응답이 잘려 파싱 실패
+        "20240306": EMPTY_XML,   # 거래일인데 빈 응답
+        "20240307": ROW_XML,
+        "20240308": ROW_XML,
+        "20240309": EMPTY_XML,   # 토요일
+    }
+
+    df, requested = _collect(client, responses, checkpoint_path)
+    assert len(requested) == 6
+    assert sorted(df["DATE"].dt.strftime("%Y%m%d")) == ["20240304", "20240307", "20240308"]
+    checkpoint = json.loads(checkpoint_path.read_text())
+    assert checkpoint["completed_dates"] == ["20240304", "20240307", "20240308", "20240309"]
+
+    # 다음 실행에서는 파싱 실패/빈 거래일만 다시 요청
+    responses.update({"20240305": ROW_XML, "20240306": ROW_XML})
+    df, requested = _collect(client, responses, checkpoint_path)
+    assert requested == ["20240305", "20240306"]
+    assert len(df) == 2
+    assert client.collection.count_documents({}) == 5
+
+
+def test_parallel_checkpoint_ignores_other_date_range(client, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    checkpoint_path.write_text(json.dumps({
+        "scope": ["20240301", "20240331"],
+        "completed_dates": ["20240304", "20240305"],
+    }))
+    responses = {"20240304": ROW_XML, "20240305": ROW_XML}
+
+    _, requested = _collect(client, responses, checkpoint_path, end="2024-03-05")
+    assert requested == ["20240304", "20240305"]
+    assert json.loads(checkpoint_path.read_text())["scope"] == ["20240304", "20240305"]
+
+
+def test_parse_xml_response_returns_none_on_parse_error(client):
+    assert client._parse_xml_response(BROKEN_XML, datetime(2024, 3, 5)) is None
+    assert client._parse_xml_response(EMPTY_XML, datetime(2024, 3, 9)).empty
+    df = client._parse_xml_response(ROW_XML, datetime(2024, 3, 4))
+    assert df.loc[0, "SETL_AMT"] == 1234.5
+    assert df.loc[0, "DATE"] == pd.Timestamp("2024-03-04")
+
+
+def test_parse_xml_response_blank_cell_keeps_numeric_column(client):
+    content = (
+        '<vector result="1"><data>'
+        '<result><ISIN value="US0378331005"/><SETL_AMT value="1,234"/><KOR_SECN_NM value="애플"/></result>'
+        '<result><ISIN value="US5949181045"/><SETL_AMT value=" "/><KOR_SECN_NM value="마이크로소프트"/></result>'
+        '<result><ISIN value="US67066G1040"/><SETL_AMT value="56.5"/><KOR_SECN_NM value="엔비디아"/></result>'
+        '</data></vector>'
+    ).encode("utf-8")
+    df = client._parse_xml_response(content, datetime(2024, 3, 4))
+    assert df["SETL_AMT"].dtype == "float64"
+    assert df["SETL_AMT"].isna().tolist() == [False, True, False]
+    assert df.loc[0, "SETL_AMT"] == 1234
+    assert not pd.api.types.is_numeric_dtype(df["KOR_SECN_NM"])
+
+
+def test_streaming_returns_when_processing_fails(client):
+    frame = client._parse_xml_response(ROW_XML, datetime(2024, 3, 4))
+
+    def post_and_parse(session, payload, current_date):
+        return frame.assign(DATE=current_date)
+
+    result = {}
+
+    def run():
+        with mock.patch.object(client, "_post_and_parse", side_effect=post_and_parse), \
+                mock.patch.object(client, "_process_dataframe", side_effect=ValueError("bad frame")):
+            result["summary"] = client.collect_settlement_data_streaming(
+                "2024-03-01", "2024-03-26", sleep_range=(0, 0), skip_existing=False, flush_rows=1, queue_size=2
+            )
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), "collect_settlement_data_streaming가 끝나지 않았습니다"
+
+    summary = result["summary"]
+    assert summary["days"] == 26
+    assert len(summary["failed_dates"]) == 26
+    assert client.collection.count_documents({}) == 0
+
+
+def test_streaming_raises_when_writer_thread_dies(client):
+    frame = client._parse_xml_response(ROW_XML, datetime(2024, 3, 4))
+
+    with mock.patch.object(client, "_post_and_parse", return_value=frame), \
+            mock.patch.object(seibro_client.threading, "Thread") as thread_cls:
+        thread_cls.return_value.is_alive.return_value = False
+        with pytest.raises(RuntimeError):
+            client.collect_settlement_data_streaming(
+                "2024-03-01", "2024-03-26", sleep_range=(0, 0), skip_existing=False, queue_size=2
+            )
+
+
+def test_range_falls_back_to_single_daily_requests_once(client):
+    requests_made = []
+
+    def create_payload(date_str, end_date_str=None, pg_start=1, pg_end=10):
+        return (date_str, end_date_str, pg_start, pg_end)
+
+    def post_and_parse(session, payload, current_date):
+        requests_made.append(payload)
+        date_str, end_date_str, _, _ = payload
+        if end_date_str not in (None, date_str):
+            return pd.concat([client._parse_xml_response(ROW_XML, current_date)] * 3, ignore_index=True)
+        if date_str == "20240306":
+            raise seibro_client.requests.ConnectionError("reset")
+        return client._parse_xml_response(ROW_XML, current_date)
+
+    with mock.patch.object(client, "_create_payload", side_effect=create_payload), \
+            mock.patch.object(client, "_post_and_parse", side_effect=post_and_parse):
+        df = client.collect_settlement_data_range(
+            "2024-03-04", "2024-03-15", save_to_db=False, sleep_range=(0, 0), skip_existing=False
+        )
+
+    # 첫 구간만 기간 요청 1번, 나머지는 하루 한 번씩 PG 1~10 요청
+    range_requests = [p for p in requests_made if p[1] not in (None, p[0])]
+    day_requests = [p for p in requests_made if p[1] is None]
+    assert len(range_requests) == 1
+    assert len(day_requests) == 10
+    assert all(p[2:] == (1, 10) for p in day_requests)
+    # 실패한 하루만 빠지고 같은 구간의 다른 날짜는 유지
+    assert sorted(df["DATE"].dt.strftime("%Y%m%d")) == [
+        "20240304", "20240305", "20240307", "20240308",
+        "20240311", "20240312", "20240313", "20240314", "20240315",
+    ]
@@ -0,0 +1,143 @@
+import asyncio
+import json
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from tools.rate_limiter import AsyncTokenBucket
+
+
+# 호스트별 기본 초당 요청 수 (기존 동기 코드의 sleep 간격과 비슷한 수준)
+DEFAULT_HOST_RATES = {
+    "data.krx.co.kr": 2.0,
+    "freesis.kofia.or.kr": 1.0,
+    "seibro.or.kr": 0.25,
+}
+
+# 클라이언트 헤더에 하드코딩된 값 중 aiohttp가 직접 관리해야 하는 헤더
+_MANAGED_HEADERS = {"content-length", "host", "connection", "accept-encoding"}
+
+
+class AsyncResponse:
+    """본문을 모두 읽어 둔 HTTP 응답"""
+
+    def __init__(self, status: int, headers, content: bytes, url: str):
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientError(f"HTTP {self.status} 오류 ({self.url})")
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.content.decode(encoding)
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncHttpEngine:
+    """
+    KRX / KOFIA / SEIBRO 수집기가 공유하는 비동기 HTTP 엔진
+
+    - keep-alive 커넥션 풀 (aiohttp.ClientSession 하나를 공유)
+    - 호스트별 동시 요청 수 제한 (Semaphore)
+    - 호스트별 초당 요청 수 제한 (AsyncTokenBucket)
+
+    사용 예:
+        async with AsyncHttpEngine() as engine:
+            await asyncio.gather(krx.update_data_async(engine), kofia.update_data_async(engine))
+    """
+
+    def __init__(self, per_host_limit: int = 4,
+                 host_rates: Optional[Dict[str, float]] = None,
+                 default_rate: float = 1.0,
+                 timeout: float = 30,
+                 retries: int = 2):
+        """
+        Args:
+            per_host_limit (int): 호스트별 동시 요청 수
+            host_rates (dict, optional): 호스트별 초당 요청 수 (DEFAULT_HOST_RATES를 덮어씀)
+            default_rate (float): host_rates에 없는 호스트의 초당 요청 수
+            timeout (float): 요청 타임아웃 (초)
+            retries (int): 네트워크 오류/5xx 응답 시 재시도 횟수
+        """
+        self.per_host_limit = per_host_limit
+        self.host_rates = {**DEFAULT_HOST_RATES, **(host_rates or {})}
+        self.default_rate = default_rate
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._limiters: Dict[str, AsyncTokenBucket] = {}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.per_host_limit, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _host_state(self, host: str):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+            self._limiters[host] = AsyncTokenBucket(self.host_rates.get(host, self.default_rate))
+        return self._semaphores[host], self._limiters[host]
+
+    @staticmethod
+    def _clean_headers(headers: Optional[dict]) -> dict:
+        if not headers:
+            return {}
+        return {k: v for k, v in headers.items() if k.lower() not in _MANAGED_HEADERS and v is not None}
+
+    async def request(self, method: str, url: str, headers: Optional[dict] = None, **kwargs) -> AsyncResponse:
+        """
+        호스트별 동시성/속도 제한을 지켜서 요청을 보내고 본문까지 읽어서 반환
+
+        Args:
+            method (str): HTTP 메소드
+            url (str): 요청 URL
+            headers (dict, optional): 요청 헤더
+            **kwargs: aiohttp 요청 인자 (data, json 등)
+
+        Returns:
+            AsyncResponse: 응답 (status, headers, content)
+        """
+        await self.open()
+        host = urlsplit(url).hostname
+        semaphore, limiter = self._host_state(host)
+        headers = self._clean_headers(headers)
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    await limiter.acquire()
+                    async with self._session.request(method, url, headers=headers, **kwargs) as resp:
+                        content = await resp.read()
+                        response = AsyncResponse(resp.status, resp.headers, content, str(resp.url))
+                if response.status < 500 or attempt == self.retries:
+                    return response
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(2 ** attempt)
+
+    async def post(self, url: str, headers: Optional[dict] = None, **kwargs) -> AsyncResponse:
+        return await self.request("POST", url, headers=headers, **kwargs)
+
+    async def get(self, url: str, headers: Optional[dict] = None, **kwargs) -> AsyncResponse:
+        return await self.request("GET", url, headers=headers, **kwargs)
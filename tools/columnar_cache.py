@@ -0,0 +1,186 @@
+import logging
+import os
+import shutil
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+
+TEXT_SUFFIX = "__text"  # 숫자/문자열이 섞인 컬럼의 문자열 값을 따로 저장하는 보조 컬럼 접미사
+
+
+def _to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """
+    DataFrame을 pyarrow Table로 변환
+
+    MongoDB 문서는 같은 필드에 숫자와 문자열이 섞여 있을 수 있는데(예: 1234.5와 "-"),
+    이런 object 컬럼은 Arrow 타입으로 바로 변환되지 않으므로 숫자는 원래 컬럼에 숫자로,
+    문자열은 {컬럼}{TEXT_SUFFIX} 보조 컬럼에 나눠 저장합니다. (read()에서 다시 합쳐 MongoDB 조회 결과와 같게 복원)
+    그 외 변환할 수 없는 값(dict 등)이 있는 컬럼은 문자열로 저장합니다.
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            try:
+                pa.array(df[col], from_pandas=True)
+                continue
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                pass
+            values = df[col]
+            is_text = values.map(lambda value: isinstance(value, str))
+            others = values.where(~is_text)
+            numbers = pd.to_numeric(others, errors="coerce")
+            if numbers.notna().sum() == others.notna().sum():
+                df[col] = numbers
+                df[f"{col}{TEXT_SUFFIX}"] = values.where(is_text, None)
+            else:
+                df[col] = df[col].map(str, na_action="ignore")
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _restore_text_values(df: pd.DataFrame) -> pd.DataFrame:
+    """_to_arrow_table에서 나눠 저장한 문자열 값을 원래 컬럼에 다시 합침"""
+    for text_col in [col for col in df.columns if col.endswith(TEXT_SUFFIX)]:
+        col = text_col[:-len(TEXT_SUFFIX)]
+        is_text = df[text_col].notna()
+        if col in df.columns and is_text.any():
+            values = df[col].astype(object).where(~is_text, df[text_col])
+            # MongoDB 조회 결과처럼 object 컬럼의 빈 값은 None
+            df[col] = values.where(values.notna(), None)
+        df = df.drop(columns=text_col)
+    return df
+
+
+class ParquetCache:
+    """
+    MongoDB 컬렉션의 로컬 Parquet 캐시 (날짜별 파티션)
+
+    - 디렉토리 구조: {cache_dir}/{name}/{YYYYMMDD}.parquet
+    - refresh(): 캐시의 마지막 날짜부터 MongoDB의 새 데이터만 가져와서 파티션 추가
+      (마지막 날짜는 수집 도중 캐시됐을 수 있으므로 다시 받아서 덮어씀)
+    - read(): 날짜 범위에 해당하는 파일만 골라 필요한 컬럼만 memory-map으로 읽음
+
+    MongoDB에 캐시 마지막 날짜보다 이전 데이터가 새로 들어온 경우(과거 백필)는 rebuild()로 다시 만듭니다.
+    """
+
+    def __init__(self, collection, name: str, date_field: str, cache_dir: Optional[str] = None):
+        """
+        Args:
+            collection: pymongo Collection
+            name (str): 캐시 이름 (하위 디렉토리명)
+            date_field (str): 파티션 기준 날짜 필드
+            cache_dir (str, optional): 캐시 루트 디렉토리 (None이면 PARQUET_CACHE_DIR 환경변수 또는 .parquet_cache)
+        """
+        self.collection = collection
+        self.name = name
+        self.date_field = date_field
+        cache_dir = cache_dir or os.getenv("PARQUET_CACHE_DIR", ".parquet_cache")
+        self.path = os.path.join(cache_dir, name)
+
+    def _partition_path(self, day) -> str:
+        return os.path.join(self.path, f"{pd.Timestamp(day).strftime('%Y%m%d')}.parquet")
+
+    def _partitions(self) -> List[str]:
+        """캐시된 파티션 날짜(YYYYMMDD) 목록 (오름차순)"""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(f[:-len(".parquet")] for f in os.listdir(self.path) if f.endswith(".parquet"))
+
+    def latest_cached_date(self) -> Optional[pd.Timestamp]:
+        """캐시에 있는 가장 최근 날짜"""
+        partitions = self._partitions()
+        return pd.Timestamp(partitions[-1]) if partitions else None
+
+    def refresh(self) -> int:
+        """
+        MongoDB에서 캐시 이후 데이터만 가져와서 캐시 갱신
+
+        Returns:
+            int: 새로 가져온 행 수
+        """
+        latest = self.latest_cached_date()
+        query = {self.date_field: {"$gte": latest.to_pydatetime()}} if latest is not None else {}
+        data = list(self.collection.find(query, {"_id": 0}))
+        if not data:
+            return 0
+
+        df = pd.DataFrame(data)
+        df[self.date_field] = pd.to_datetime(df[self.date_field])
+        os.makedirs(self.path, exist_ok=True)
+
+        for day, day_df in df.groupby(df[self.date_field].dt.normalize()):
+            path = self._partition_path(day)
+            tmp_path = f"{path}.tmp"
+            try:
+                pq.write_table(_to_arrow_table(day_df), tmp_path)
+            except pa.ArrowException as e:
+                # 변환할 수 없는 날짜는 캐시하지 않고 넘어감 (나머지 날짜는 그대로 캐시)
+                logger.warning(f"{self.name} {pd.Timestamp(day).strftime('%Y-%m-%d')} 캐시 저장 실패: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                continue
+            os.replace(tmp_path, path)
+
+        return len(df)
+
+    def rebuild(self) -> int:
+        """캐시를 지우고 MongoDB 전체 데이터로 다시 생성"""
+        self.clear()
+        return self.refresh()
+
+    def clear(self):
+        """캐시 삭제"""
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+
+    def read(self, start_date=None, end_date=None, columns: Optional[List[str]] = None,
+             filters: Optional[list] = None) -> pd.DataFrame:
+        """
+        캐시에서 날짜 범위/컬럼을 골라 읽기
+
+        Args:
+            start_date: 시작 날짜 (포함)
+            end_date: 종료 날짜 (포함)
+            columns (List[str], optional): 읽을 컬럼 (None이면 전체)
+            filters (list, optional): pyarrow 필터 (예: [("ISU_CD", "in", codes)])
+
+        Returns:
+            pd.DataFrame: 날짜순으로 정렬된 데이터
+        """
+        start = pd.Timestamp(start_date).strftime("%Y%m%d") if start_date is not None else None
+        end = pd.Timestamp(end_date).strftime("%Y%m%d") if end_date is not None else None
+        partitions = [
+            p for p in self._partitions()
+            if (start is None or p >= start) and (end is None or p <= end)
+        ]
+
+        tables = []
+        for partition in partitions:
+            path = os.path.join(self.path, f"{partition}.parquet")
+            read_columns = None
+            if columns is not None:
+                # 파티션마다 컬럼 구성이 다를 수 있으므로 있는 컬럼만 읽음
+                names = pq.read_schema(path).names
+                read_columns = [c for c in columns if c in names]
+                read_columns += [f"{c}{TEXT_SUFFIX}" for c in columns if f"{c}{TEXT_SUFFIX}" in names]
+            tables.append(pq.read_table(path, columns=read_columns, filters=filters, memory_map=True))
+
+        if not tables:
+            return pd.DataFrame()
+
+        # 날짜마다 타입이 조금씩 다를 수 있어(int/float, null 등) 스키마를 맞춰서 합침
+        try:
+            df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+        except pa.ArrowException:
+            # 날짜에 따라 같은 컬럼이 숫자/문자열로 달라 Arrow에서 합칠 수 없으면 pandas로 합침
+            df = pd.concat([table.to_pandas() for table in tables], ignore_index=True)
+        df = _restore_text_values(df)
+        if self.date_field in df.columns:
+            df = df.sort_values(self.date_field, kind="stable").reset_index(drop=True)
+        return df
@@ -0,0 +1,89 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def forward_returns(signals: pd.DataFrame, prices: pd.DataFrame, max_days: int = 15) -> pd.DataFrame:
+    """
+    시그널(이벤트)마다 기준일부터 1~max_days일 후까지의 누적 수익률을 한 번에 계산
+
+    로그 가격 배열의 (max_days + 1)일 strided view에서 이벤트 위치만 골라
+    기준일 대비 가격 비율을 계산합니다. (종목/날짜별 반복 없음)
+    기존 calc_cumulative_return과 같이 다음 이벤트는 제외합니다.
+    - 기준일이 가격 데이터에 없거나 종목이 가격 데이터에 없음
+    - 기준일 이후 max_days일 데이터가 부족함
+    - 구간 안에 결측치(또는 0 이하 가격)가 있음
+
+    Args:
+        signals (pd.DataFrame): 날짜 x 종목 bool 시그널 행렬 (True인 칸이 이벤트)
+        prices (pd.DataFrame): 날짜 x 종목 가격 행렬 (예: adjClose)
+        max_days (int): 최대 며칠 후까지 계산할지
+
+    Returns:
+        pd.DataFrame: index=(DATE, ticker) 이벤트, columns=0..max_days, 값=기준일 대비 가격 비율 (0일 = 1.0)
+    """
+    columns = pd.RangeIndex(max_days + 1)
+    event_index = pd.MultiIndex.from_arrays([[], []], names=["DATE", "ticker"])
+    empty = pd.DataFrame(np.empty((0, max_days + 1)), index=event_index, columns=columns)
+
+    prices = prices.sort_index()
+    if len(prices) <= max_days:
+        return empty
+
+    # 이벤트 위치 (시그널 행렬 기준 -> 가격 행렬 기준)
+    sig_rows, sig_cols = np.nonzero(signals.fillna(False).to_numpy(dtype=bool))
+    price_rows = prices.index.get_indexer(signals.index)[sig_rows]
+    price_cols = prices.columns.get_indexer(signals.columns)[sig_cols]
+    valid = (price_rows >= 0) & (price_cols >= 0) & (price_rows < len(prices) - max_days)
+    sig_rows, sig_cols = sig_rows[valid], sig_cols[valid]
+    price_rows, price_cols = price_rows[valid], price_cols[valid]
+
+    values = prices.to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_prices = np.log(np.where(values > 0, values, np.nan))
+
+    # (T - max_days, K, max_days + 1) 복사 없는 view에서 이벤트만 골라냄
+    windows = sliding_window_view(log_prices, max_days + 1, axis=0)[price_rows, price_cols]
+    cum = np.exp(windows - windows[:, :1])
+    complete = ~np.isnan(cum).any(axis=1)
+
+    event_index = pd.MultiIndex.from_arrays(
+        [signals.index[sig_rows[complete]], signals.columns[sig_cols[complete]]],
+        names=["DATE", "ticker"]
+    )
+    return pd.DataFrame(cum[complete], index=event_index, columns=columns)
+
+
+def event_summary(events: pd.DataFrame, horizons: Optional[Sequence[int]] = None, by=None) -> pd.DataFrame:
+    """
+    이벤트별 누적 수익률을 기간(일)별 적중률/평균 수익률 표로 요약
+
+    Args:
+        events (pd.DataFrame): forward_returns 결과
+        horizons (Sequence[int], optional): 요약할 기간 (None이면 1..max_days 전체)
+        by (optional): 그룹 기준 - 인덱스 레벨 이름("DATE", "ticker") 또는 groupby에 넘길 값
+            (예: 월별 events.index.get_level_values("DATE").to_period("M"))
+
+    Returns:
+        pd.DataFrame: 기간별 count, mean(%), median(%), std(%), hit_rate(%)
+            (by를 지정하면 (그룹, 기간) 인덱스)
+    """
+    if horizons is None:
+        horizons = [h for h in events.columns if h > 0]
+    returns = (events[list(horizons)] - 1) * 100
+
+    def summarize(frame):
+        return pd.DataFrame({
+            "count": frame.count(),
+            "mean": frame.mean(),
+            "median": frame.median(),
+            "std": frame.std(),
+            "hit_rate": (frame > 0).mean() * 100,
+        }).rename_axis("horizon")
+
+    if by is None:
+        return summarize(returns)
+    grouped = returns.groupby(level=by) if isinstance(by, str) else returns.groupby(by)
+    return pd.concat({key: summarize(group) for key, group in grouped})
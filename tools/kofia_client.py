@@ -1,10 +1,12 @@
 import os
+import asyncio
 import requests
 import pandas as pd 
 from dotenv import load_dotenv
 from pymongo import MongoClient, UpdateOne
 import datetime
 from tqdm import tqdm
+from tools.mongo_reader import find_dataframe
 
 class KofiaClient:
     """KOFIA 증시자금 데이터 수집 및 업데이트 클래스"""
@@ -64,9 +66,9 @@ class KofiaClient:
             return latest_date
         return None
     
-    def fetch_data(self, start_date, end_date):
-        """지정된 기간의 KOFIA 데이터를 수집"""
-        # KOFIA API는 대용량 데이터 요청 시 제한이 있을 수 있으므로 1년 단위로 쪼개서 요청
+    @staticmethod
+    def _split_date_ranges(start_date, end_date):
+        """KOFIA API는 대용량 데이터 요청 시 제한이 있을 수 있으므로 1년 단위로 쪼갬"""
         delta = datetime.timedelta(days=365)
         date_ranges = []
         cur_start = start_date
@@ -75,46 +77,87 @@ class KofiaClient:
             cur_end = min(cur_start + delta, end_date)
             date_ranges.append((cur_start, cur_end))
             cur_start = cur_end + datetime.timedelta(days=1)
-
+        return date_ranges
+    
+    @staticmethod
+    def _create_payload(start_date, end_date):
+        """증시자금 추이 요청 payload 생성"""
+        return {
+            "dmSearch": {
+                "tmpV40": "1",
+                "tmpV41": "1",
+                "tmpV1": "D",
+                "tmpV45": start_date.strftime("%Y%m%d"),
+                "tmpV46": end_date.strftime("%Y%m%d"),
+                "OBJ_NM": "STATSCU0100000060BO"
+            }
+        }
+    
+    def _parse_result(self, result):
+        """API 응답(JSON)을 DataFrame으로 변환 (데이터가 없으면 None)"""
+        if "ds1" in result and result["ds1"]:
+            return pd.DataFrame(result["ds1"]).rename(columns=self.column_mapping)
+        return None
+    
+    @staticmethod
+    def _combine_data(all_data):
+        """기간별 DataFrame을 합치고 정리"""
+        if all_data:
+            data = pd.concat(all_data, ignore_index=True)
+            data["DATE"] = pd.to_datetime(data["DATE"])
+            data.sort_values("DATE", inplace=True)
+            data.reset_index(drop=True, inplace=True)
+            
+            # 중복 제거 (같은 날짜가 여러 번 들어올 수 있음)
+            data = data.drop_duplicates(subset=['DATE'], keep='last')
+            
+            return data
+        
+        return pd.DataFrame()
+    
+    def fetch_data(self, start_date, end_date):
+        """지정된 기간의 KOFIA 데이터를 수집"""
         all_data = []
 
-        for s, e in tqdm(date_ranges, desc="KOFIA 데이터 수집"):
-            payload = {
-                "dmSearch": {
-                    "tmpV40": "1",
-                    "tmpV41": "1",
-                    "tmpV1": "D",
-                    "tmpV45": s.strftime("%Y%m%d"),
-                    "tmpV46": e.strftime("%Y%m%d"),
-                    "OBJ_NM": "STATSCU0100000060BO"
-                }
-            }
+        for s, e in tqdm(self._split_date_ranges(start_date, end_date), desc="KOFIA 데이터 수집"):
+            payload = self._create_payload(s, e)
             
             try:
                 response = requests.post(self.url, headers=self.headers, json=payload)
                 response.raise_for_status()  # HTTP 에러 체크
                 
-                result = response.json()
-                if "ds1" in result and result["ds1"]:
-                    df = pd.DataFrame(result["ds1"]).rename(columns=self.column_mapping)
+                df = self._parse_result(response.json())
+                if df is not None:
                     all_data.append(df)
                     
             except Exception as e:
                 print(f"데이터 수집 중 오류 발생 ({s} ~ {e}): {str(e)}")
                 continue
 
-        if all_data:
-            data = pd.concat(all_data, ignore_index=True)
-            data["DATE"] = pd.to_datetime(data["DATE"])
-            data.sort_values("DATE", inplace=True)
-            data.reset_index(drop=True, inplace=True)
-            
-            # 중복 제거 (같은 날짜가 여러 번 들어올 수 있음)
-            data = data.drop_duplicates(subset=['DATE'], keep='last')
-            
-            return data
+        return self._combine_data(all_data)
+    
+    async def fetch_data_async(self, start_date, end_date, engine):
+        """
+        fetch_data의 비동기 버전 (1년 단위 구간을 동시에 요청)
         
-        return pd.DataFrame()
+        Args:
+            start_date: 시작 날짜
+            end_date: 종료 날짜
+            engine: 공유 AsyncHttpEngine (호스트별 동시성/속도 제한 적용)
+        """
+        async def fetch_range(s, e):
+            try:
+                response = await engine.post(self.url, headers=self.headers, json=self._create_payload(s, e))
+                response.raise_for_status()
+                return self._parse_result(response.json())
+            except Exception as ex:
+                print(f"데이터 수집 중 오류 발생 ({s} ~ {e}): {str(ex)}")
+                return None
+        
+        results = await asyncio.gather(
+            *(fetch_range(s, e) for s, e in self._split_date_ranges(start_date, end_date))
+        )
+        return self._combine_data([df for df in results if df is not None])
     
     def save_data(self, data):
         """데이터를 MongoDB에 저장 (bulk upsert 사용)"""
@@ -140,10 +183,8 @@ class KofiaClient:
         
         return 0, 0
     
-    def update_data(self):
-        """최신 데이터 업데이트 (DB에 없는 날짜만 수집)"""
-        print("=== KOFIA 증시자금 데이터 업데이트 시작 ===")
-        
+    def _get_update_range(self):
+        """DB 최신 날짜를 기준으로 수집 기간을 계산 (수집할 데이터가 없으면 None)"""
         # DB에서 가장 최근 날짜 조회
         latest_date = self.get_latest_date()
         
@@ -161,24 +202,55 @@ class KofiaClient:
         # 수집할 데이터가 없으면 종료
         if start_date > end_date:
             print("이미 최신 데이터입니다. 업데이트할 데이터가 없습니다.")
-            return
+            return None
         
         print(f"데이터 수집 기간: {start_date} ~ {end_date}")
-        
-        # 데이터 수집
-        data = self.fetch_data(start_date, end_date)
-        
+        return start_date, end_date
+    
+    def _report_saved(self, data):
+        """수집한 데이터를 저장하고 결과를 출력"""
         if not data.empty:
             # 데이터 저장
             inserted_count, updated_count = self.save_data(data)
             print(f"데이터 저장 완료: 새로 추가 {inserted_count}건, 업데이트 {updated_count}건")
         else:
             print("API에서 데이터를 받아오지 못했습니다.")
+    
+    def update_data(self):
+        """최신 데이터 업데이트 (DB에 없는 날짜만 수집)"""
+        print("=== KOFIA 증시자금 데이터 업데이트 시작 ===")
+        
+        date_range = self._get_update_range()
+        if date_range is None:
+            return
+        
+        # 데이터 수집
+        data = self.fetch_data(*date_range)
+        self._report_saved(data)
+        
+        print("=== KOFIA 증시자금 데이터 업데이트 완료 ===")
+    
+    async def update_data_async(self, engine):
+        """
+        update_data의 비동기 버전
+        
+        Args:
+            engine: 공유 AsyncHttpEngine
+        """
+        print("=== KOFIA 증시자금 데이터 업데이트 시작 ===")
+        
+        date_range = await asyncio.to_thread(self._get_update_range)
+        if date_range is None:
+            return
+        
+        data = await self.fetch_data_async(*date_range, engine=engine)
+        # MongoDB 저장은 블로킹 호출이므로 스레드에서 실행
+        await asyncio.to_thread(self._report_saved, data)
         
         print("=== KOFIA 증시자금 데이터 업데이트 완료 ===")
     
-    def get_data(self, start_date=None, end_date=None, limit=None):
-        """DB에서 데이터 조회"""
+    def get_data(self, start_date=None, end_date=None, limit=None, columns=None):
+        """DB에서 데이터 조회 (columns를 지정하면 해당 컬럼만 가져옴)"""
         query = {}
         if start_date:
             query["DATE"] = {"$gte": pd.to_datetime(start_date)}
@@ -187,18 +259,8 @@ class KofiaClient:
         elif end_date:
             query["DATE"] = {"$lte": pd.to_datetime(end_date)}
         
-        cursor = self.collection.find(query).sort("DATE", 1)
-        if limit:
-            cursor = cursor.limit(limit)
-        
-        data = list(cursor)
-        if data:
-            df = pd.DataFrame(data)
-            # MongoDB의 _id 컬럼 제거
-            if '_id' in df.columns:
-                df = df.drop('_id', axis=1)
-            return df
-        return pd.DataFrame()
+        # MongoDB의 _id 컬럼은 projection으로 제외
+        return find_dataframe(self.collection, query, columns=columns, sort=[("DATE", 1)], limit=limit)
     
     def close(self):
         """MongoDB 연결 종료"""
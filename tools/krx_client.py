@@ -1,12 +1,19 @@
 import os
+import asyncio
 import requests
 import time
 import pandas as pd 
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, ReplaceOne, ASCENDING
 import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 import numpy as np
+from tools.rate_limiter import TokenBucket
+from tools.columnar_cache import ParquetCache
+from tools.mongo_reader import find_dataframe
 
 class KrxClient:
     """KRX 코스피 인덱스 및 ETF 데이터 수집 및 업데이트 클래스"""
@@ -18,6 +25,14 @@ class KrxClient:
         self.db = self.mongo_client['quant']
         self.collection = self.db["krx_index_daily"]
         self.etf_collection = self.db["krx_etf"]  # ETF 데이터용 컬렉션 추가
+        self.etf_batch_size = 1000  # ETF bulk upsert 배치 크기
+        self._etf_index_ready = False
+        self.etf_cache = ParquetCache(self.etf_collection, "krx_etf", "TRD_DD")  # ETF 조회용 로컬 Parquet 캐시
+        self._etf_panel_memo = OrderedDict()  # get_etf_panel 결과 메모 {조회 조건: (컬렉션 문서 수, 행렬)} (LRU)
+        self.etf_panel_memo_size = 8  # get_etf_panel 메모 최대 개수
+        self.etf_stats_collection = self.db["krx_etf_stats"]  # ETF 일별 파생 지표 (로그수익률, 변동성, 상관계수)
+        self.etf_weekly_collection = self.db["krx_etf_weekly"]  # ETF 주간 수익률 (W-FRI)
+        self.etf_stats_window = 20  # 변동성/상관계수 rolling 윈도우 (거래일)
         
         self.url = "http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd"
         self.headers = {
@@ -62,9 +77,9 @@ class KrxClient:
             return latest_date
         return None
     
-    def fetch_data(self, start_date, end_date):
-        """지정된 기간의 KRX 데이터를 수집"""
-        # 수집 기간이 1년 이상이면 1년 단위로 쪼개서 요청
+    @staticmethod
+    def _split_date_ranges(start_date, end_date):
+        """수집 기간이 1년 이상이면 1년 단위로 쪼갬"""
         delta = datetime.timedelta(days=365)
         date_ranges = []
         cur_start = start_date
@@ -73,38 +88,34 @@ class KrxClient:
             cur_end = min(cur_start + delta, end_date)
             date_ranges.append((cur_start, cur_end))
             cur_start = cur_end + datetime.timedelta(days=1)
-
-        all_data = []
-
-        for s, e in tqdm(date_ranges, desc="KRX 데이터 수집"):
-            payload = {
-                "bld": "dbms/MDC/STAT/standard/MDCSTAT00301",
-                "locale": "ko_KR",
-                "tboxindIdx_finder_equidx0_2": "코스피",
-                "indIdx": "1",
-                "indIdx2": "001",
-                "codeNmindIdx_finder_equidx0_2": "코스피",
-                "param1indIdx_finder_equidx0_2": "",
-                "strtDd": s.strftime("%Y%m%d"),
-                "endDd": e.strftime("%Y%m%d"),
-                "share": "2",
-                "money": "1",
-                "csvxls_isNo": "false"
-            }
-            
-            try:
-                req = requests.post(self.url, headers=self.headers, data=payload)
-                output = req.json().get("output", [])
-                if output:
-                    df = pd.DataFrame(output)[self.selected_columns].rename(
-                        columns=self.column_mapping
-                    )
-                    all_data.append(df)
-                time.sleep(0.2)
-            except Exception as e:
-                print(f"데이터 수집 중 오류 발생 ({s} ~ {e}): {str(e)}")
-                continue
-
+        return date_ranges
+    
+    def _create_index_payload(self, start_date, end_date):
+        """코스피 지수(MDCSTAT00301) 요청 payload 생성"""
+        return {
+            "bld": "dbms/MDC/STAT/standard/MDCSTAT00301",
+            "locale": "ko_KR",
+            "tboxindIdx_finder_equidx0_2": "코스피",
+            "indIdx": "1",
+            "indIdx2": "001",
+            "codeNmindIdx_finder_equidx0_2": "코스피",
+            "param1indIdx_finder_equidx0_2": "",
+            "strtDd": start_date.strftime("%Y%m%d"),
+            "endDd": end_date.strftime("%Y%m%d"),
+            "share": "2",
+            "money": "1",
+            "csvxls_isNo": "false"
+        }
+    
+    def _parse_index_output(self, output):
+        """API 응답의 output 리스트를 DataFrame으로 변환 (데이터가 없으면 None)"""
+        if not output:
+            return None
+        return pd.DataFrame(output)[self.selected_columns].rename(columns=self.column_mapping)
+    
+    @staticmethod
+    def _combine_index_data(all_data):
+        """기간별 DataFrame을 합치고 타입을 정리"""
         if all_data:
             data = pd.concat(all_data, ignore_index=True)
             data["date"] = pd.to_datetime(data["date"])
@@ -119,32 +130,80 @@ class KrxClient:
         
         return pd.DataFrame()
     
-    def save_data(self, data):
-        """데이터를 MongoDB에 저장 (중복 방지를 위해 upsert 사용)"""
+    def fetch_data(self, start_date, end_date):
+        """지정된 기간의 KRX 데이터를 수집"""
+        all_data = []
+
+        for s, e in tqdm(self._split_date_ranges(start_date, end_date), desc="KRX 데이터 수집"):
+            payload = self._create_index_payload(s, e)
+            
+            try:
+                req = requests.post(self.url, headers=self.headers, data=payload)
+                df = self._parse_index_output(req.json().get("output", []))
+                if df is not None:
+                    all_data.append(df)
+                time.sleep(0.2)
+            except Exception as e:
+                print(f"데이터 수집 중 오류 발생 ({s} ~ {e}): {str(e)}")
+                continue
+
+        return self._combine_index_data(all_data)
+    
+    async def fetch_data_async(self, start_date, end_date, engine):
+        """
+        fetch_data의 비동기 버전 (1년 단위 구간을 동시에 요청)
+        
+        Args:
+            start_date: 시작 날짜
+            end_date: 종료 날짜
+            engine: 공유 AsyncHttpEngine (호스트별 동시성/속도 제한 적용)
+        """
+        async def fetch_range(s, e):
+            try:
+                resp = await engine.post(self.url, headers=self.headers, data=self._create_index_payload(s, e))
+                return self._parse_index_output(resp.json().get("output", []))
+            except Exception as ex:
+                print(f"데이터 수집 중 오류 발생 ({s} ~ {e}): {str(ex)}")
+                return None
+        
+        results = await asyncio.gather(
+            *(fetch_range(s, e) for s, e in self._split_date_ranges(start_date, end_date))
+        )
+        return self._combine_index_data([df for df in results if df is not None])
+    
+    def save_data(self, data, batch_size=1000):
+        """
+        데이터를 MongoDB에 저장 (date 기준 bulk upsert)
+        
+        Args:
+            data: fetch_data가 반환한 DataFrame
+            batch_size: bulk_write 한 번에 보낼 최대 연산 수 (기본값: 1000)
+        
+        Returns:
+            tuple: (새로 추가된 건수, 업데이트된 건수)
+        """
         if data.empty:
             print("저장할 데이터가 없습니다.")
             return 0, 0
         
+        # iterrows 대신 컬럼 단위로 한 번에 dict 변환
+        records = data.to_dict(orient='records')
+        operations = [
+            ReplaceOne({"date": record["date"]}, record, upsert=True)
+            for record in records
+        ]
+        
         inserted_count = 0
         updated_count = 0
-        
-        for _, row in data.iterrows():
-            result = self.collection.replace_one(
-                {"date": row["date"]},
-                row.to_dict(),
-                upsert=True
-            )
-            if result.upserted_id:
-                inserted_count += 1
-            elif result.modified_count > 0:
-                updated_count += 1
+        for i in range(0, len(operations), batch_size):
+            result = self.collection.bulk_write(operations[i:i + batch_size], ordered=False)
+            inserted_count += result.upserted_count
+            updated_count += result.modified_count
         
         return inserted_count, updated_count
     
-    def update_data(self):
-        """최신 데이터 업데이트 (DB에 없는 날짜만 수집)"""
-        print("=== KRX 코스피 데이터 업데이트 시작 ===")
-        
+    def _get_update_range(self):
+        """DB 최신 날짜를 기준으로 수집 기간을 계산 (수집할 데이터가 없으면 None)"""
         # DB에서 가장 최근 날짜 조회
         latest_date = self.get_latest_date()
         
@@ -162,24 +221,55 @@ class KrxClient:
         # 수집할 데이터가 없으면 종료
         if start_date > end_date:
             print("이미 최신 데이터입니다. 업데이트할 데이터가 없습니다.")
-            return
+            return None
         
         print(f"데이터 수집 기간: {start_date} ~ {end_date}")
-        
-        # 데이터 수집
-        data = self.fetch_data(start_date, end_date)
-        
+        return start_date, end_date
+    
+    def _report_saved(self, data):
+        """수집한 데이터를 저장하고 결과를 출력"""
         if not data.empty:
             # 데이터 저장
             inserted_count, updated_count = self.save_data(data)
             print(f"데이터 저장 완료: 새로 추가 {inserted_count}건, 업데이트 {updated_count}건")
         else:
             print("API에서 데이터를 받아오지 못했습니다.")
+    
+    def update_data(self):
+        """최신 데이터 업데이트 (DB에 없는 날짜만 수집)"""
+        print("=== KRX 코스피 데이터 업데이트 시작 ===")
+        
+        date_range = self._get_update_range()
+        if date_range is None:
+            return
+        
+        # 데이터 수집
+        data = self.fetch_data(*date_range)
+        self._report_saved(data)
         
         print("=== KRX 코스피 데이터 업데이트 완료 ===")
     
-    def get_data(self, start_date=None, end_date=None, limit=None):
-        """DB에서 데이터 조회"""
+    async def update_data_async(self, engine):
+        """
+        update_data의 비동기 버전
+        
+        Args:
+            engine: 공유 AsyncHttpEngine
+        """
+        print("=== KRX 코스피 데이터 업데이트 시작 ===")
+        
+        date_range = await asyncio.to_thread(self._get_update_range)
+        if date_range is None:
+            return
+        
+        data = await self.fetch_data_async(*date_range, engine=engine)
+        # MongoDB 저장은 블로킹 호출이므로 스레드에서 실행
+        await asyncio.to_thread(self._report_saved, data)
+        
+        print("=== KRX 코스피 데이터 업데이트 완료 ===")
+    
+    def get_data(self, start_date=None, end_date=None, limit=None, columns=None):
+        """DB에서 데이터 조회 (columns를 지정하면 해당 컬럼만 가져옴)"""
         query = {}
         if start_date:
             query["date"] = {"$gte": pd.to_datetime(start_date)}
@@ -188,23 +278,15 @@ class KrxClient:
         elif end_date:
             query["date"] = {"$lte": pd.to_datetime(end_date)}
         
-        cursor = self.collection.find(query).sort("date", 1)
-        if limit:
-            cursor = cursor.limit(limit)
-        
-        data = list(cursor)
-        if data:
-            return pd.DataFrame(data)
-        return pd.DataFrame()
+        # 컬럼을 지정하지 않으면 기존처럼 _id 포함
+        return find_dataframe(self.collection, query, columns=columns, sort=[("date", 1)],
+                              limit=limit, include_id=columns is None)
     
     
     # ===== ETF 관련 메소드들 =====
     
-    def _get_etf_list(self, trade_date=None):
-        """ETF 목록을 가져옵니다."""
-        if trade_date is None:
-            trade_date = datetime.datetime.today().strftime("%Y%m%d")
-        
+    def _request_etf_snapshot(self, trade_date, session=None):
+        """특정 거래일의 전체 ETF 시세(MDCSTAT04301)를 원본 그대로 가져옵니다."""
         data = {
             "bld": "dbms/MDC/STAT/standard/MDCSTAT04301",
             "locale": "ko_KR",  
@@ -214,9 +296,16 @@ class KrxClient:
             "csvxls_isNo": "false"
         }
         
-        req = requests.post(self.url, headers=self.headers, data=data)
-        data = req.json()['output']
-        etf_df = pd.DataFrame(data)[["ISU_ABBRV", "IDX_IND_NM", "ISU_SRT_CD", "ISU_CD", "MKTCAP"]]
+        poster = session if session is not None else requests
+        req = poster.post(self.url, headers=self.headers, data=data, timeout=30)
+        return pd.DataFrame(req.json()['output'])
+    
+    def _get_etf_list(self, trade_date=None):
+        """ETF 목록을 가져옵니다."""
+        if trade_date is None:
+            trade_date = datetime.datetime.today().strftime("%Y%m%d")
+        
+        etf_df = self._request_etf_snapshot(trade_date)[["ISU_ABBRV", "IDX_IND_NM", "ISU_SRT_CD", "ISU_CD", "MKTCAP"]]
         etf_df["MKTCAP"] = etf_df["MKTCAP"].str.replace(",", "").astype(float)
         
         # 시가총액 기준 상위 600개 선택
@@ -247,11 +336,12 @@ class KrxClient:
             print(f"ETF DB에서 최신 날짜 조회 중 오류: {e}")
             return None
     
-    def _fetch_etf_ohlcv(self, etf_df, start_date, end_date):
-        """ETF OHLCV 데이터를 가져와서 MongoDB에 저장합니다."""
+    def _request_etf_ohlcv(self, isu_cd, start_date, end_date, session=None):
+        """단일 ETF의 OHLCV 데이터를 요청하여 DataFrame으로 반환합니다."""
         data_dict = {
             "bld": "dbms/MDC/STAT/standard/MDCSTAT04501",
             "locale": "ko_KR",
+            "isuCd": isu_cd,
             "param1isuCd_finder_secuprodisu1_1": "",
             "strtDd": start_date,
             "endDd": end_date,
@@ -260,79 +350,295 @@ class KrxClient:
             "csvxls_isNo": "false"
         }
         
-        for idx, row in tqdm(etf_df.iterrows(), total=len(etf_df), desc="ETF 데이터 수집 중"):
-            data_dict["isuCd"] = row["ISU_CD"]
+        poster = session if session is not None else requests
+        req = poster.post(self.url, data=data_dict, headers=self.headers, timeout=30)
+        df = pd.DataFrame(req.json()['output'])
+        
+        if df.empty:
+            return df
+        
+        # 날짜 컬럼 처리
+        if 'TRD_DD' in df.columns:
+            df['TRD_DD'] = pd.to_datetime(df['TRD_DD'], errors='coerce')
+        
+        return self._convert_etf_numeric_columns(df)
+    
+    @staticmethod
+    def _convert_etf_numeric_columns(df, exclude=('TRD_DD',)):
+        """쉼표가 포함된 문자열 숫자 컬럼을 숫자형으로 변환합니다."""
+        for col in df.columns:
+            if df[col].dtype == object and col not in exclude:
+                try:
+                    df[col] = df[col].str.replace(',', '', regex=False)
+                    df[col] = pd.to_numeric(df[col], errors='ignore')
+                except Exception:
+                    pass
+        return df
+    
+    def _ensure_etf_index(self):
+        """ETF 컬렉션에 (ISU_CD, TRD_DD) 유니크 복합 인덱스가 있는지 확인하고 없으면 생성합니다."""
+        if self._etf_index_ready:
+            return
+        try:
+            self.etf_collection.create_index(
+                [("ISU_CD", ASCENDING), ("TRD_DD", ASCENDING)],
+                unique=True,
+                name="ISU_CD_1_TRD_DD_1"
+            )
+        except Exception as e:
+            # 기존 데이터에 중복이 있으면 유니크 인덱스 생성이 실패할 수 있음
+            print(f"ETF 유니크 인덱스 생성 실패 (중복 데이터 확인 필요): {e}")
+        self._etf_index_ready = True
+    
+    def save_etf_data(self, data, batch_size=None):
+        """
+        ETF 데이터를 MongoDB에 저장합니다. (ISU_CD, TRD_DD 기준 bulk upsert)
+        
+        Args:
+            data: ISU_CD, TRD_DD 컬럼을 포함한 ETF DataFrame
+            batch_size: bulk_write 한 번에 보낼 최대 연산 수 (None이면 self.etf_batch_size)
+        
+        Returns:
+            tuple: (새로 추가된 건수, 업데이트된 건수, 변경 없는 건수)
+        """
+        if data.empty:
+            return 0, 0, 0
+        
+        self._ensure_etf_index()
+        batch_size = batch_size or self.etf_batch_size
+        
+        data = data.copy()
+        data['TRD_DD'] = pd.to_datetime(data['TRD_DD'], errors='coerce')
+        data = data.dropna(subset=['TRD_DD'])
+        
+        operations = []
+        for record in data.to_dict(orient='records'):
+            record['TRD_DD'] = record['TRD_DD'].to_pydatetime()
+            operations.append(
+                UpdateOne(
+                    {"ISU_CD": record["ISU_CD"], "TRD_DD": record["TRD_DD"]},
+                    {"$set": record},
+                    upsert=True
+                )
+            )
+        
+        inserted_count = 0
+        updated_count = 0
+        unchanged_count = 0
+        for i in range(0, len(operations), batch_size):
+            result = self.etf_collection.bulk_write(operations[i:i + batch_size], ordered=False)
+            inserted_count += result.upserted_count
+            updated_count += result.modified_count
+            unchanged_count += result.matched_count - result.modified_count
+        
+        if inserted_count or updated_count:
+            self._etf_panel_memo.clear()
+        
+        return inserted_count, updated_count, unchanged_count
+    
+    def _save_etf_records(self, df, row):
+        """ETF OHLCV DataFrame에 종목 정보를 붙여 MongoDB에 저장합니다."""
+        # 종목 정보 추가
+        df['ISU_CD'] = row['ISU_CD']
+        df['ISU_ABBRV'] = row['ISU_ABBRV']
+        return self.save_etf_data(df)
+    
+    def _fetch_and_save_etf(self, row, start_date, end_date, session=None):
+        """
+        단일 ETF를 수집/저장하고 결과를 dict로 반환합니다.
+        
+        Returns:
+            dict: ISU_CD, ISU_ABBRV, status("success" | "empty" | "failed"), inserted, updated, unchanged, error
+        """
+        result = {
+            "ISU_CD": row["ISU_CD"],
+            "ISU_ABBRV": row["ISU_ABBRV"],
+            "status": "success",
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "error": None
+        }
+        
+        try:
+            df = self._request_etf_ohlcv(row["ISU_CD"], start_date, end_date, session=session)
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = f"API 호출 오류: {e}"
+            return result
+        
+        if df.empty:
+            result["status"] = "empty"
+            return result
+        
+        try:
+            result["inserted"], result["updated"], result["unchanged"] = self._save_etf_records(df, row)
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = f"MongoDB 저장 오류: {e}"
+        
+        return result
+    
+    def _fetch_etf_ohlcv(self, etf_df, start_date, end_date, max_workers=1, requests_per_sec=2.0):
+        """
+        ETF OHLCV 데이터를 가져와서 MongoDB에 저장합니다.
+        
+        Args:
+            etf_df: 수집할 ETF 목록 (ISU_CD, ISU_ABBRV 컬럼 필요)
+            start_date: 시작 날짜 (YYYYMMDD)
+            end_date: 종료 날짜 (YYYYMMDD)
+            max_workers: 동시 요청 워커 수 (1이면 기존 순차 방식, 기본값: 1)
+            requests_per_sec: 동시 모드에서 모든 워커가 공유하는 초당 최대 요청 수 (기본값: 2.0)
+        
+        Returns:
+            pd.DataFrame: ETF별 수집 결과 (ISU_CD, ISU_ABBRV, status, inserted, updated, unchanged, error)
+        """
+        rows = [row for _, row in etf_df.iterrows()]
+        results = []
+        
+        if max_workers <= 1:
+            for row in tqdm(rows, total=len(rows), desc="ETF 데이터 수집 중"):
+                result = self._fetch_and_save_etf(row, start_date, end_date)
+                results.append(result)
+                if result["inserted"]:
+                    print(f"{row['ISU_ABBRV']} - {result['inserted']}개 데이터 저장")
+                if result["error"]:
+                    print(f"{result['error']} ({row['ISU_ABBRV']})")
+                
+                # API 호출 간격 조절
+                time.sleep(np.random.uniform(0.5, 2.0))
+        else:
+            limiter = TokenBucket(requests_per_sec)
+            local = threading.local()
+            sessions = []
+            sessions_lock = threading.Lock()
+            
+            def worker(row):
+                # 워커 스레드마다 Session을 하나씩 두어 keep-alive 연결 재사용
+                session = getattr(local, "session", None)
+                if session is None:
+                    session = requests.Session()
+                    local.session = session
+                    with sessions_lock:
+                        sessions.append(session)
+                limiter.acquire()
+                return self._fetch_and_save_etf(row, start_date, end_date, session=session)
             
             try:
-                req = requests.post(self.url, data=data_dict, headers=self.headers)
-                df = pd.DataFrame(req.json()['output'])
-                
-                if df.empty:
-                    continue
-                
-                # 날짜 컬럼 처리
-                if 'TRD_DD' in df.columns:
-                    df['TRD_DD'] = pd.to_datetime(df['TRD_DD'], errors='coerce')
-                
-                # 숫자 컬럼 처리
-                for col in df.columns:
-                    if df[col].dtype == object and col != 'TRD_DD':
-                        try:
-                            df[col] = df[col].str.replace(',', '', regex=False)
-                            df[col] = pd.to_numeric(df[col], errors='ignore')
-                        except Exception:
-                            pass
-                
-                # 종목 정보 추가
-                df['ISU_CD'] = row['ISU_CD']
-                df['ISU_ABBRV'] = row['ISU_ABBRV']
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [executor.submit(worker, row) for row in rows]
+                    for future in tqdm(as_completed(futures), total=len(futures), desc="ETF 데이터 수집 중"):
+                        result = future.result()
+                        results.append(result)
+                        if result["error"]:
+                            tqdm.write(f"{result['error']} ({result['ISU_ABBRV']})")
+            finally:
+                for session in sessions:
+                    session.close()
+        
+        result_df = pd.DataFrame(
+            results,
+            columns=["ISU_CD", "ISU_ABBRV", "status", "inserted", "updated", "unchanged", "error"]
+        )
+        if not result_df.empty:
+            status_counts = result_df["status"].value_counts()
+            print(
+                f"ETF 수집 결과: 성공 {status_counts.get('success', 0)}개, "
+                f"데이터 없음 {status_counts.get('empty', 0)}개, "
+                f"실패 {status_counts.get('failed', 0)}개 / "
+                f"새로 추가 {int(result_df['inserted'].sum())}건, "
+                f"업데이트 {int(result_df['updated'].sum())}건, "
+                f"변경 없음 {int(result_df['unchanged'].sum())}건"
+            )
+        return result_df
+    
+    def _fetch_etf_snapshots(self, etf_df, start_date, end_date):
+        """
+        거래일마다 전체 ETF 시세를 한 번에 받아 MongoDB에 저장합니다. (하루 1회 요청)
+        
+        Args:
+            etf_df: 저장할 ETF 목록 (ISU_CD 컬럼 필요, 목록에 없는 ETF는 제외)
+            start_date: 시작 날짜 (YYYYMMDD)
+            end_date: 종료 날짜 (YYYYMMDD)
+        
+        Returns:
+            pd.DataFrame: 거래일별 수집 결과 (TRD_DD, status, inserted, updated, unchanged, error)
+        """
+        isu_codes = set(etf_df["ISU_CD"])
+        trade_days = pd.bdate_range(start_date, end_date)
+        results = []
+        
+        with requests.Session() as session:
+            for trade_day in tqdm(trade_days, desc="ETF 일별 시세 수집 중"):
+                result = {
+                    "TRD_DD": trade_day,
+                    "status": "success",
+                    "inserted": 0,
+                    "updated": 0,
+                    "unchanged": 0,
+                    "error": None
+                }
                 
-                # MongoDB에 저장 (중복 체크)
-                insert_records = []
-                for record in df.to_dict(orient='records'):
-                    trd_dd = record.get('TRD_DD')
-                    if pd.isnull(trd_dd):
-                        continue
+                try:
+                    df = self._request_etf_snapshot(trade_day.strftime("%Y%m%d"), session=session)
+                    df = df[df["ISU_CD"].isin(isu_codes)] if not df.empty else df
                     
-                    if isinstance(trd_dd, pd.Timestamp):
-                        trd_dd_mongo = trd_dd.to_pydatetime()
+                    if df.empty:
+                        # 휴장일 등 데이터가 없는 날
+                        result["status"] = "empty"
                     else:
-                        try:
-                            trd_dd_mongo = pd.to_datetime(trd_dd).to_pydatetime()
-                        except Exception:
-                            continue
-                    
-                    # 중복 체크
-                    exists = self.etf_collection.count_documents({
-                        "TRD_DD": trd_dd_mongo,
-                        "ISU_CD": record["ISU_CD"]
-                    }, limit=1)
-                    
-                    if not exists:
-                        record['TRD_DD'] = trd_dd_mongo
-                        insert_records.append(record)
+                        df = self._convert_etf_numeric_columns(
+                            df.copy(), exclude=('TRD_DD', 'ISU_CD', 'ISU_SRT_CD', 'ISU_ABBRV', 'IDX_IND_NM')
+                        )
+                        df['TRD_DD'] = trade_day
+                        result["inserted"], result["updated"], result["unchanged"] = self.save_etf_data(df)
+                        print(f"{trade_day.strftime('%Y-%m-%d')} - {len(df)}개 ETF 저장")
+                except Exception as e:
+                    result["status"] = "failed"
+                    result["error"] = f"{e}"
+                    print(f"ETF 일별 시세 수집 오류 ({trade_day.strftime('%Y-%m-%d')}): {e}")
                 
-                if insert_records:
-                    try:
-                        self.etf_collection.insert_many(insert_records)
-                        print(f"{row['ISU_ABBRV']} - {len(insert_records)}개 데이터 저장")
-                    except Exception as e:
-                        print(f"MongoDB 저장 오류 ({row['ISU_ABBRV']}): {e}")
+                results.append(result)
                 
-            except Exception as e:
-                print(f"API 호출 오류 ({row['ISU_ABBRV']}): {e}")
-                continue
-            
-            # API 호출 간격 조절
-            time.sleep(np.random.uniform(0.5, 2.0))
+                # API 호출 간격 조절
+                time.sleep(np.random.uniform(0.5, 2.0))
+        
+        return pd.DataFrame(
+            results,
+            columns=["TRD_DD", "status", "inserted", "updated", "unchanged", "error"]
+        )
+    
+    @staticmethod
+    def _choose_etf_strategy(n_etfs, start_date, end_date):
+        """
+        HTTP 요청 수가 더 적은 ETF 수집 방식을 고릅니다.
+        
+        - "per_etf": ETF마다 1회 요청 (n_etfs회)
+        - "snapshot": 거래일(평일)마다 1회 요청
+        """
+        n_days = len(pd.bdate_range(start_date, end_date))
+        return "snapshot" if n_days < n_etfs else "per_etf"
     
-    def update_etf_data(self, days_back=10):
+    def update_etf_data(self, days_back=10, max_workers=1, requests_per_sec=2.0, strategy="auto", update_stats=True):
         """
         ETF 데이터를 업데이트합니다.
         
         Args:
             days_back: 최신 날짜에서 몇 일 전까지 데이터를 가져올지 (기본값: 10일)
+            max_workers: 동시 요청 워커 수 (1이면 순차 수집, 기본값: 1, per_etf 방식에만 적용)
+            requests_per_sec: 동시 수집 시 초당 최대 요청 수 (기본값: 2.0)
+            strategy: 수집 방식
+                - "per_etf": ETF별 기간 시세 요청 (ETF 수만큼 요청)
+                - "snapshot": 거래일별 전체 ETF 시세 요청 (거래일 수만큼 요청)
+                - "auto": 요청 수가 더 적은 방식을 자동 선택 (기본값)
+            update_stats: 수집 후 파생 지표(update_etf_stats)도 새 날짜만큼 갱신할지 (기본값: True)
+        
+        Returns:
+            pd.DataFrame: 수집 결과 (업데이트할 데이터가 없거나 오류 시 None)
         """
+        if strategy not in ("auto", "per_etf", "snapshot"):
+            raise ValueError(f"지원하지 않는 strategy입니다: {strategy}")
+        
         print("=== KRX ETF 데이터 업데이트 시작 ===")
         
         try:
@@ -363,16 +669,33 @@ class KrxClient:
             start_datetime = datetime.datetime.strptime(start_date, "%Y%m%d")
             if start_datetime > today:
                 print("이미 최신 ETF 데이터입니다.")
+                if update_stats:
+                    self.update_etf_stats()
                 return
             
+            if strategy == "auto":
+                strategy = self._choose_etf_strategy(len(etf_df), start_date, end_date)
+            print(f"ETF 수집 방식: {strategy}")
+            
             # ETF OHLCV 데이터 수집 및 저장
-            self._fetch_etf_ohlcv(etf_df, start_date, end_date)
+            if strategy == "snapshot":
+                result_df = self._fetch_etf_snapshots(etf_df, start_date, end_date)
+            else:
+                result_df = self._fetch_etf_ohlcv(
+                    etf_df, start_date, end_date,
+                    max_workers=max_workers,
+                    requests_per_sec=requests_per_sec
+                )
+            
+            if update_stats:
+                self.update_etf_stats()
             print("=== KRX ETF 데이터 업데이트 완료 ===")
+            return result_df
             
         except Exception as e:
             print(f"ETF 데이터 업데이트 중 오류 발생: {e}")
     
-    def get_etf_data(self, start_date, end_date, isu_codes=None):
+    def get_etf_data(self, start_date, end_date, isu_codes=None, use_cache=False, columns=None):
         """
         지정된 기간의 ETF 데이터를 조회합니다.
         
@@ -380,6 +703,8 @@ class KrxClient:
             start_date: 시작 날짜 (YYYY-MM-DD 형식)
             end_date: 종료 날짜 (YYYY-MM-DD 형식)
             isu_codes: 특정 종목코드 리스트 (선택사항)
+            use_cache: True면 로컬 Parquet 캐시를 새 데이터만 갱신한 뒤 캐시에서 읽음 (기본값: False)
+            columns: 가져올 컬럼 리스트 (예: ["TRD_DD", "ISU_ABBRV", "TDD_CLSPRC"], 선택사항)
         
         Returns:
             pd.DataFrame: 조회된 ETF 데이터
@@ -389,6 +714,16 @@ class KrxClient:
             start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
             end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
             
+            if use_cache:
+                self.etf_cache.refresh()
+                filters = [("ISU_CD", "in", list(isu_codes))] if isu_codes else None
+                df = self.etf_cache.read(start_dt, end_dt, columns=columns, filters=filters)
+                if df.empty:
+                    print("조회된 ETF 데이터가 없습니다.")
+                    return df
+                print(f"ETF 데이터 조회 완료 (캐시): {len(df)}개 레코드")
+                return df
+            
             # MongoDB 쿼리 구성
             query = {
                 "TRD_DD": {
@@ -400,21 +735,13 @@ class KrxClient:
             if isu_codes:
                 query["ISU_CD"] = {"$in": isu_codes}
             
-            # 데이터 조회
-            cursor = self.etf_collection.find(query).sort("TRD_DD", 1)
-            data = list(cursor)
+            # 데이터 조회 (_id 제외, 필요한 컬럼만)
+            df = find_dataframe(self.etf_collection, query, columns=columns, sort=[("TRD_DD", 1)])
             
-            if not data:
+            if df.empty:
                 print("조회된 ETF 데이터가 없습니다.")
                 return pd.DataFrame()
             
-            # DataFrame으로 변환
-            df = pd.DataFrame(data)
-            
-            # _id 컬럼 제거
-            if '_id' in df.columns:
-                df = df.drop('_id', axis=1)
-            
             print(f"ETF 데이터 조회 완료: {len(df)}개 레코드")
             return df
             
@@ -422,6 +749,285 @@ class KrxClient:
             print(f"ETF 데이터 조회 중 오류 발생: {e}")
             return pd.DataFrame()
     
+    def _build_etf_panel(self, trd_dd, isu_cd, isu_abbrv, values, label_by, date_field="TRD_DD"):
+        """
+        long 형식 배열(날짜, 종목코드, 필드값)을 필드별 (거래일 x ETF) float64 행렬로 배치합니다.
+        
+        Args:
+            trd_dd: 거래일 배열
+            isu_cd: 종목코드 배열
+            isu_abbrv: 종목명 배열 (label_by="ISU_ABBRV"일 때 사용, 날짜 오름차순 기준 마지막 이름)
+            values: {필드: 값 배열}
+            label_by: 컬럼 라벨 ("ISU_CD" 또는 "ISU_ABBRV")
+            date_field: 인덱스 이름 (기본값: "TRD_DD")
+        
+        Returns:
+            dict: {필드: pd.DataFrame}
+        """
+        dates, row_idx = np.unique(pd.to_datetime(trd_dd).values, return_inverse=True)
+        codes, col_idx = np.unique(np.asarray(isu_cd, dtype=object), return_inverse=True)
+        
+        columns = pd.Index(codes, name="ISU_CD")
+        if label_by == "ISU_ABBRV":
+            # 종목명이 바뀐 경우 가장 최근 이름 사용
+            names = pd.Series(np.asarray(isu_abbrv, dtype=object), index=np.asarray(isu_cd, dtype=object))
+            names = names[~names.index.duplicated(keep="last")]
+            columns = pd.Index(names.reindex(codes).values, name="ISU_ABBRV")
+        index = pd.DatetimeIndex(dates, name=date_field)
+        
+        panel = {}
+        for field, field_values in values.items():
+            matrix = np.full((len(dates), len(codes)), np.nan)
+            matrix[row_idx, col_idx] = pd.to_numeric(pd.Series(field_values), errors="coerce").to_numpy(dtype=float)
+            panel[field] = pd.DataFrame(matrix, index=index, columns=columns)
+        return panel
+    
+    def _aggregate_etf_panel(self, fields, start_dt, end_dt, isu_codes, collection=None, date_field="TRD_DD"):
+        """ETF별로 (날짜, 필드값) 행을 $group/$push로 묶어서 가져와 long 배열로 폅니다. (기본: ETF 시세 컬렉션)"""
+        collection = collection if collection is not None else self.etf_collection
+        query = {date_field: {"$gte": start_dt, "$lte": end_dt}}
+        if isu_codes:
+            query["ISU_CD"] = {"$in": list(isu_codes)}
+        
+        # 문서 하나를 행 하나로 push (필드가 없는 문서는 해당 키가 빠짐 -> NaN)
+        pipeline = [
+            {"$match": query},
+            {"$sort": {date_field: 1}},
+            {"$group": {
+                "_id": "$ISU_CD",
+                "ISU_ABBRV": {"$last": "$ISU_ABBRV"},
+                "rows": {"$push": {date_field: f"${date_field}", **{field: f"${field}" for field in fields}}},
+            }},
+        ]
+        
+        trd_dd, isu_cd, isu_abbrv = [], [], []
+        values = {field: [] for field in fields}
+        for group in collection.aggregate(pipeline, allowDiskUse=True):
+            rows = group["rows"]
+            trd_dd.extend(row[date_field] for row in rows)
+            isu_cd.extend([group["_id"]] * len(rows))
+            isu_abbrv.extend([group.get("ISU_ABBRV")] * len(rows))
+            for field in fields:
+                values[field].extend(row.get(field) for row in rows)
+        return trd_dd, isu_cd, isu_abbrv, values
+    
+    def get_etf_panel(self, fields, start_date, end_date, isu_codes=None, label_by="ISU_CD", use_cache=False):
+        """
+        ETF 데이터를 필드별 (거래일 x ETF) 행렬로 조회합니다. (pivot 없이 바로 사용)
+        
+        모든 행렬은 같은 거래일 인덱스와 ETF 컬럼을 공유하며, 값이 없는 칸은 NaN입니다.
+        같은 (fields, 기간, isu_codes, label_by) 조회 결과는 최근 etf_panel_memo_size개까지 메모해 두었다가 바로 반환합니다.
+        이 클라이언트로 ETF 데이터를 저장하면 메모를 비우고, 다른 클라이언트/프로세스(updateData.ipynb 등)가
+        저장한 경우는 krx_etf 문서 수(estimated_document_count)가 메모할 때와 달라지면 다시 조회합니다.
+        단, 다른 곳에서 기존 문서의 값만 고친 경우(문서 수 변화 없음)는 감지하지 못하므로
+        그럴 때는 새 KrxClient를 만들거나 self._etf_panel_memo.clear() 후 조회하세요.
+        
+        Args:
+            fields: 가져올 필드 리스트 (예: ["TDD_CLSPRC", "ACC_TRDVAL", "MKTCAP"])
+            start_date: 시작 날짜 (YYYY-MM-DD 형식)
+            end_date: 종료 날짜 (YYYY-MM-DD 형식)
+            isu_codes: 특정 종목코드 리스트 (선택사항)
+            label_by: 컬럼 라벨 - "ISU_CD"(종목코드) 또는 "ISU_ABBRV"(종목명) (기본값: "ISU_CD")
+            use_cache: True면 MongoDB aggregation 대신 로컬 Parquet 캐시에서 읽음 (기본값: False)
+        
+        Returns:
+            dict: {필드: pd.DataFrame (index=TRD_DD, columns=ETF, float64)}
+        """
+        if label_by not in ("ISU_CD", "ISU_ABBRV"):
+            raise ValueError(f"label_by는 'ISU_CD' 또는 'ISU_ABBRV'여야 합니다: {label_by}")
+        
+        fields = list(fields)
+        start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+        key = (tuple(fields), start_dt, end_dt, tuple(sorted(isu_codes)) if isu_codes else None, label_by, use_cache)
+        
+        version = self.etf_collection.estimated_document_count()
+        memo = self._etf_panel_memo.get(key)
+        if memo is not None and memo[0] == version:
+            self._etf_panel_memo.move_to_end(key)
+            panel = memo[1]
+        else:
+            if use_cache:
+                self.etf_cache.refresh()
+                filters = [("ISU_CD", "in", list(isu_codes))] if isu_codes else None
+                df = self.etf_cache.read(start_dt, end_dt, columns=["TRD_DD", "ISU_CD", "ISU_ABBRV"] + fields,
+                                         filters=filters)
+                df = df.reindex(columns=["TRD_DD", "ISU_CD", "ISU_ABBRV"] + fields)
+                long_data = (df["TRD_DD"], df["ISU_CD"], df["ISU_ABBRV"], {field: df[field] for field in fields})
+            else:
+                long_data = self._aggregate_etf_panel(fields, start_dt, end_dt, isu_codes)
+            
+            panel = self._build_etf_panel(*long_data, label_by=label_by)
+            self._etf_panel_memo[key] = (version, panel)
+            self._etf_panel_memo.move_to_end(key)
+            while len(self._etf_panel_memo) > self.etf_panel_memo_size:
+                self._etf_panel_memo.popitem(last=False)
+        
+        # 메모된 행렬이 호출한 쪽에서 수정되지 않도록 복사본 반환
+        return {field: df.copy() for field, df in panel.items()}
+    
+    # ===== ETF 파생 지표 (수익률 / rolling 통계) =====
+    
+    def _ensure_etf_stats_index(self):
+        """파생 지표 컬렉션에 (ISU_CD, 날짜) 유니크 복합 인덱스를 생성합니다."""
+        for collection, date_field in [(self.etf_stats_collection, "TRD_DD"), (self.etf_weekly_collection, "WEEK")]:
+            try:
+                collection.create_index(
+                    [("ISU_CD", ASCENDING), (date_field, ASCENDING)],
+                    unique=True,
+                    name=f"ISU_CD_1_{date_field}_1"
+                )
+            except Exception as e:
+                print(f"ETF 파생 지표 인덱스 생성 실패: {e}")
+    
+    def _upsert_etf_stats(self, collection, records, date_field, batch_size=None):
+        """파생 지표 레코드를 (ISU_CD, 날짜) 기준으로 bulk upsert하고 저장 건수를 반환합니다."""
+        batch_size = batch_size or self.etf_batch_size
+        operations = [
+            UpdateOne(
+                {"ISU_CD": record["ISU_CD"], date_field: record[date_field]},
+                {"$set": record},
+                upsert=True
+            )
+            for record in records
+        ]
+        for i in range(0, len(operations), batch_size):
+            collection.bulk_write(operations[i:i + batch_size], ordered=False)
+        return len(operations)
+    
+    def _panel_to_records(self, frames, since, date_field, names):
+        """
+        (날짜 x ETF) 행렬들에서 since 이후 날짜만 골라 (ISU_CD, 날짜)별 레코드로 펼칩니다.
+        
+        기준 행렬(첫 번째)이 NaN인 칸은 제외하고, 나머지 NaN은 None으로 저장합니다.
+        """
+        base = next(iter(frames.values()))
+        rows = base.index > since if since is not None else np.ones(len(base.index), dtype=bool)
+        if not rows.any():
+            return []
+        
+        dates = base.index[rows]
+        codes = base.columns
+        long_df = pd.DataFrame({
+            date_field: np.repeat(dates.to_pydatetime(), len(codes)),
+            "ISU_CD": np.tile(codes.to_numpy(dtype=object), len(dates)),
+        })
+        long_df["ISU_ABBRV"] = long_df["ISU_CD"].map(names)
+        for name, frame in frames.items():
+            long_df[name] = frame.to_numpy()[rows].ravel()
+        
+        long_df = long_df[long_df[next(iter(frames))].notna()]
+        long_df = long_df.astype(object).where(long_df.notna(), None)
+        return long_df.to_dict(orient="records")
+    
+    def update_etf_stats(self, window=None):
+        """
+        ETF 파생 지표를 새로 들어온 거래일만큼만 계산해서 저장합니다.
+        
+        - krx_etf_stats: 일별 로그수익률(LOG_RTN), 연율화 rolling 변동성(VOL_{window}),
+          코스피 지수와의 rolling 상관계수(CORR_KOSPI_{window})
+        - krx_etf_weekly: 주간(W-FRI) 수익률(W_RTN), 진행 중인 주는 새 거래일이 들어올 때마다 덮어씀
+        
+        마지막으로 계산된 날짜 이전은 rolling 계산에 필요한 만큼(약 window*2+10일)만 다시 읽으므로
+        업데이트마다 새 거래일 수에 비례하는 작업만 합니다. (처음 실행 시에는 전체 기간 계산)
+        
+        Args:
+            window: rolling 윈도우 (거래일, None이면 self.etf_stats_window)
+        
+        Returns:
+            tuple: (저장된 일별 레코드 수, 저장된 주간 레코드 수)
+        """
+        window = window or self.etf_stats_window
+        
+        try:
+            latest = self.etf_stats_collection.find_one({}, sort=[("TRD_DD", -1)])
+            since = latest["TRD_DD"] if latest else None
+            
+            # rolling 윈도우와 직전 주 종가를 채울 만큼 이전 데이터부터 읽음
+            if since is not None:
+                load_start = since - datetime.timedelta(days=window * 2 + 10)
+            else:
+                load_start = datetime.datetime(1900, 1, 1)
+            load_end = datetime.datetime.today()
+            
+            long_data = self._aggregate_etf_panel(["TDD_CLSPRC"], load_start, load_end, None)
+            if not long_data[0]:
+                print("파생 지표를 계산할 ETF 데이터가 없습니다.")
+                return 0, 0
+            
+            close = self._build_etf_panel(*long_data, label_by="ISU_CD")["TDD_CLSPRC"]
+            if since is not None and not (close.index > since).any():
+                print("ETF 파생 지표가 이미 최신입니다.")
+                return 0, 0
+            names = pd.Series(long_data[2], index=long_data[1]).groupby(level=0).last()
+            
+            # 일별 로그수익률 / rolling 변동성
+            close = close.where(close > 0)
+            log_rtn = np.log(close / close.shift(1))
+            rolling = log_rtn.rolling(window, min_periods=window)
+            vol = rolling.std() * np.sqrt(252)
+            
+            # 코스피 지수 로그수익률과의 rolling 상관계수
+            kospi = self.get_data(load_start, load_end, columns=["date", "close"])
+            if not kospi.empty:
+                kospi_close = kospi.set_index(pd.to_datetime(kospi["date"]))["close"].astype(float)
+                kospi_rtn = np.log(kospi_close / kospi_close.shift(1)).reindex(close.index)
+                corr = rolling.corr(kospi_rtn)
+            else:
+                corr = pd.DataFrame(np.nan, index=close.index, columns=close.columns)
+            
+            # 주간 수익률 (금요일 기준, 주 마지막 거래일 종가)
+            weekly_close = close.resample("W-FRI").last()
+            weekly_rtn = weekly_close / weekly_close.shift(1) - 1
+            
+            self._ensure_etf_stats_index()
+            daily_records = self._panel_to_records(
+                {"LOG_RTN": log_rtn, f"VOL_{window}": vol, f"CORR_KOSPI_{window}": corr},
+                since, "TRD_DD", names
+            )
+            # 마지막 계산일이 속한 주도 새 거래일이 들어오면 다시 계산
+            weekly_records = self._panel_to_records({"W_RTN": weekly_rtn}, since, "WEEK", names)
+            
+            daily_count = self._upsert_etf_stats(self.etf_stats_collection, daily_records, "TRD_DD")
+            weekly_count = self._upsert_etf_stats(self.etf_weekly_collection, weekly_records, "WEEK")
+            print(f"ETF 파생 지표 저장 완료: 일별 {daily_count}건, 주간 {weekly_count}건")
+            return daily_count, weekly_count
+            
+        except Exception as e:
+            print(f"ETF 파생 지표 계산 중 오류 발생: {e}")
+            return 0, 0
+    
+    def get_etf_stats(self, fields, start_date, end_date, isu_codes=None, label_by="ISU_CD", freq="D"):
+        """
+        저장된 ETF 파생 지표를 필드별 (날짜 x ETF) 행렬로 조회합니다.
+        
+        Args:
+            fields: 가져올 지표 리스트 (일별: "LOG_RTN", "VOL_20", "CORR_KOSPI_20" / 주간: "W_RTN")
+            start_date: 시작 날짜 (YYYY-MM-DD 형식)
+            end_date: 종료 날짜 (YYYY-MM-DD 형식)
+            isu_codes: 특정 종목코드 리스트 (선택사항)
+            label_by: 컬럼 라벨 - "ISU_CD"(종목코드) 또는 "ISU_ABBRV"(종목명) (기본값: "ISU_CD")
+            freq: "D"(일별, krx_etf_stats) 또는 "W"(주간, krx_etf_weekly) (기본값: "D")
+        
+        Returns:
+            dict: {지표: pd.DataFrame (index=TRD_DD 또는 WEEK, columns=ETF, float64)}
+        """
+        if freq not in ("D", "W"):
+            raise ValueError(f"freq는 'D' 또는 'W'여야 합니다: {freq}")
+        if label_by not in ("ISU_CD", "ISU_ABBRV"):
+            raise ValueError(f"label_by는 'ISU_CD' 또는 'ISU_ABBRV'여야 합니다: {label_by}")
+        
+        collection, date_field = (
+            (self.etf_stats_collection, "TRD_DD") if freq == "D" else (self.etf_weekly_collection, "WEEK")
+        )
+        start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+        
+        long_data = self._aggregate_etf_panel(
+            list(fields), start_dt, end_dt, isu_codes, collection=collection, date_field=date_field
+        )
+        return self._build_etf_panel(*long_data, label_by=label_by, date_field=date_field)
+    
     def get_etf_list(self):
         """현재 DB에 저장된 ETF 목록을 조회합니다."""
         try:
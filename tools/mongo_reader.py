@@ -0,0 +1,100 @@
+from typing import Iterable, List, Optional
+
+import bson
+import pandas as pd
+
+
+def _projection(columns: Optional[List[str]], include_id: bool) -> dict:
+    """조회할 컬럼으로 MongoDB projection 생성"""
+    if columns is None:
+        return None if include_id else {"_id": 0}
+    projection = {col: 1 for col in columns}
+    if not include_id and "_id" not in columns:
+        projection["_id"] = 0
+    return projection
+
+
+def docs_to_dataframe(docs: Iterable[dict], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    문서 이터러블을 컬럼별 리스트로 모아서 DataFrame 생성 (dict 리스트 -> DataFrame 변환보다 빠름)
+
+    Args:
+        docs (Iterable[dict]): MongoDB 문서
+        columns (List[str], optional): 만들 컬럼 (None이면 문서에 나오는 모든 필드, 처음 나온 순서대로)
+
+    Returns:
+        pd.DataFrame: 변환된 데이터
+    """
+    if columns is not None:
+        data = {col: [] for col in columns}
+        for doc in docs:
+            for col, values in data.items():
+                values.append(doc.get(col))
+        n_rows = len(next(iter(data.values()))) if data else 0
+    else:
+        # 문서마다 필드 구성이 다를 수 있으므로 없는 값은 None으로 채움
+        data = {}
+        n_rows = 0
+        for doc in docs:
+            for col, value in doc.items():
+                values = data.get(col)
+                if values is None:
+                    values = data[col] = [None] * n_rows
+                values.append(value)
+            n_rows += 1
+            for values in data.values():
+                if len(values) < n_rows:
+                    values.append(None)
+
+    if n_rows == 0:
+        return pd.DataFrame()
+    return pd.DataFrame(data)
+
+
+def find_dataframe(collection, query: dict, columns: Optional[List[str]] = None,
+                   sort: Optional[list] = None, limit: Optional[int] = None,
+                   include_id: bool = False) -> pd.DataFrame:
+    """
+    MongoDB 조회 결과를 DataFrame으로 반환 (projection + raw BSON 배치 디코딩)
+
+    find_raw_batches로 서버 배치를 BSON 바이트 그대로 받아 bson.decode_all(C 확장)로 한 번에 디코딩하고,
+    필요한 컬럼만 리스트로 모아 DataFrame을 만듭니다.
+    (pymongoarrow는 첫 문서로 스키마를 추론해 int/float가 섞인 필드의 값이 null이 될 수 있어 사용하지 않음)
+
+    Args:
+        collection: pymongo Collection
+        query (dict): 조회 조건
+        columns (List[str], optional): 가져올 컬럼 (None이면 전체)
+        sort (list, optional): 정렬 조건 (예: [("DATE", 1)])
+        limit (int, optional): 최대 문서 수
+        include_id (bool): _id 컬럼 포함 여부
+
+    Returns:
+        pd.DataFrame: 조회된 데이터
+    """
+    projection = _projection(columns, include_id)
+    if columns is not None and include_id and "_id" not in columns:
+        columns = ["_id"] + list(columns)
+
+    def raw_docs():
+        cursor = collection.find_raw_batches(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        for batch in cursor:
+            yield from bson.decode_all(batch)
+
+    def plain_docs():
+        # find_raw_batches를 지원하지 않는 클라이언트(mongomock 등)용
+        cursor = collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        yield from cursor
+
+    try:
+        return docs_to_dataframe(raw_docs(), columns)
+    except NotImplementedError:
+        return docs_to_dataframe(plain_docs(), columns)
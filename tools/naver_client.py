@@ -1,16 +1,32 @@
 import os
 import requests
-import random
 import io
-import time
+import multiprocessing
+import queue
+import threading
 import warnings
-from datetime import datetime
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from bs4 import BeautifulSoup, SoupStrainer
 from tqdm import tqdm
-from tools.openai_client import summarize_report
+from tools.openai_client import summarize_report, summary_cache
+from tools.rate_limiter import TokenBucket
+from tools.report_cache import ReportCache
+from tools.report_search import ReportSearchIndex
 from pymongo import MongoClient
 import pdfplumber
 import re
+import sqlite3
+
+try:
+    import pypdfium2
+except ImportError:  # 없으면 pdfplumber 문자 객체로 페이지 분류
+    pypdfium2 = None
+
+try:
+    import lxml
+except ImportError:  # 없으면 html.parser로 목록 페이지 파싱
+    lxml = None
 
 class NaverReportScraper:
     def __init__(self):
@@ -38,6 +54,18 @@ class NaverReportScraper:
             "user-agent": os.getenv("USER_AGENT")
         }
         self.report_list = []
+        # PDF 처리 파이프라인 설정
+        self.download_workers = 4  # PDF 동시 다운로드 스레드 수
+        self.download_rate = 3.0  # PDF 다운로드 초당 최대 요청 수
+        self.extract_workers = min(4, os.cpu_count() or 1)  # 텍스트 추출 프로세스 수
+        self.summary_workers = 4  # 동시 요약 요청 수
+        self.queue_size = 8  # 단계 사이 큐 크기
+        self.cache = ReportCache()  # PDF / 추출 텍스트 / 요약 로컬 캐시
+        self.fast_extract = True  # 페이지를 먼저 가볍게 분류하고 텍스트 페이지만 레이아웃 추출
+        self.summary_chunk_tokens = 6000  # 긴 리포트는 이 토큰 수 단위로 나눠 청크별 요약 후 합침 (None이면 한 번에 요약)
+        self.text_char_budget = {"company": 100000, "industry": 100000}  # 텍스트 추출 상한 (이만큼 추출하면 중단, 없으면 전체)
+        self.listing_workers = 4  # 목록 페이지 동시 요청 수
+        self.max_listing_pages = 100  # end_page가 없을 때 최대로 넘겨볼 목록 페이지 수
         self.today = datetime.now().strftime("%y.%m.%d")
         #self.today = "25.07.28"
         print(self.today)
@@ -47,6 +75,11 @@ class NaverReportScraper:
         self.client = MongoClient(uri)
         self.db = self.client['quant']
         self.report_collection = self.db['naver_reports']
+        try:
+            self.search_index = ReportSearchIndex()  # 저장할 때마다 갱신하는 로컬 전문 검색 인덱스
+        except sqlite3.Error as e:
+            print(f"검색 인덱스를 사용할 수 없습니다: {e}")
+            self.search_index = None
 
     @staticmethod
     def _is_text_page(text):
@@ -61,31 +94,101 @@ class NaverReportScraper:
         total_chars = len(text)
         if total_chars == 0:
             return False
-        num_chars = sum(c.isdigit() for c in text)
+        num_chars = sum(map(str.isdigit, text))
         return (num_chars / total_chars) < 0.5
 
     @staticmethod
-    def _extract_pdf_text(pdf_file, skip_last_page=False):
+    def _extract_pdf_text(pdf_file, skip_last_page=False, max_chars=None, fast=False):
         """
         pdfplumber PDF 객체에서 모든 페이지의 텍스트를 추출하되,
         각 페이지에서 숫자 비율이 50% 이상인 경우 해당 페이지는 스킵
         skip_last_page=True면 마지막 페이지는 무시
+        페이지 사이는 \f로 구분 (청크 요약에서 페이지 경계로 사용)
+
+        fast=True면 pypdfium2(없으면 pdfplumber 문자 객체)로 페이지 텍스트를 가볍게 먼저 뽑아
+        차트/표 페이지를 걸러내고, 남은 페이지만 pdfplumber 레이아웃 추출을 합니다.
+        max_chars를 지정하면 추출한 텍스트가 그 길이에 도달하는 즉시 중단합니다.
+        (요약 입력 한도만큼만 필요할 때 사용, 앞부분 max_chars자는 전체 추출 결과와 같음)
         """
+        if fast:
+            if hasattr(pdf_file, "read"):
+                pdf_file.seek(0)
+                pdf_file = pdf_file.read()
+            elif isinstance(pdf_file, str):
+                with open(pdf_file, "rb") as f:
+                    pdf_file = f.read()
+            pdf_file = io.BytesIO(pdf_file)
+
         text_list = []
-        with pdfplumber.open(pdf_file) as pdf:
-            pages = pdf.pages[:-1] if skip_last_page and len(pdf.pages) > 0 else pdf.pages
-            for page in pages:
-                page_text = page.extract_text()
-                if page_text and NaverReportScraper._is_text_page(page_text):
-                    text_list.append(page_text)
-        return "\n".join(text_list)
+        total_chars = 0
+        light_doc = pypdfium2.PdfDocument(pdf_file.getvalue()) if fast and pypdfium2 is not None else None
+        try:
+            with pdfplumber.open(pdf_file) as pdf:
+                n_pages = len(pdf.pages) - 1 if skip_last_page and len(pdf.pages) > 0 else len(pdf.pages)
+                for i in range(n_pages):
+                    page = pdf.pages[i]
+                    if fast and not NaverReportScraper._is_text_page(
+                        NaverReportScraper._light_page_text(light_doc, page, i)
+                    ):
+                        continue
+                    page_text = page.extract_text()
+                    if page_text and NaverReportScraper._is_text_page(page_text):
+                        text_list.append(page_text)
+                        total_chars += len(page_text) + 1
+                        if max_chars and total_chars > max_chars:
+                            break
+        finally:
+            if light_doc is not None:
+                light_doc.close()
+        return "\f".join(text_list)
+
+    @staticmethod
+    def _light_page_text(light_doc, page, index):
+        """
+        레이아웃 분석 없이 페이지 텍스트만 빠르게 가져오기 (페이지 분류용)
+        pypdfium2 문서가 있으면 pdfium 텍스트, 없으면 pdfplumber 문자 객체를 이어 붙임
+        """
+        if light_doc is not None:
+            light_page = light_doc[index]
+            text_page = light_page.get_textpage()
+            try:
+                return text_page.get_text_range()
+            finally:
+                text_page.close()
+                light_page.close()
+        return "".join(char["text"] for char in page.chars)
+
+    @staticmethod
+    def _to_date(value):
+        """date/datetime 또는 "yy.mm.dd"/"YYYY-MM-DD"/"YYYYMMDD" 문자열을 date로 변환"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        for fmt in ("%y.%m.%d", "%Y-%m-%d", "%Y%m%d", "%Y.%m.%d"):
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        raise ValueError(f"날짜 형식을 알 수 없습니다: {value}")
+
+    @staticmethod
+    def _listing_rows(html):
+        """목록 페이지에서 table.type_1의 row들만 파싱 (lxml이 있으면 lxml, 나머지 태그는 트리로 만들지 않음)"""
+        soup = BeautifulSoup(
+            html, "lxml" if lxml is not None else "html.parser",
+            parse_only=SoupStrainer("table", class_="type_1")
+        )
+        table = soup.find("table", class_="type_1")
+        return table.find_all("tr") if table else None
 
     def _parse_table_rows(self, rows, report_type):
         """
-        테이블 row들을 파싱하여 report_list에 추가
+        테이블 row들을 리포트 dict 리스트로 파싱 (날짜 필터는 호출하는 쪽에서)
         report_type: "company" 또는 "industry"
         """
-        for row in tqdm(rows, desc=f"{'기업리포트' if report_type == 'company' else '산업리포트'}"):
+        reports = []
+        for row in rows:
             cols = row.find_all("td")
             if len(cols) < 5:
                 continue
@@ -103,38 +206,6 @@ class NaverReportScraper:
                     pdf_url = "https://stock.pstatic.net" + pdf_url
 
             date = cols[4].get_text(strip=True) if len(cols) > 4 else ""
-            if date != self.today:
-                continue
-
-            report_text = ""
-            if pdf_url:
-                try:
-                    pdf_req = self._session.get(pdf_url)
-                    time.sleep(random.uniform(1, 2))  # sleep 시간 단축
-                    pdf_file = io.BytesIO(pdf_req.content)
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        if report_type == "company":
-                            report_text = self._extract_pdf_text(pdf_file, skip_last_page=False)
-                        else:
-                            report_text = self._extract_pdf_text(pdf_file, skip_last_page=True)
-                    if not report_text.strip():
-                        report_text = "텍스트 없음 또는 PDF 추출 실패"
-                except Exception as e:
-                    report_text = f"PDF 추출 실패: {e}"
-
-            # 여기서 report_text가 완전히 비어있거나 공백만 있는 경우에도 summarize_report 호출을 막는다
-            if (
-                report_text
-                and not report_text.startswith("PDF 추출 실패")
-                and report_text.strip() != ""
-            ):
-                try:
-                    summary = summarize_report(report_text, report_type)
-                except Exception as e:
-                    summary = f"요약 실패: {e}"
-            else:
-                summary = "텍스트 없음 또는 PDF 추출 실패"
 
             report_dict = {
                 "종류": report_type,
@@ -142,56 +213,276 @@ class NaverReportScraper:
                 "리포트명": report_title,
                 "pdf주소": pdf_url,
                 "날짜": date,
-                "텍스트": report_text,
-                "요약": summary
+                "텍스트": "",
+                "요약": ""
             }
             if report_type == "company":
                 report_dict["회사명"] = name
             else:
                 report_dict["산업명"] = name
-            self.report_list.append(report_dict)
+            reports.append(report_dict)
+        return reports
+
+    def _crawl_listing(self, list_url, report_type, start_page=1, end_page=None, start_date=None, end_date=None):
+        """
+        목록 페이지를 listing_workers개씩 동시에 요청해서 날짜 범위 안의 리포트를 모은 뒤 한 번에 처리
+
+        목록은 최신순이므로 어떤 페이지에 start_date보다 이전 리포트가 나오면 그 뒤 페이지는 요청하지 않습니다.
 
-    def scrape_company(self, start_page=1, end_page=2):
+        Args:
+            list_url (str): 목록 페이지 URL (page 파라미터 제외)
+            report_type (str): "company" 또는 "industry"
+            start_page (int): 시작 페이지
+            end_page (int, optional): 마지막 페이지 (None이면 날짜로 멈출 때까지, 최대 max_listing_pages페이지)
+            start_date, end_date: 수집할 날짜 범위 (date 또는 "yy.mm.dd"/"YYYY-MM-DD" 문자열, 없으면 오늘)
+        """
+        start_date = self._to_date(start_date or self.today)
+        end_date = self._to_date(end_date or self.today)
+        last_page = end_page if end_page is not None else start_page + self.max_listing_pages - 1
+
+        def fetch(page):
+            try:
+                req = self._session.get(f"{list_url}?&page={page}", headers=self.base_header, timeout=10)
+                return self._listing_rows(req.text)
+            except Exception as e:
+                print(f"페이지 {page} 요청 실패: {e}")
+                return None
+
+        reports = []
+        reached_start = False
+        page = start_page
+        with ThreadPoolExecutor(max_workers=self.listing_workers) as executor:
+            while page <= last_page and not reached_start:
+                pages = range(page, min(page + self.listing_workers, last_page + 1))
+                for rows in executor.map(fetch, pages):
+                    if rows is None or reached_start:
+                        continue
+                    for report in self._parse_table_rows(rows, report_type):
+                        try:
+                            report_date = self._to_date(report["날짜"])
+                        except ValueError:
+                            continue
+                        if report_date < start_date:
+                            reached_start = True
+                        elif report_date <= end_date:
+                            reports.append(report)
+                page = pages[-1] + 1
+
+        print(f"{'기업리포트' if report_type == 'company' else '산업리포트'} 목록 {page - start_page}페이지, "
+              f"{start_date} ~ {end_date} 리포트 {len(reports)}건")
+        self._process_reports(reports, report_type)
+        self.report_list.extend(reports)
+
+    def _process_reports(self, reports, report_type):
+        """
+        리포트별 PDF 다운로드 -> 텍스트 추출 -> 요약을 단계별 파이프라인으로 처리 (reports의 텍스트/요약을 채움)
+
+        - 다운로드: download_workers개 스레드, 전체 속도는 download_rate(초당 요청 수) 이하
+        - 텍스트 추출: CPU 작업이므로 extract_workers개 프로세스 풀에서 실행
+        - 요약: summary_workers개 스레드에서 OpenAI 요약 호출 (긴 리포트는 summary_chunk_tokens 단위로 나눠 요약,
+                리포트별 실제 입력 토큰 수를 "입력토큰"에 기록)
+        단계 사이는 크기가 queue_size로 제한된 큐로 연결되어, 한 페이지의 리포트들이
+        순서대로 하나씩이 아니라 동시에 진행됩니다.
+
+        naver_reports에 요약까지 저장된 리포트는 바로 채우고, 나머지도 단계마다 self.cache를 먼저 확인해서
+        다시 실행하거나 중간에 중단된 뒤 재시작할 때는 새 작업만 합니다.
+        """
+        reports = self._fill_saved_reports(reports)
+        if not reports:
+            return
+
+        skip_last_page = report_type != "company"
+        max_chars = self.text_char_budget.get(report_type)
+        text_variant = ("skip_last" if skip_last_page else "full") + (f"_{max_chars}" if max_chars else "")
+        bucket = TokenBucket(self.download_rate)
+        download_queue = queue.Queue()
+        extract_queue = queue.Queue(maxsize=self.queue_size)
+        summary_queue = queue.Queue(maxsize=self.queue_size)
+        done = object()
+        progress = tqdm(total=len(reports), desc=f"{'기업리포트' if report_type == 'company' else '산업리포트'}")
+
+        def download_worker():
+            while True:
+                report = download_queue.get()
+                if report is done:
+                    return
+                content, content_hash = None, None
+                # 한 리포트에서 예외가 나도 다음 단계로는 항상 넘겨서 파이프라인이 멈추지 않게 함
+                try:
+                    if report["pdf주소"]:
+                        content_hash = self.cache.get_hash(report["pdf주소"])
+                        # 텍스트까지 캐시돼 있으면 PDF를 읽을 필요도 없음
+                        if content_hash is None or self.cache.get_text(content_hash, text_variant) is None:
+                            content, content_hash = self.cache.get_pdf(report["pdf주소"])
+                        if content_hash is None:
+                            bucket.acquire()
+                            pdf_req = self._session.get(report["pdf주소"], timeout=30)
+                            pdf_req.raise_for_status()
+                            content = pdf_req.content
+                            content_hash = self.cache.put_pdf(report["pdf주소"], content)
+                except Exception as e:
+                    report["텍스트"] = f"PDF 추출 실패: {e}"
+                    content, content_hash = None, None
+                finally:
+                    extract_queue.put((report, content, content_hash))
+
+        def extract_worker(pool):
+            while True:
+                item = extract_queue.get()
+                if item is done:
+                    return
+                report, content, content_hash = item
+                try:
+                    if content_hash is not None:
+                        report_text = self.cache.get_text(content_hash, text_variant)
+                        if report_text is None:
+                            report_text = pool.submit(
+                                _extract_pdf_bytes, content, skip_last_page, max_chars, self.fast_extract
+                            ).result()
+                            if not report_text.strip():
+                                report_text = "텍스트 없음 또는 PDF 추출 실패"
+                            self.cache.put_text(content_hash, text_variant, report_text)
+                        report["텍스트"] = report_text
+                except Exception as e:
+                    report["텍스트"] = f"PDF 추출 실패: {e}"
+                    content_hash = None
+                finally:
+                    summary_queue.put((report, content_hash))
+
+        def summary_worker():
+            while True:
+                item = summary_queue.get()
+                if item is done:
+                    return
+                report, content_hash = item
+                try:
+                    report_text = report["텍스트"]
+                    # report_text가 완전히 비어있거나 추출 실패한 경우에는 summarize_report 호출을 막는다
+                    if (
+                        report_text
+                        and not report_text.startswith("PDF 추출 실패")
+                        and report_text != "텍스트 없음 또는 PDF 추출 실패"
+                        and report_text.strip() != ""
+                    ):
+                        summary = self.cache.get_summary(content_hash, report_type) if content_hash else None
+                        if summary is None:
+                            summary, usage = summarize_report(
+                                report_text, report_type, chunk_tokens=self.summary_chunk_tokens, return_usage=True
+                            )
+                            report["입력토큰"] = usage["input_tokens"]
+                            if content_hash and not summary.startswith("요약 실패"):
+                                try:
+                                    self.cache.put_summary(content_hash, report_type, summary)
+                                except Exception as e:
+                                    print(f"요약 캐시 저장 실패: {e}")
+                        report["요약"] = summary
+                    else:
+                        report["요약"] = "텍스트 없음 또는 PDF 추출 실패"
+                except Exception as e:
+                    report["요약"] = f"요약 실패: {e}"
+                finally:
+                    progress.update(1)
+
+        def run_stage(target, count, args=()):
+            threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            return threads
+
+        def finish_stage(threads, stage_queue):
+            for _ in threads:
+                stage_queue.put(done)
+            for thread in threads:
+                thread.join()
+
+        # 프로세스는 첫 submit 때(다른 스레드들이 도는 중) 만들어지므로, 스레드가 잡고 있던 락을 그대로 복사해
+        # 자식이 멈출 수 있는 fork 대신 spawn으로 생성
+        with ProcessPoolExecutor(max_workers=self.extract_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            download_threads = run_stage(download_worker, self.download_workers)
+            extract_threads = run_stage(extract_worker, self.extract_workers, (pool,))
+            summary_threads = run_stage(summary_worker, self.summary_workers)
+
+            for report in reports:
+                download_queue.put(report)
+            finish_stage(download_threads, download_queue)
+            finish_stage(extract_threads, extract_queue)
+            finish_stage(summary_threads, summary_queue)
+        progress.close()
+        stats = summary_cache.stats()
+        if stats["hits"] + stats["misses"]:
+            print(f"요약 캐시: hit {stats['hits']}, miss {stats['misses']} (hit rate {stats['hit_rate']:.0%})")
+        input_tokens = sum(report.get("입력토큰") or 0 for report in reports)
+        if input_tokens:
+            print(f"요약 입력 토큰: {input_tokens:,}")
+
+    def _fill_saved_reports(self, reports):
+        """
+        naver_reports에 텍스트와 요약이 정상적으로 저장된 리포트는 DB 값으로 채우고,
+        아직 처리할 리포트만 반환
+        """
+        urls = [report["pdf주소"] for report in reports if report["pdf주소"]]
+        if not urls:
+            return reports
+
+        saved = {}
+        try:
+            for doc in self.report_collection.find(
+                {"pdf_url": {"$in": urls}}, {"_id": 0, "pdf_url": 1, "text": 1, "summary": 1}
+            ):
+                summary = doc.get("summary") or ""
+                if doc.get("text") and summary and not summary.startswith(("요약 실패", "텍스트 없음")):
+                    saved[doc["pdf_url"]] = doc
+        except Exception as e:
+            print(f"저장된 리포트 조회 실패: {e}")
+            return reports
+
+        pending = []
+        for report in reports:
+            doc = saved.get(report["pdf주소"])
+            if doc is None:
+                pending.append(report)
+            else:
+                report["텍스트"] = doc["text"]
+                report["요약"] = doc["summary"]
+        if saved:
+            print(f"이미 저장된 리포트 {len(reports) - len(pending)}개는 DB 값을 사용합니다.")
+        return pending
+
+    def scrape_company(self, start_page=1, end_page=None, start_date=None, end_date=None):
         """
         기업 리포트만 수집
+
+        Args:
+            start_page (int): 시작 페이지
+            end_page (int, optional): 마지막 페이지 (None이면 start_date 이전 리포트가 나올 때까지)
+            start_date, end_date: 수집할 날짜 범위 (없으면 오늘, 여러 날 백필 시 지정)
         """
         self.report_list = []
         with requests.Session() as session:
             self._session = session  # 내부에서 재사용
-            for page in range(start_page, end_page + 1):
-                base_url = f"https://finance.naver.com/research/company_list.naver?&page={page}"
-                try:
-                    req = session.get(base_url, headers=self.base_header, timeout=10)
-                except Exception as e:
-                    print(f"페이지 {page} 요청 실패: {e}")
-                    continue
-                soup = BeautifulSoup(req.text, "html.parser")
-                table = soup.find("table", class_="type_1")
-                if not table:
-                    continue
-                rows = table.find_all("tr")
-                self._parse_table_rows(rows, "company")
+            self._crawl_listing(
+                "https://finance.naver.com/research/company_list.naver", "company",
+                start_page, end_page, start_date, end_date
+            )
             del self._session
 
-    def scrape_industry(self):
+    def scrape_industry(self, start_page=1, end_page=None, start_date=None, end_date=None):
         """
         산업 리포트만 수집
+
+        Args:
+            start_page (int): 시작 페이지
+            end_page (int, optional): 마지막 페이지 (None이면 start_date 이전 리포트가 나올 때까지)
+            start_date, end_date: 수집할 날짜 범위 (없으면 오늘, 여러 날 백필 시 지정)
         """
         self.report_list = []
         with requests.Session() as session:
             self._session = session
-            industry_url = "https://finance.naver.com/research/industry_list.naver"
-            try:
-                req = session.get(industry_url, headers=self.base_header, timeout=10)
-            except Exception as e:
-                print(f"산업리포트 요청 실패: {e}")
-                return
-            soup = BeautifulSoup(req.text, "html.parser")
-            table = soup.find("table", class_="type_1")
-            if not table:
-                return
-            rows = table.find_all("tr")
-            self._parse_table_rows(rows, "industry")
+            self._crawl_listing(
+                "https://finance.naver.com/research/industry_list.naver", "industry",
+                start_page, end_page, start_date, end_date
+            )
             del self._session
 
     def get_reports(self):
@@ -200,6 +491,7 @@ class NaverReportScraper:
     def save_to_db(self):
         """
         self.report_list의 데이터를 MongoDB에 저장 (upsert 방식, pdf주소 기준)
+        저장한 리포트는 self.search_index에도 반영 (updated_at은 다른 곳의 인덱스가 sync로 변경분만 가져갈 때 사용)
         """
         if not self.report_list:
             print("저장할 리포트가 없습니다.")
@@ -216,7 +508,10 @@ class NaverReportScraper:
                 "text": report.get("텍스트"),
                 "summary": report.get("요약"),
                 "which": which,
+                "updated_at": datetime.now(),
             }
+            if report.get("입력토큰") is not None:
+                update_dict["input_tokens"] = report["입력토큰"]
             if which == "company":
                 update_dict["company_name"] = report.get("회사명")
             elif which == "industry":
@@ -238,5 +533,18 @@ class NaverReportScraper:
         if requests_bulk:
             self.report_collection.bulk_write(requests_bulk)
             print(f"{len(self.report_list)}건의 리포트가 DB에 저장되었습니다.")
+            if self.search_index is not None:
+                self.search_index.add([op["update"]["$set"] for op in bulk_ops])
         else:
             print("저장할 리포트가 없습니다.")
+
+
+def _extract_pdf_bytes(content, skip_last_page=False, max_chars=None, fast=False):
+    """
+    프로세스 풀에서 실행할 PDF 텍스트 추출 (다운로드한 bytes를 받아 pdfplumber 경고 없이 추출)
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return NaverReportScraper._extract_pdf_text(
+            io.BytesIO(content), skip_last_page=skip_last_page, max_chars=max_chars, fast=fast
+        )
@@ -1,47 +1,434 @@
+import asyncio
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError
+from tools.rate_limiter import AsyncTokenBucket
+from tools.report_cache import SummaryCache
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+MODEL = "gpt-4.1"
+TEMPERATURE = 0.1
+OUTPUT_TOKEN_RESERVE = 1000  # 요약 출력용으로 토큰 예산에서 미리 잡아두는 토큰 수
+MAX_CHUNK_WORKERS = 8  # summarize_report에서 청크를 동시에 요약할 최대 스레드 수
+MAX_CONCURRENT_REQUESTS = 8  # 동기 요약 API 요청의 프로세스 전체 동시 요청 수 상한 (모든 스레드/청크가 공유)
+MAX_RETRIES = 5  # 동기 요약 요청의 429/5xx/네트워크 오류 재시도 횟수
 
-def summarize_report(report_text: str, report_type: str = "company") -> str:
+# 긴 리포트를 나눠 요약할 때 청크별 프롬프트 (청크 요약들은 리포트 타입 프롬프트로 다시 합침)
+CHUNK_PROMPT = """당신은 한국 증권사 {kind} 리포트를 요약하는 전문가입니다.
+                ### 작업 지침 ###
+                1. 아래는 긴 리포트를 나눈 일부분({index}/{total})입니다. 이 부분의 핵심 내용을 **3~6문장**으로 정리하세요.
+                2. **수치는 최소화**하고, 주장과 전망을 **논리·근거** 위주로 정리하세요.
+                3. **목표주가(TP)와 투자의견**이 있으면 반드시 포함하세요.
+                4. 보고서 작성자의 면책 조항과 관련된 내용은 제외하세요.
+                5. GPT의 의견을 추가하지 말고, 철저히 글 내용 기반으로 답해주세요."""
+
+_clients = {}
+# summarize_report를 여러 스레드에서 호출하고 각 호출이 다시 청크를 동시에 요청해도
+# 실제로 나가는 요청 수는 이 세마포어로 제한 (재시도 대기 중에는 슬롯을 반납)
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+summary_cache = SummaryCache()  # 요약 메모이제이션 (같은 프롬프트/모델/입력 텍스트면 API 호출 없이 재사용)
+
+
+def get_client(base_url: Optional[str] = None) -> OpenAI:
     """
-    리포트를 요약하는 함수
+    동기 OpenAI 클라이언트 (base_url별로 한 번만 생성)
+
     Args:
-        report_text: 리포트 텍스트
-        report_type: 리포트 타입 ("company" 또는 "industry")
+        base_url (str, optional): API 주소 (None이면 OPENAI_BASE_URL 환경변수 또는 기본 주소, 로컬 스텁 서버 테스트용)
     """
-    try:
-        # 리포트 타입에 따른 프롬프트 설정
-        if report_type == "industry":
-            system_prompt = """당신은 한국 증권사 산업 리포트를 요약하는 전문가입니다.
+    if base_url not in _clients:
+        _clients[base_url] = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=base_url)
+    return _clients[base_url]
+
+
+def _build_prompt(report_text: str, report_type: str = "company", truncate: bool = True) -> Tuple[str, str]:
+    """리포트 타입에 맞는 (시스템 프롬프트, 입력 텍스트) 반환 (truncate=True면 산업 리포트는 앞 20000자만)"""
+    if report_type == "industry":
+        system_prompt = """당신은 한국 증권사 산업 리포트를 요약하는 전문가입니다.
                 ### 작업 지침 ###
                 1. 아래 산업 리포트를 읽고 핵심 내용을 **5~12문장**으로 요약하세요.
                 2. **수치(매출액·성장률 등)는 최소화**하고, 해당 산업의 전망과 투자 포인트를 **논리·근거** 위주로 작성하세요.
                 3. **산업 전망, 성장 동력, 주요 이슈**를 중심으로 요약하세요.
                 4. 보고서 작성자의 면책 조항과 관련된 내용은 제외하세요.
                 5. GPT의 의견을 추가하지 말고, 철저히 글 내용 기반으로 답해주세요."""
+        if truncate:
             report_text = report_text[:20000]
-            
-        else:  # company
-            system_prompt = """당신은 한국 증권사 기업 리포트를 요약하는 전문가입니다.
+    else:  # company
+        system_prompt = """당신은 한국 증권사 기업 리포트를 요약하는 전문가입니다.
                 ### 작업 지침 ###
                 1. 아래 기업 리포트를 읽고 핵심 내용을 **3~6문장**으로 요약하세요.
                 2. **수치(매출액·성장률 등)는 최소화**하고, 왜 그런 전망을 내놓았는지 **논리·근거** 위주로 작성하세요.
                 3. **목표주가(TP)와 투자의견**이 있으면 반드시 포함하세요.
                 4. 보고서 작성자의 면책 조항과 관련된 내용은 제외하세요.
                 5. GPT의 의견을 추가하지 말고, 철저히 글 내용 기반으로 답해주세요."""
+    return system_prompt, report_text
+
+
+def _body(system_prompt: str, text: str) -> dict:
+    """Responses API 요청 본문 (동기/비동기/Batch API 공통)"""
+    return {
+        "model": MODEL,
+        "input": [
+            {"role": "developer", "content": system_prompt},
+            {"role": "user", "content": text}
+        ],
+        "temperature": TEMPERATURE,
+    }
+
+
+def _request_body(report_text: str, report_type: str = "company", truncate: bool = True) -> dict:
+    """리포트 한 건을 한 번에 요약하는 요청 본문"""
+    return _body(*_build_prompt(report_text, report_type, truncate))
+
+
+def _cache_key(body: dict) -> str:
+    """요청 본문의 요약 캐시 키"""
+    return SummaryCache.make_key(
+        body["input"][0]["content"], body["model"], body["temperature"], body["input"][1]["content"]
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    입력 토큰 수 추정 (토크나이저 없이 보수적으로 계산)
+
+    한글 등 비ASCII 문자는 1자당 1토큰, ASCII 문자는 4자당 1토큰으로 셉니다.
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4 + 1
+
+
+def split_text(text: str, max_tokens: int, separators: Tuple[str, ...] = ("\f", "\n\n", "\n", " ")) -> List[str]:
+    """
+    텍스트를 추정 토큰 수가 max_tokens 이하인 청크로 나누는 함수
+
+    페이지 구분(\\f) -> 문단 -> 줄 -> 단어 순으로 큰 경계부터 자르고, 잘린 조각들은 한도 안에서
+    다시 이어 붙여 청크 수를 줄입니다. 단어 하나가 한도를 넘으면 글자 수로 자릅니다.
+
+    Args:
+        text (str): 리포트 텍스트 (페이지는 \\f로 구분)
+        max_tokens (int): 청크당 최대 추정 토큰 수
+        separators (Tuple[str, ...]): 자를 경계 (큰 단위부터)
+
+    Returns:
+        List[str]: 청크 리스트
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    level = next((i for i, sep in enumerate(separators) if sep in text), None)
+    if level is None:
+        # 경계가 없으면 글자 수로 자름 (비ASCII 1자 = 1토큰이므로 max_tokens - 1자면 한도 이하)
+        step = max(1, max_tokens - 1)
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    sep = separators[level]
+    pieces = []
+    for part in text.split(sep):
+        if estimate_tokens(part) > max_tokens:
+            pieces.extend(split_text(part, max_tokens, separators[level + 1:]))
+        elif part.strip():
+            pieces.append(part)
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(sep.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(sep.join(current))
+    return chunks
+
+
+def _map_bodies(report_text: str, report_type: str, chunk_tokens: Optional[int]) -> List[dict]:
+    """
+    리포트 한 건의 1단계 요청 본문 리스트
+
+    chunk_tokens가 없으면 기존처럼 한 번에 요약(산업 리포트는 앞 20000자), 있으면 잘라내지 않고
+    chunk_tokens 단위로 나눠 청크별 요약 요청을 만듭니다. 청크가 하나뿐이면 바로 최종 요약 요청입니다.
+    """
+    if not chunk_tokens:
+        return [_request_body(report_text, report_type)]
+    chunks = split_text(report_text, chunk_tokens)
+    if len(chunks) == 1:
+        return [_request_body(report_text, report_type, truncate=False)]
+    kind = "산업" if report_type == "industry" else "기업"
+    return [
+        _body(CHUNK_PROMPT.format(kind=kind, index=i, total=len(chunks)), chunk)
+        for i, chunk in enumerate(chunks, 1)
+    ]
+
+
+def _reduce_body(partials: List[str], report_type: str) -> dict:
+    """청크 요약들을 합쳐 최종 요약을 만드는 요청 본문 (리포트 타입 프롬프트 그대로 사용)"""
+    system_prompt, _ = _build_prompt("", report_type)
+    text = "\n\n".join(f"[부분 {i}/{len(partials)}]\n{partial}" for i, partial in enumerate(partials, 1))
+    return _body(system_prompt, text)
+
+
+def _new_usage() -> dict:
+    """리포트 한 건의 요약 사용량 (input_tokens/output_tokens는 실제 API 호출분만, 캐시 재사용은 cached로 셈)"""
+    return {"chunks": 0, "requests": 0, "cached": 0, "input_tokens": 0, "output_tokens": 0}
+
+
+def _record_usage(usage: dict, resp, body: dict):
+    """API 응답의 토큰 사용량 기록 (응답에 usage가 없으면 추정값)"""
+    usage["requests"] += 1
+    if getattr(resp, "usage", None) is not None:
+        usage["input_tokens"] += resp.usage.input_tokens
+        usage["output_tokens"] += resp.usage.output_tokens
+    else:
+        usage["input_tokens"] += estimate_tokens(body["input"][0]["content"] + body["input"][1]["content"])
+
+
+def _summarize_body(body: dict, use_cache: bool, usage: dict,
+                    base_delay: float = 1.0, max_delay: float = 60.0) -> str:
+    """
+    요청 본문 하나를 동기로 요약 (summary_cache 확인, 실패 시 예외)
+
+    동시 요청 수는 _request_slots(MAX_CONCURRENT_REQUESTS)로 제한하고,
+    429/5xx/네트워크 오류는 _retry_wait의 지터 백오프로 MAX_RETRIES번까지 재시도합니다.
+    """
+    key = _cache_key(body) if use_cache else None
+    if key:
+        summary = summary_cache.get(key)
+        if summary is not None:
+            usage["cached"] += 1
+            return summary
 
-        resp = client.responses.create(
-            model="gpt-4.1",
-            input=[
-                {"role": "developer", "content": system_prompt},
-                {"role": "user", "content": report_text}
-            ],
-            temperature=0.1,
-        )
-        return resp.output_text.strip()
+    # 재시도는 여기서 직접 처리하므로 SDK 자체 재시도는 끔
+    client = get_client().with_options(max_retries=0)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with _request_slots:
+                resp = client.responses.create(**body)
+            break
+        except Exception as e:
+            wait = _retry_wait(e, attempt, base_delay, max_delay)
+            if wait is None or attempt == MAX_RETRIES:
+                raise
+            time.sleep(wait)
+    _record_usage(usage, resp, body)
+    summary = resp.output_text.strip()
+    if key and summary:
+        summary_cache.put(key, summary)
+    return summary
+
+
+def summarize_report(report_text: str, report_type: str = "company", use_cache: bool = True,
+                     chunk_tokens: Optional[int] = None, return_usage: bool = False):
+    """
+    리포트를 요약하는 함수
+    Args:
+        report_text: 리포트 텍스트
+        report_type: 리포트 타입 ("company" 또는 "industry")
+        use_cache: True면 summary_cache에 같은 입력의 요약이 있을 때 API를 호출하지 않음
+        chunk_tokens: 지정하면 긴 리포트를 이 토큰 수 단위로 나눠 청크별로 동시에 요약한 뒤 합쳐서 최종 요약
+                      (잘라내는 부분 없이 전체를 요약하고, 지연 시간은 가장 느린 청크 + 합치기 1회,
+                      여러 스레드에서 호출해도 전체 동시 요청 수는 MAX_CONCURRENT_REQUESTS개까지)
+        return_usage: True면 (요약, 사용량 dict) 반환
+    """
+    usage = _new_usage()
+    try:
+        bodies = _map_bodies(report_text, report_type, chunk_tokens)
+        usage["chunks"] = len(bodies)
+        if len(bodies) == 1:
+            summary = _summarize_body(bodies[0], use_cache, usage)
+        else:
+            chunk_usages = [_new_usage() for _ in bodies]
+            with ThreadPoolExecutor(max_workers=min(len(bodies), MAX_CHUNK_WORKERS)) as executor:
+                partials = list(executor.map(_summarize_body, bodies, [use_cache] * len(bodies), chunk_usages))
+            for chunk_usage in chunk_usages:
+                for name in ("requests", "cached", "input_tokens", "output_tokens"):
+                    usage[name] += chunk_usage[name]
+            summary = _summarize_body(_reduce_body(partials, report_type), use_cache, usage)
     except Exception as e:
-        return f"요약 실패: {e}"
\ No newline at end of file
+        summary = f"요약 실패: {e}"
+    return (summary, usage) if return_usage else summary
+
+
+def _retry_wait(error: Exception, attempt: int, base_delay: float, max_delay: float) -> Optional[float]:
+    """
+    재시도 전 대기 시간(초) 계산. 재시도하면 안 되는 오류면 None
+
+    - 429/5xx/네트워크 오류만 재시도
+    - 지수 백오프에 full jitter(0~상한 사이 랜덤)를 적용해 동시 요청들의 재시도 시점을 흩뜨림
+    - 서버가 retry-after를 주면 그 시간 이상 대기
+    """
+    retry_after = 0.0
+    if isinstance(error, APIStatusError):
+        if error.status_code != 429 and error.status_code < 500:
+            return None
+        headers = error.response.headers
+        try:
+            if headers.get("retry-after-ms"):
+                retry_after = float(headers["retry-after-ms"]) / 1000
+            elif headers.get("retry-after"):
+                retry_after = float(headers["retry-after"])
+        except ValueError:
+            pass
+    elif not isinstance(error, APIConnectionError):
+        return None
+
+    return max(retry_after, random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+async def summarize_reports(items: List[Tuple[str, str]], max_concurrency: int = 8,
+                            tokens_per_minute: int = 30000, max_retries: int = 5,
+                            base_delay: float = 1.0, max_delay: float = 60.0,
+                            base_url: Optional[str] = None, use_cache: bool = True,
+                            chunk_tokens: Optional[int] = None, return_usage: bool = False):
+    """
+    여러 리포트를 비동기로 동시에 요약하는 함수
+
+    - 동시 요청 수는 max_concurrency개까지
+    - 요청마다 (추정 입력 토큰 + OUTPUT_TOKEN_RESERVE)만큼 분당 토큰 예산에서 차감하고, 예산이 모자라면 대기
+    - 429/5xx/네트워크 오류는 지터를 준 지수 백오프로 max_retries번까지 재시도
+    - chunk_tokens를 지정하면 긴 리포트는 청크별 요약(모든 리포트의 청크가 같은 동시성 한도를 공유) 후 합쳐서 최종 요약
+
+    Args:
+        items (List[Tuple[str, str]]): [(리포트 텍스트, 리포트 타입), ...]
+        max_concurrency (int): 동시에 보낼 최대 요청 수
+        tokens_per_minute (int): 분당 토큰 한도 (계정 등급의 TPM에 맞춰 설정)
+        max_retries (int): 요청당 최대 재시도 횟수
+        base_delay (float): 첫 재시도 대기 상한 (초)
+        max_delay (float): 재시도 대기 상한의 최댓값 (초)
+        base_url (str, optional): API 주소 (로컬 스텁 서버 테스트용)
+        use_cache (bool): True면 summary_cache에 있는 요약은 API를 호출하지 않고 재사용
+        chunk_tokens (int, optional): 청크당 최대 추정 토큰 수 (None이면 한 번에 요약)
+        return_usage (bool): True면 (요약 리스트, 리포트별 사용량 dict 리스트) 반환
+
+    Returns:
+        List[str]: items 순서대로의 요약 (실패한 항목은 "요약 실패: ...")
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    budget = AsyncTokenBucket(rate=tokens_per_minute / 60, capacity=tokens_per_minute)
+    # 재시도는 여기서 직접 처리하므로 SDK 자체 재시도는 끔
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=base_url, max_retries=0)
+
+    async def request(body, usage):
+        key = _cache_key(body) if use_cache else None
+        if key:
+            summary = summary_cache.get(key)
+            if summary is not None:
+                usage["cached"] += 1
+                return summary
+
+        tokens = min(tokens_per_minute, estimate_tokens(body["input"][0]["content"] + body["input"][1]["content"])
+                     + OUTPUT_TOKEN_RESERVE)
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                await budget.acquire(tokens)
+                try:
+                    resp = await client.responses.create(**body)
+                    _record_usage(usage, resp, body)
+                    summary = resp.output_text.strip()
+                    if key and summary:
+                        summary_cache.put(key, summary)
+                    return summary
+                except Exception as e:
+                    wait = _retry_wait(e, attempt, base_delay, max_delay)
+                    if wait is None or attempt == max_retries:
+                        raise
+                    await asyncio.sleep(wait)
+
+    async def summarize_one(report_text, report_type):
+        usage = _new_usage()
+        try:
+            bodies = _map_bodies(report_text, report_type, chunk_tokens)
+            usage["chunks"] = len(bodies)
+            partials = await asyncio.gather(*(request(body, usage) for body in bodies))
+            if len(bodies) == 1:
+                summary = partials[0]
+            else:
+                summary = await request(_reduce_body(partials, report_type), usage)
+        except Exception as e:
+            summary = f"요약 실패: {e}"
+        return summary, usage
+
+    try:
+        results = await asyncio.gather(*(summarize_one(text, report_type) for text, report_type in items))
+    finally:
+        await client.close()
+    summaries = [summary for summary, _ in results]
+    return (summaries, [usage for _, usage in results]) if return_usage else summaries
+
+
+def submit_summary_batch(items: List[Tuple[str, str]], base_url: Optional[str] = None) -> str:
+    """
+    급하지 않은 대량 요약(백필)을 OpenAI Batch API로 제출하는 함수 (24시간 안에 처리, 비용 절감)
+
+    Args:
+        items (List[Tuple[str, str]]): [(리포트 텍스트, 리포트 타입), ...]
+        base_url (str, optional): API 주소
+
+    Returns:
+        str: 배치 ID (fetch_summary_batch로 결과 조회)
+    """
+    lines = [
+        json.dumps({"custom_id": f"report-{i}", "method": "POST", "url": "/v1/responses",
+                    "body": _request_body(report_text, report_type)}, ensure_ascii=False)
+        for i, (report_text, report_type) in enumerate(items)
+    ]
+    client = get_client(base_url)
+    batch_file = client.files.create(
+        file=("report_summaries.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id, endpoint="/v1/responses", completion_window="24h"
+    )
+    print(f"요약 배치 제출: {batch.id} ({len(items)}건)")
+    return batch.id
+
+
+def _batch_output_text(body: dict) -> str:
+    """Batch API 결과의 Responses 본문에서 출력 텍스트 추출"""
+    return "".join(
+        content.get("text", "")
+        for item in body.get("output", []) if item.get("type") == "message"
+        for content in item.get("content", []) if content.get("type") == "output_text"
+    ).strip()
+
+
+def fetch_summary_batch(batch_id: str, n_items: int, base_url: Optional[str] = None) -> Optional[List[str]]:
+    """
+    submit_summary_batch로 제출한 배치의 결과를 조회하는 함수
+
+    Args:
+        batch_id (str): 배치 ID
+        n_items (int): 제출한 항목 수
+        base_url (str, optional): API 주소
+
+    Returns:
+        Optional[List[str]]: 제출 순서대로의 요약 (아직 처리 중이면 None, 실패한 항목은 "요약 실패: ...")
+    """
+    client = get_client(base_url)
+    batch = client.batches.retrieve(batch_id)
+    if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+        print(f"요약 배치 처리 중: {batch_id} ({batch.status})")
+        return None
+
+    summaries = [f"요약 실패: 배치 결과 없음 ({batch.status})"] * n_items
+    for file_id in (batch.error_file_id, batch.output_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            index = int(row["custom_id"].rsplit("-", 1)[1])
+            response = row.get("response") or {}
+            if response.get("status_code") == 200:
+                summaries[index] = _batch_output_text(response.get("body") or {})
+            else:
+                summaries[index] = f"요약 실패: {row.get('error') or response.get('body')}"
+    return summaries
@@ -1,14 +1,35 @@
 from typing import List, Dict, Optional
 import requests
-import time
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne, ASCENDING
+from tools.rate_limiter import SlidingWindowLimiter
 
 load_dotenv()
 
 
 class OpenFIGIClient:
-    def __init__(self, api_key: Optional[str] = None):
+    # OpenFIGI /v3/mapping 공지 한도: (기간 안 최대 요청 수, 기간(초), 요청당 최대 job 수)
+    RATE_LIMITS = {
+        True: (25, 6.0, 100),   # API 키 있음: 6초에 25회
+        False: (25, 60.0, 10),  # API 키 없음: 1분에 25회
+    }
+    
+    def __init__(self, api_key: Optional[str] = None, mongo_uri: Optional[str] = None,
+                 hit_ttl_days: int = 90, miss_ttl_days: int = 7, max_retries: int = 1):
+        """
+        Args:
+            api_key (str, optional): OpenFIGI API 키
+            mongo_uri (str, optional): 매핑 캐시용 MongoDB URI. None이면 환경변수(MONGODB_URI)에서 가져옴
+            hit_ttl_days (int): 매핑 성공 결과 캐시 유효 기간 (일)
+            miss_ttl_days (int): 매핑 실패(결과 없음/경고/오류) 결과 캐시 유효 기간 (일)
+            max_retries (int): 429/5xx/네트워크 오류로 실패한 배치의 재시도 횟수
+        """
         self.base_url = "https://api.openfigi.com"
         self.api_key = api_key
         self.headers = {
@@ -16,30 +37,156 @@ class OpenFIGIClient:
         }
         if api_key:
             self.headers["X-OPENFIGI-APIKEY"] = api_key
+        
+        max_calls, period, self.max_jobs = self.RATE_LIMITS[bool(api_key)]
+        self.limiter = SlidingWindowLimiter(max_calls, period)
+        self.max_retries = max_retries
+        self.retry_base_delay = 2.0  # 네트워크/5xx 오류 재시도 대기 상한의 시작값 (초, 시도마다 2배)
+        self.retry_max_delay = 60.0  # 네트워크/5xx 오류 재시도 대기 상한의 최댓값 (초)
+        
+        # ISIN -> Ticker 매핑 캐시 (ISIN별 1건, 상태와 조회 시각 기록)
+        self.ttl = {"hit": timedelta(days=hit_ttl_days), "miss": timedelta(days=miss_ttl_days)}
+        mongo_uri = mongo_uri or os.getenv("MONGODB_URI")
+        if mongo_uri:
+            self.mongo_client = MongoClient(mongo_uri)
+            self.mapping_collection = self.mongo_client['quant']["openfigi_isin_ticker"]
+        else:
+            self.mongo_client = None
+            self.mapping_collection = None
+            print("MongoDB URI가 설정되지 않아 ISIN 매핑 캐시를 사용하지 않습니다.")
+        self._index_ready = False
     
-    def map_isin_to_ticker(self, isin_list: List[str], batch_size: int = 10) -> Dict[str, str]:
-        """ISIN 리스트를 Ticker로 직접 매핑합니다."""
-        isin_to_ticker = {}
-        
-        # API 키가 없으면 batch_size를 5로 제한
-        if not self.api_key and batch_size > 5:
-            batch_size = 5
-            print("API 키가 없어서 batch_size를 5로 제한합니다.")
-        
-        total_batches = (len(isin_list) + batch_size - 1) // batch_size
-        print(f"총 {len(isin_list)}개 ISIN을 {total_batches}개 배치로 처리합니다.")
-        
-        # ISIN을 배치로 나누어 처리
-        for batch_idx in range(0, len(isin_list), batch_size):
-            batch_isins = isin_list[batch_idx:batch_idx + batch_size]
-            current_batch = (batch_idx // batch_size) + 1
-                        
-            # API 요청 데이터 준비
-            request_data = [
-                {"idType": "ID_ISIN", "idValue": isin} 
-                for isin in batch_isins
-            ]
-            
+    def _load_cached(self, isin_list: List[str]) -> Dict[str, dict]:
+        """캐시에서 유효 기간이 지나지 않은 매핑 결과를 ISIN별로 가져옵니다."""
+        if self.mapping_collection is None or not isin_list:
+            return {}
+        
+        now = datetime.now()
+        cached = {}
+        for doc in self.mapping_collection.find({"ISIN": {"$in": isin_list}}, {"_id": 0}):
+            ttl = self.ttl["hit"] if doc.get("status") == "hit" else self.ttl["miss"]
+            if doc.get("updated_at") and doc["updated_at"] + ttl > now:
+                cached[doc["ISIN"]] = doc
+        return cached
+    
+    def _save_cached(self, records: List[dict]):
+        """매핑 결과를 ISIN 기준으로 캐시에 upsert합니다."""
+        if self.mapping_collection is None or not records:
+            return
+        
+        if not self._index_ready:
+            try:
+                self.mapping_collection.create_index([("ISIN", ASCENDING)], unique=True, name="ISIN_1")
+            except Exception as e:
+                print(f"ISIN 매핑 캐시 인덱스 생성 실패: {e}")
+            self._index_ready = True
+        
+        self.mapping_collection.bulk_write(
+            [UpdateOne({"ISIN": record["ISIN"]}, {"$set": record}, upsert=True) for record in records],
+            ordered=False
+        )
+    
+    def map_isin_to_ticker(self, isin_list: List[str], batch_size: Optional[int] = None, refresh: bool = False,
+                           max_workers: int = 4) -> Dict[str, str]:
+        """
+        ISIN 리스트를 Ticker로 직접 매핑합니다.
+        
+        캐시에 유효한 결과가 있는 ISIN은 API를 호출하지 않고, 새로 조회한 결과(성공/실패/경고)는
+        배치마다 캐시에 저장합니다. 실패 결과는 성공보다 짧은 기간(miss_ttl_days)만 유지합니다.
+        배치는 max_workers개까지 동시에 요청하되, 전체 요청 속도는 OpenFIGI 한도(RATE_LIMITS)를 넘지 않습니다.
+        
+        Args:
+            isin_list (List[str]): ISIN 리스트
+            batch_size (int, optional): 요청 한 번에 보낼 ISIN 수 (None이면 요청당 최대 job 수)
+            refresh (bool): True면 캐시를 무시하고 모두 다시 조회
+            max_workers (int): 동시에 요청할 배치 수
+        
+        Returns:
+            Dict[str, str]: {ISIN: Ticker} (매핑 성공한 ISIN만)
+        """
+        isin_list = list(dict.fromkeys(isin_list))
+        cached = {} if refresh else self._load_cached(isin_list)
+        isin_to_ticker = {
+            isin: doc["ticker"] for isin, doc in cached.items() if doc.get("status") == "hit"
+        }
+        
+        isin_list = [isin for isin in isin_list if isin not in cached]
+        print(f"캐시 사용 {len(cached)}개 (매핑 {len(isin_to_ticker)}개), API 조회 대상 {len(isin_list)}개")
+        if not isin_list:
+            return isin_to_ticker
+        
+        # 요청당 job 수는 OpenFIGI 한도까지 (API 키가 없으면 10개)
+        batch_size = batch_size or self.max_jobs
+        if batch_size > self.max_jobs:
+            batch_size = self.max_jobs
+            print(f"요청당 최대 job 수에 맞춰 batch_size를 {self.max_jobs}로 제한합니다.")
+        
+        batches = [isin_list[i:i + batch_size] for i in range(0, len(isin_list), batch_size)]
+        print(f"총 {len(isin_list)}개 ISIN을 {len(batches)}개 배치로 처리합니다.")
+        
+        # 배치를 동시에 요청 (전체 요청 속도는 self.limiter가 OpenFIGI 한도 이하로 유지)
+        failed_isins = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._request_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch_isins = futures[future]
+                results = future.result()
+                if results is None:
+                    failed_isins.extend(batch_isins)
+                    continue
+                
+                mapped, records = self._parse_results(batch_isins, results)
+                self._save_cached(records)
+                before = len(isin_to_ticker)
+                isin_to_ticker.update(mapped)
+                # 너무 많은 출력을 방지하기 위해 100개마다 출력
+                if len(isin_to_ticker) // 100 > before // 100:
+                    print(f"  매핑 성공 누적: {len(isin_to_ticker)}개")
+        
+        if failed_isins:
+            print(f"요청 실패로 매핑하지 못한 ISIN {len(failed_isins)}개 (캐시하지 않고 다음 실행 때 다시 조회)")
+        
+        return isin_to_ticker
+    
+    def _retry_wait(self, response) -> float:
+        """응답 헤더에서 다음 요청까지 기다릴 시간(초) 계산 (Retry-After -> ratelimit-reset -> 한도 기간)"""
+        for header in ("Retry-After", "ratelimit-reset"):
+            value = response.headers.get(header)
+            if not value:
+                continue
+            try:
+                return max(float(value), 1.0)
+            except ValueError:
+                pass
+            try:
+                # Retry-After가 HTTP 날짜 형식인 경우
+                return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 1.0)
+            except (TypeError, ValueError):
+                pass
+        return self.limiter.period
+    
+    def _backoff(self, attempt: int) -> float:
+        """네트워크/5xx 오류 재시도 전 대기 시간 (지수 백오프 + full jitter)"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+    
+    def _request_batch(self, batch_isins: List[str]) -> Optional[list]:
+        """
+        배치 하나를 /v3/mapping에 요청합니다.
+        
+        429/5xx/네트워크 오류는 max_retries번까지만 다시 시도하고, 429는 서버가 알려준 시간 동안
+        모든 요청을 멈춘 뒤, 5xx/네트워크 오류는 지터를 준 지수 백오프만큼 기다린 뒤 재시도합니다.
+        그 외 4xx는 재시도하지 않습니다.
+        
+        Returns:
+            Optional[list]: job별 결과 리스트 (실패 시 None)
+        """
+        request_data = [
+            {"idType": "ID_ISIN", "idValue": isin} 
+            for isin in batch_isins
+        ]
+        
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
             try:
                 response = requests.post(
                     f"{self.base_url}/v3/mapping",
@@ -47,47 +194,64 @@ class OpenFIGIClient:
                     json=request_data,
                     timeout=30
                 )
-                
-                if response.status_code == 200:
-                    results = response.json()
-                    
-                    batch_success = 0
-                    for j, result in enumerate(results):
-                        isin = batch_isins[j]
-                        
-                        if "data" in result and result["data"]:
-                            # 첫 번째 결과에서 Ticker 추출
-                            figi_data = result["data"][0]
-                            ticker = figi_data.get("ticker", "")
-                            
-                            if ticker:
-                                isin_to_ticker[isin] = ticker
-                                batch_success += 1
-                                # 너무 많은 출력을 방지하기 위해 가끔만 출력
-                                if len(isin_to_ticker) % 100 == 0:
-                                    print(f"  매핑 성공 누적: {len(isin_to_ticker)}개")
-                        elif "warning" in result:
-                            print(f"  매핑 실패: {isin} - {result['warning']}")
-                        elif "error" in result:
-                            print(f"  API 오류: {isin} - {result['error']}")
-                                    
-                elif response.status_code == 429:
-                    print("Rate limit 도달. 잠시 대기 후 재시도...")
-                    time.sleep(60)  # 1분 대기
-                    # 현재 배치를 다시 시도
-                    batch_idx -= batch_size
-                    continue
-                else:
-                    print(f"API 요청 실패: {response.status_code} - {response.text}")
-                
-                # Rate limit 준수를 위한 대기
-                if not self.api_key:
-                    time.sleep(2.5)  # API 키 없으면 좀 더 여유롭게
-                else:
-                    time.sleep(0.3)
-                
             except Exception as e:
                 print(f"요청 중 오류 발생: {e}")
-                time.sleep(5)
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt))
+                continue
+            
+            if response.status_code == 200:
+                # 남은 요청 수가 없으면 리셋 시점까지 다른 요청도 멈춤
+                if response.headers.get("ratelimit-remaining") == "0":
+                    self.limiter.pause(self._retry_wait(response))
+                return response.json()
+            
+            if response.status_code == 429:
+                wait = self._retry_wait(response)
+                print(f"Rate limit 도달. {wait:.0f}초 대기 후 재시도...")
+                self.limiter.pause(wait)
+            else:
+                print(f"API 요청 실패: {response.status_code} - {response.text}")
+                if response.status_code < 500:
+                    return None
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt))
         
-        return isin_to_ticker
\ No newline at end of file
+        print(f"  재시도 후에도 실패한 배치: {batch_isins[0]} 외 {len(batch_isins) - 1}개")
+        return None
+    
+    def _parse_results(self, batch_isins: List[str], results: list):
+        """
+        /v3/mapping 결과를 ISIN별로 정리합니다.
+        
+        Returns:
+            tuple: ({ISIN: Ticker}, 캐시에 저장할 레코드 리스트)
+        """
+        mapped = {}
+        records = []
+        for isin, result in zip(batch_isins, results):
+            record = {"ISIN": isin, "status": "miss", "ticker": None, "message": None,
+                      "updated_at": datetime.now()}
+            
+            if "data" in result and result["data"]:
+                # 첫 번째 결과에서 Ticker 추출
+                figi_data = result["data"][0]
+                ticker = figi_data.get("ticker", "")
+                
+                if ticker:
+                    mapped[isin] = ticker
+                    record.update(status="hit", ticker=ticker, figi=figi_data.get("figi"))
+            elif "warning" in result:
+                record.update(status="warning", message=result["warning"])
+                print(f"  매핑 실패: {isin} - {result['warning']}")
+            elif "error" in result:
+                record.update(status="error", message=result["error"])
+                print(f"  API 오류: {isin} - {result['error']}")
+            records.append(record)
+        
+        return mapped, records
+    
+    def close(self):
+        """MongoDB 연결 종료"""
+        if self.mongo_client:
+            self.mongo_client.close()
@@ -0,0 +1,197 @@
+import asyncio
+import collections
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    초당 요청 수(requests/sec)를 제한하는 스레드 안전 토큰 버킷
+
+    여러 워커 스레드가 하나의 인스턴스를 공유하면 전체 요청 속도가 rate 이하로 유지됩니다.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate (float): 초당 충전되는 토큰 수 (= 초당 허용 요청 수)
+            capacity (float): 버킷 최대 크기 (순간적으로 몰아서 보낼 수 있는 요청 수)
+        """
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        if capacity < 1:
+            raise ValueError("capacity는 1 이상이어야 합니다.")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """경과 시간만큼 토큰 충전 (lock 안에서 호출)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """토큰이 있으면 소비하고 True, 없으면 기다리지 않고 False 반환"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0):
+        """토큰을 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AsyncTokenBucket:
+    """
+    asyncio용 토큰 버킷 (하나의 이벤트 루프 안에서 여러 코루틴이 공유)
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate (float): 초당 충전되는 토큰 수 (= 초당 허용 요청 수)
+            capacity (float): 버킷 최대 크기
+        """
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        if capacity < 1:
+            raise ValueError("capacity는 1 이상이어야 합니다.")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """토큰을 얻을 때까지 대기 (먼저 기다린 코루틴이 먼저 통과)"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class AdaptivePacer:
+    """
+    서버 응답에 맞춰 요청 간격을 조절하는 스레드 안전 페이서
+
+    - 빠르고 성공적인 응답: 간격을 speedup 배로 줄임 (min_delay까지)
+    - 오류 또는 느린 응답: 간격을 backoff 배로 늘림 (max_delay까지, 지수 백오프)
+    """
+
+    def __init__(self, initial_delay: float = 3.0, min_delay: float = 0.5,
+                 max_delay: float = 60.0, speedup: float = 0.8, backoff: float = 2.0,
+                 slow_threshold: float = 10.0, jitter: float = 0.2):
+        """
+        Args:
+            initial_delay (float): 시작 요청 간격 (초)
+            min_delay (float): 최소 요청 간격 (초)
+            max_delay (float): 최대 요청 간격 (초)
+            speedup (float): 성공 시 간격에 곱할 값 (1보다 작게)
+            backoff (float): 실패/지연 시 간격에 곱할 값 (1보다 크게)
+            slow_threshold (float): 이 시간(초)보다 오래 걸린 응답은 느린 응답으로 간주
+            jitter (float): 간격에 더할 랜덤 비율 (0.2면 ±20%)
+        """
+        self.delay = float(initial_delay)
+        self.min_delay = float(min_delay)
+        self.max_delay = float(max_delay)
+        self.speedup = speedup
+        self.backoff = backoff
+        self.slow_threshold = slow_threshold
+        self.jitter = jitter
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """다음 요청 시점까지 대기 (동시에 호출한 스레드들은 순서대로 슬롯을 배정받음)"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            interval = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._next = start + interval
+        if start > now:
+            time.sleep(start - now)
+
+    def record(self, success: bool, elapsed: float = None):
+        """
+        요청 결과를 반영해서 간격 조절
+
+        Args:
+            success (bool): 요청 성공 여부
+            elapsed (float, optional): 응답까지 걸린 시간 (초)
+        """
+        with self._lock:
+            slow = elapsed is not None and elapsed > self.slow_threshold
+            if not success or slow:
+                self.delay = min(self.max_delay, self.delay * self.backoff)
+            else:
+                self.delay = max(self.min_delay, self.delay * self.speedup)
+
+
+class SlidingWindowLimiter:
+    """
+    기간(period) 안의 요청 수를 max_calls 이하로 유지하는 스레드 안전 슬라이딩 윈도우 리미터
+
+    "1분에 25회"처럼 기간 단위로 공지된 한도에 맞춰 요청을 통과시키고,
+    서버가 Retry-After 등으로 대기를 요구하면 pause()로 모든 요청을 그 시점까지 멈춥니다.
+    """
+
+    def __init__(self, max_calls: int, period: float):
+        """
+        Args:
+            max_calls (int): 기간 안에 허용되는 최대 요청 수
+            period (float): 기간 (초)
+        """
+        if max_calls < 1:
+            raise ValueError("max_calls는 1 이상이어야 합니다.")
+        if period <= 0:
+            raise ValueError("period는 0보다 커야 합니다.")
+
+        self.max_calls = int(max_calls)
+        self.period = float(period)
+        self._calls = collections.deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """요청 슬롯을 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and self._calls[0] <= now - self.period:
+                    self._calls.popleft()
+                wait = self._paused_until - now
+                if len(self._calls) >= self.max_calls:
+                    wait = max(wait, self._calls[0] + self.period - now)
+                if wait <= 0:
+                    self._calls.append(now)
+                    return
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """지금부터 seconds초 동안 모든 요청을 멈춤 (이미 더 길게 멈춰 있으면 유지)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
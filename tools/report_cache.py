@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+
+def _atomic_write(path: str, data):
+    """임시 파일에 쓴 뒤 교체 (여러 스레드/프로세스가 같은 파일을 써도 깨진 파일이 남지 않음)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if isinstance(data, bytes):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ReportCache:
+    """
+    리포트 PDF / 추출 텍스트 / 요약의 로컬 디스크 캐시 (PDF 내용 해시 기준)
+
+    - 디렉토리 구조: {cache_dir}/url/{sha1(pdf_url)}  -> PDF 내용 해시(sha256)
+                     {cache_dir}/pdf/{해시}.pdf
+                     {cache_dir}/text/{해시}_{variant}.txt   (variant: 추출 옵션, 예: "full", "skip_last")
+                     {cache_dir}/summary/{해시}_{report_type}.txt
+    - 같은 PDF가 다른 URL로 올라와도 해시가 같으면 텍스트/요약을 그대로 재사용
+    - 모든 파일은 임시 파일에 쓴 뒤 교체하므로 중간에 중단돼도 깨진 파일이 남지 않음
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Args:
+            cache_dir (str, optional): 캐시 디렉토리 (None이면 REPORT_CACHE_DIR 환경변수 또는 .report_cache)
+        """
+        self.path = cache_dir or os.getenv("REPORT_CACHE_DIR", ".report_cache")
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        """PDF 내용의 sha256 해시"""
+        return hashlib.sha256(content).hexdigest()
+
+    def _file(self, kind: str, name: str) -> str:
+        return os.path.join(self.path, kind, name)
+
+    def _read(self, path: str, binary: bool = False):
+        try:
+            with open(path, "rb" if binary else "r", **({} if binary else {"encoding": "utf-8"})) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, data):
+        _atomic_write(path, data)
+
+    def _url_file(self, pdf_url: str) -> str:
+        return self._file("url", hashlib.sha1(pdf_url.encode("utf-8")).hexdigest())
+
+    def get_hash(self, pdf_url: str) -> Optional[str]:
+        """캐시된 PDF URL의 내용 해시 (없으면 None)"""
+        return self._read(self._url_file(pdf_url))
+
+    def get_pdf(self, pdf_url: str):
+        """
+        캐시된 PDF 조회
+
+        Returns:
+            tuple: (PDF bytes, 내용 해시), 캐시에 없으면 (None, None)
+        """
+        content_hash = self.get_hash(pdf_url)
+        if content_hash is None:
+            return None, None
+        content = self._read(self._file("pdf", f"{content_hash}.pdf"), binary=True)
+        if content is None:
+            return None, None
+        return content, content_hash
+
+    def put_pdf(self, pdf_url: str, content: bytes) -> str:
+        """PDF 저장 후 내용 해시 반환"""
+        content_hash = self.content_hash(content)
+        pdf_path = self._file("pdf", f"{content_hash}.pdf")
+        if not os.path.exists(pdf_path):
+            self._write(pdf_path, content)
+        self._write(self._url_file(pdf_url), content_hash)
+        return content_hash
+
+    def get_text(self, content_hash: str, variant: str) -> Optional[str]:
+        return self._read(self._file("text", f"{content_hash}_{variant}.txt"))
+
+    def put_text(self, content_hash: str, variant: str, text: str):
+        self._write(self._file("text", f"{content_hash}_{variant}.txt"), text)
+
+    def get_summary(self, content_hash: str, report_type: str) -> Optional[str]:
+        return self._read(self._file("summary", f"{content_hash}_{report_type}.txt"))
+
+    def put_summary(self, content_hash: str, report_type: str, summary: str):
+        self._write(self._file("summary", f"{content_hash}_{report_type}.txt"), summary)
+
+
+class SummaryCache:
+    """
+    LLM 요약 메모이제이션 캐시 (시스템 프롬프트 + 모델 + temperature + 정규화한 입력 텍스트의 해시 기준)
+
+    - PDF가 달라도 입력 텍스트가 같으면(공백/유니코드 표기 차이 무시) 저장된 요약을 재사용
+    - 파일 구조: {cache_dir}/summary_memo/{key[:2]}/{key}.txt
+    - TTL: 저장 후 ttl_days가 지난 요약은 무효 (파일 수정 시각 기준)
+    - LRU: 항목 수가 max_entries를 넘으면 마지막 조회 시각(파일 접근 시각)이 오래된 것부터 삭제
+    - hits / misses / evictions 카운터로 캐시 효과 확인
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl_days: Optional[float] = 180,
+                 max_entries: Optional[int] = 50000):
+        """
+        Args:
+            cache_dir (str, optional): 캐시 디렉토리 (None이면 REPORT_CACHE_DIR 환경변수 또는 .report_cache)
+            ttl_days (float, optional): 요약 유효 기간 (일, None이면 만료 없음)
+            max_entries (int, optional): 최대 항목 수 (None이면 제한 없음)
+        """
+        self.path = os.path.join(cache_dir or os.getenv("REPORT_CACHE_DIR", ".report_cache"), "summary_memo")
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._count = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """유니코드 정규화(NFKC) + 연속 공백/줄바꿈을 공백 하나로"""
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    @classmethod
+    def make_key(cls, system_prompt: str, model: str, temperature: float, text: str) -> str:
+        """요약 결과를 결정하는 입력 전체의 sha256 해시 (text는 잘라낸 뒤 실제로 보내는 텍스트)"""
+        payload = json.dumps(
+            [cls.normalize(system_prompt), model, temperature, cls.normalize(text)], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """저장된 요약 조회 (없거나 만료됐으면 None)"""
+        path = self._file(key)
+        try:
+            stat = os.stat(path)
+            if self.ttl is not None and time.time() - stat.st_mtime > self.ttl:
+                os.remove(path)
+                summary = None
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    summary = f.read()
+                # 접근 시각을 LRU 순서로 사용 (수정 시각은 TTL용으로 유지)
+                os.utime(path, (time.time(), stat.st_mtime))
+        except FileNotFoundError:
+            summary = None
+
+        with self._lock:
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return summary
+
+    def put(self, key: str, summary: str):
+        """요약 저장 (max_entries를 넘으면 LRU 정리)"""
+        path = self._file(key)
+        is_new = not os.path.exists(path)
+        _atomic_write(path, summary)
+        if not is_new or self.max_entries is None:
+            return
+
+        with self._lock:
+            if self._count is None:
+                self._count = len(self._entries())
+            else:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _entries(self):
+        """(접근 시각, 경로) 리스트"""
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".txt"):
+                    path = os.path.join(root, name)
+                    try:
+                        entries.append((os.stat(path).st_atime, path))
+                    except FileNotFoundError:
+                        pass
+        return entries
+
+    def _evict(self):
+        """오래 조회되지 않은 항목부터 max_entries의 90%까지 삭제 (lock 안에서 호출)"""
+        entries = sorted(self._entries())
+        target = int(self.max_entries * 0.9)
+        for _, path in entries[:max(0, len(entries) - target)]:
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+        self._count = min(len(entries), target)
+
+    def stats(self) -> dict:
+        """hits / misses / evictions / hit_rate"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,238 @@
+import os
+import sqlite3
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+SEARCH_COLUMNS = ("title", "name", "summary", "text")
+
+
+def _iso_date(value) -> Optional[str]:
+    """date/datetime 또는 "yy.mm.dd"/"YYYY-MM-DD"/"YYYYMMDD" 문자열을 "YYYY-MM-DD"로 변환 (변환 불가면 None)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    for fmt in ("%y.%m.%d", "%Y-%m-%d", "%Y%m%d", "%Y.%m.%d"):
+        try:
+            return datetime.strptime(str(value), fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+class ReportSearchIndex:
+    """
+    naver_reports 전문 검색용 로컬 SQLite FTS5 인덱스
+
+    - 토크나이저: trigram (한글은 띄어쓰기/조사와 상관없이 3글자 이상 부분 문자열로 검색)
+    - 2글자 이하 검색어(예: "LG", "삼성")는 trigram으로 찾을 수 없어서, 다른 검색어로 좁힌 뒤 또는
+      날짜/종류 조건 안에서 본문을 직접 확인합니다.
+    - NaverReportScraper.save_to_db가 저장할 때마다 add()로 갱신하고,
+      다른 곳에서 저장된 리포트는 sync()로 MongoDB의 updated_at 이후 변경분만 가져옵니다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path (str, optional): 인덱스 파일 경로 (None이면 REPORT_SEARCH_DB 환경변수 또는
+                                  {REPORT_CACHE_DIR 또는 .report_cache}/naver_reports_fts.sqlite)
+        """
+        self.path = path or os.getenv("REPORT_SEARCH_DB") or os.path.join(
+            os.getenv("REPORT_CACHE_DIR", ".report_cache"), "naver_reports_fts.sqlite"
+        )
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self._create_tables()
+
+    def _create_tables(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY,
+                pdf_url TEXT UNIQUE,
+                date TEXT,
+                which TEXT,
+                securities TEXT,
+                name TEXT,
+                title TEXT,
+                summary TEXT,
+                text TEXT
+            );
+            CREATE INDEX IF NOT EXISTS reports_date ON reports(date);
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                title, name, summary, text, content='reports', content_rowid='id', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN
+                INSERT INTO reports_fts(rowid, title, name, summary, text)
+                VALUES (new.id, new.title, new.name, new.summary, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN
+                INSERT INTO reports_fts(reports_fts, rowid, title, name, summary, text)
+                VALUES ('delete', old.id, old.title, old.name, old.summary, old.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS reports_au AFTER UPDATE ON reports BEGIN
+                INSERT INTO reports_fts(reports_fts, rowid, title, name, summary, text)
+                VALUES ('delete', old.id, old.title, old.name, old.summary, old.text);
+                INSERT INTO reports_fts(rowid, title, name, summary, text)
+                VALUES (new.id, new.title, new.name, new.summary, new.text);
+            END;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def add(self, docs: List[dict]) -> int:
+        """
+        naver_reports 형식의 문서들을 pdf_url 기준으로 upsert
+
+        Args:
+            docs (List[dict]): save_to_db가 저장하는 필드(pdf_url, date, which, securities,
+                               company_name/industry_name, report_title, summary, text)를 가진 문서
+
+        Returns:
+            int: 반영한 문서 수
+        """
+        rows = [
+            (
+                doc["pdf_url"], _iso_date(doc.get("date")), doc.get("which"), doc.get("securities"),
+                doc.get("company_name") or doc.get("industry_name"), doc.get("report_title"),
+                doc.get("summary"), doc.get("text"),
+            )
+            for doc in docs if doc.get("pdf_url")
+        ]
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO reports (pdf_url, date, which, securities, name, title, summary, text)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(pdf_url) DO UPDATE SET
+                    date = excluded.date, which = excluded.which, securities = excluded.securities,
+                    name = excluded.name, title = excluded.title, summary = excluded.summary, text = excluded.text
+            """, rows)
+        return len(rows)
+
+    def sync(self, collection, batch_size: int = 1000) -> int:
+        """
+        MongoDB naver_reports에서 마지막 동기화 이후 저장/수정된 문서만 가져와 인덱스에 반영
+        (처음 실행하면 updated_at이 없는 예전 문서까지 전체를 가져옴)
+
+        Args:
+            collection: naver_reports pymongo 컬렉션
+            batch_size (int): 한 번에 반영할 문서 수
+
+        Returns:
+            int: 반영한 문서 수
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        query = {"updated_at": {"$gt": datetime.fromisoformat(row[0])}} if row else {}
+        projection = {"_id": 0, "pdf_url": 1, "date": 1, "which": 1, "securities": 1, "company_name": 1,
+                      "industry_name": 1, "report_title": 1, "summary": 1, "text": 1, "updated_at": 1}
+
+        total, batch = 0, []
+        last_sync = datetime.fromisoformat(row[0]) if row else None
+        for doc in collection.find(query, projection).batch_size(batch_size):
+            batch.append(doc)
+            if doc.get("updated_at") and (last_sync is None or doc["updated_at"] > last_sync):
+                last_sync = doc["updated_at"]
+            if len(batch) >= batch_size:
+                total += self.add(batch)
+                batch = []
+        if batch:
+            total += self.add(batch)
+
+        if last_sync is not None:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)", (last_sync.isoformat(),)
+                )
+        print(f"검색 인덱스 동기화: {total}건 반영 (전체 {len(self)}건)")
+        return total
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM reports").fetchone()[0]
+
+    def search(self, query: str, date_range: Optional[Tuple] = None, which: Optional[str] = None,
+               limit: Optional[int] = 50, order: str = "rank", snippet: bool = True) -> pd.DataFrame:
+        """
+        리포트 전문 검색
+
+        검색어는 공백으로 나눈 단어를 모두 포함(AND)하는 리포트를 찾습니다. "..."로 묶으면 공백 포함 구절로 검색합니다.
+        제목/종목·산업명/요약/본문을 모두 검색하고, 검색어가 비어 있으면 조건에 맞는 리포트를 최신순으로 반환합니다.
+
+        Args:
+            query (str): 검색어 (예: "삼성전자 HBM", '"목표주가 상향"')
+            date_range (tuple, optional): (시작일, 종료일) date 또는 "yy.mm.dd"/"YYYY-MM-DD" 문자열, 한쪽은 None 가능
+            which (str, optional): "company" 또는 "industry"
+            limit (int, optional): 최대 결과 수 (None이면 전체)
+            order (str): "rank"(관련도, BM25) 또는 "date"(최신순)
+            snippet (bool): 검색어 주변 본문 발췌([검색어] 표시) 포함 여부 (결과가 아주 많을 때 끄면 빠름)
+
+        Returns:
+            pd.DataFrame: date, which, securities, name, title, summary, pdf_url, snippet, score
+        """
+        terms = self._split_query(query)
+        long_terms = [term for term in terms if len(term) >= 3]
+        short_terms = [term for term in terms if len(term) < 3]
+
+        conditions, params = [], []
+        for term in short_terms:
+            # trigram으로 찾을 수 없는 짧은 검색어는 원문에서 직접 확인
+            conditions.append("(" + " OR ".join(f"instr(lower(r.{column}), ?) > 0" for column in SEARCH_COLUMNS) + ")")
+            params.extend([term.lower()] * len(SEARCH_COLUMNS))
+        if date_range is not None:
+            start, end = date_range
+            if _iso_date(start):
+                conditions.append("r.date >= ?")
+                params.append(_iso_date(start))
+            if _iso_date(end):
+                conditions.append("r.date <= ?")
+                params.append(_iso_date(end))
+        if which:
+            conditions.append("r.which = ?")
+            params.append(which)
+
+        fields = "r.date, r.which, r.securities, r.name, r.title, r.summary, r.pdf_url"
+        order_by = "score, r.date DESC" if order == "rank" and long_terms else "r.date DESC"
+        limit_sql = f" LIMIT {int(limit)}" if limit else ""
+        if long_terms:
+            # 3글자 이상 검색어는 FTS 인덱스로 찾고 관련도(BM25, 제목/이름 가중)로 정렬
+            match = " AND ".join('"' + term.replace('"', '""') + '"' for term in long_terms)
+            sql = (f"SELECT r.id, {fields}, bm25(reports_fts, 10.0, 10.0, 3.0, 1.0) AS score "
+                   f"FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid WHERE reports_fts MATCH ?")
+            params = [match] + params
+        else:
+            # 검색어가 없으면 날짜/종류 조건에 맞는 리포트 목록
+            sql = f"SELECT r.id, {fields}, NULL AS score FROM reports r WHERE 1"
+        for condition in conditions:
+            sql += f" AND {condition}"
+        sql += f" ORDER BY {order_by}{limit_sql}"
+
+        if long_terms and snippet:
+            # 스니펫은 본문을 다시 토큰화하므로 정렬/LIMIT으로 남은 행에서만 계산
+            sql = (f"WITH hits AS ({sql}) "
+                   f"SELECT hits.date, hits.which, hits.securities, hits.name, hits.title, hits.summary, hits.pdf_url, "
+                   f"snippet(reports_fts, -1, '[', ']', '…', 16) AS snippet, hits.score "
+                   f"FROM hits JOIN reports_fts ON reports_fts.rowid = hits.id WHERE reports_fts MATCH ? "
+                   f"ORDER BY {order_by.replace('r.date', 'hits.date')}")
+            params = params + [match]
+        else:
+            sql = f"SELECT date, which, securities, name, title, summary, pdf_url, NULL AS snippet, score FROM ({sql})"
+
+        columns = ["date", "which", "securities", "name", "title", "summary", "pdf_url", "snippet", "score"]
+        return pd.DataFrame(self.conn.execute(sql, params).fetchall(), columns=columns)
+
+    @staticmethod
+    def _split_query(query: str) -> List[str]:
+        """공백 기준으로 검색어를 나누되 "..."로 묶은 구절은 하나로 유지"""
+        terms = []
+        for i, part in enumerate(query.split('"')):
+            if i % 2:
+                if part.strip():
+                    terms.append(part.strip())
+            else:
+                terms.extend(part.split())
+        return terms
+
+    def close(self):
+        self.conn.close()
@@ -1,3 +1,7 @@
+import asyncio
+import json
+import queue
+import threading
 import time
 import os
 import requests
@@ -7,15 +11,105 @@ import numpy as np
 import pandas as pd
 import xml.etree.ElementTree as ET
 from tqdm import tqdm
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, ASCENDING
 from dotenv import load_dotenv
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Iterable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+from tools.rate_limiter import AdaptivePacer
+from tools.columnar_cache import ParquetCache
+from tools.mongo_reader import find_dataframe
+
+try:
+    import holidays
+except ImportError:  # 휴장일 달력이 없으면 주말만 제외
+    holidays = None
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class _SettlementColumnTarget:
+    """
+    SEIBRO 정산 응답용 XMLParser 타깃 (Element 객체를 만들지 않고 컬럼 리스트에 바로 값을 채움)
+    
+    - <data><result> 안의 각 필드 value를 컬럼별 리스트에 추가
+    - 쉼표가 포함된 숫자는 파싱 중에 바로 int/float로 변환하고 (빈 값은 NaN),
+      숫자가 아닌 값이 하나라도 나온 컬럼은 문자열 컬럼으로 둠
+    - 앞쪽 행에 없던 컬럼은 None으로 채움
+    """
+
+    def __init__(self):
+        self.raw = {}        # 컬럼별 원본 문자열
+        self.numeric = {}    # 컬럼별 숫자 값 (숫자로 변환되지 않는 컬럼은 제외)
+        self.n_rows = 0
+        self.empty_result = False
+        self._depth = 0
+        self._in_data = False
+        self._in_result = False
+
+    @staticmethod
+    def _to_number(value: str):
+        """쉼표가 포함된 숫자 문자열을 int/float로 변환 (빈 값은 None, 숫자가 아니면 ValueError)"""
+        value = value.replace(',', '').strip()
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+
+    def start(self, tag, attrib):
+        self._depth += 1
+        if self._in_result:
+            values = self.raw.get(tag)
+            if values is None:
+                values = self.raw[tag] = [None] * self.n_rows
+                self.numeric[tag] = [None] * self.n_rows
+            value = attrib.get('value', '')
+            values.append(value)
+            numbers = self.numeric.get(tag)
+            if numbers is not None:
+                try:
+                    numbers.append(self._to_number(value))
+                except ValueError:
+                    del self.numeric[tag]
+        elif tag == "result" and self._in_data:
+            self._in_result = True
+        elif tag == "data":
+            self._in_data = True
+        elif self._depth == 1 and tag == "vector" and attrib.get("result") == "0":
+            self.empty_result = True
+
+    def end(self, tag):
+        self._depth -= 1
+        if self._in_result and tag == "result":
+            self._in_result = False
+            self.n_rows += 1
+            for col, values in self.raw.items():
+                if len(values) < self.n_rows:
+                    values.append(None)
+                    numbers = self.numeric.get(col)
+                    if numbers is not None:
+                        numbers.append(None)
+        elif tag == "data" and not self._in_result:
+            self._in_data = False
+
+    def data(self, text):
+        pass
+
+    def close(self):
+        return None
+
+    def to_dataframe(self) -> pd.DataFrame:
+        if self.n_rows == 0:
+            return pd.DataFrame()
+        return pd.DataFrame({
+            col: pd.Series(self.numeric[col] if col in self.numeric else values)
+            for col, values in self.raw.items()
+        })
+
+
 class SeibroClient:
     """
     SEIBRO API를 사용하여 미국 주식 국내 정산 데이터를 수집하는 클래스
@@ -67,11 +161,18 @@ class SeibroClient:
             self.mongo_client = MongoClient(self.mongo_uri)
             self.db = self.mongo_client['quant']
             self.collection = self.db["us_stock_settlement_in_korea"]
+            # 조회용 로컬 Parquet 캐시
+            self.cache = ParquetCache(self.collection, "us_stock_settlement_in_korea", "DATE")
         else:
             self.mongo_client = None
             self.db = None
             self.collection = None
+            self.cache = None
             logger.warning("MongoDB URI가 설정되지 않아 데이터베이스 저장 기능이 비활성화됩니다.")
+        
+        self.upsert_batch_size = 1000  # bulk upsert 배치 크기
+        self._index_ready = False
+        self._range_rows_dated = None  # 기간 응답 행에 날짜 필드가 있는지 (None: 아직 모름, False면 기간 요청 생략)
     
     def get_latest_date(self):
         """DB에서 가장 최근 날짜를 조회"""
@@ -97,70 +198,79 @@ class SeibroClient:
             logger.error(f"최신 날짜 조회 중 오류: {e}")
             return None
 
-    def _create_payload(self, date_str: str) -> str:
+    def _create_payload(self, date_str: str, end_date_str: Optional[str] = None,
+                        pg_start: int = 1, pg_end: int = 10) -> str:
         """
         API 요청용 XML 페이로드 생성
         
         Args:
-            date_str (str): 날짜 문자열 (YYYYMMDD 형식)
+            date_str (str): 시작 날짜 문자열 (YYYYMMDD 형식)
+            end_date_str (str, optional): 종료 날짜 문자열 (None이면 date_str과 같은 날)
+            pg_start (int): 조회 시작 행 번호
+            pg_end (int): 조회 끝 행 번호
             
         Returns:
             str: XML 페이로드
         """
+        end_date_str = end_date_str or date_str
         return f"""
         <reqParam action="getImptFrcurStkSetlAmtList" task="ksd.safe.bip.cnts.OvsSec.process.OvsSecIsinPTask">
             <MENU_NO value="921"/>
             <CMM_BTN_ABBR_NM value="total_search,openall,print,hwp,word,pdf,seach,xls,"/>
             <W2XPATH value="/IPORTAL/user/ovsSec/BIP_CNTS10013V.xml"/>
-            <PG_START value="1"/>
-            <PG_END value="10"/>
+            <PG_START value="{pg_start}"/>
+            <PG_END value="{pg_end}"/>
             <START_DT value="{date_str}"/>
-            <END_DT value="{date_str}"/>
+            <END_DT value="{end_date_str}"/>
             <S_TYPE value="2"/>
             <S_COUNTRY value="US"/>
             <D_TYPE value="4"/>
         </reqParam>
         """.strip()
     
-    def _parse_xml_response(self, xml_str: str, current_date: datetime) -> List[Dict]:
+    def _parse_xml_response(self, content: Union[bytes, Iterable[bytes]], current_date: datetime) -> Optional[pd.DataFrame]:
         """
-        XML 응답을 파싱하여 데이터 추출
+        XML 응답을 스트리밍으로 파싱하여 컬럼 배열에서 바로 DataFrame 생성
+        
+        ElementTree 트리를 만들지 않고 바이트 조각을 XMLParser에 순서대로 넣으면서
+        <data><result> 단위로 값을 컬럼별 리스트에 채웁니다. (_SettlementColumnTarget 참고)
         
         Args:
-            xml_str (str): XML 응답 문자열
+            content (Union[bytes, Iterable[bytes]]): XML 응답 바이트 또는 바이트 조각 이터러블
             current_date (datetime): 현재 처리 중인 날짜
             
         Returns:
-            List[Dict]: 파싱된 데이터 리스트
+            Optional[pd.DataFrame]: 파싱된 데이터 (DATE 컬럼 포함, 데이터가 없으면 빈 DataFrame,
+                                    XML이 깨져 파싱하지 못하면 None)
         """
-        rows = []
+        if isinstance(content, (bytes, bytearray)):
+            content = (content,)
         
+        target = _SettlementColumnTarget()
+        parser = ET.XMLParser(target=target)
         try:
-            root = ET.fromstring(xml_str)
+            for chunk in content:
+                parser.feed(chunk)
+                # 주말 등 데이터가 없는 경우 <vector ... result="0">로 응답이 옴
+                if target.empty_result:
+                    logger.info(f"{current_date.strftime('%Y-%m-%d')}: 데이터가 없습니다.")
+                    return pd.DataFrame()
+            parser.close()
         except ET.ParseError as e:
-            logger.error(f"XML 파싱 오류: {e}")
-            return rows
-        
-        # 주말 등 데이터가 없는 경우 <vector ... result="0">로 응답이 옴
-        if root.tag == "vector" and root.attrib.get("result") == "0":
-            logger.info(f"{current_date.strftime('%Y-%m-%d')}: 데이터가 없습니다.")
-            return rows
-        
-        for data in root.findall('.//data'):
-            result = data.find('result')
-            if result is not None:
-                row = {}
-                for child in result:
-                    row[child.tag] = child.attrib.get('value', '')
-                # 날짜 컬럼 추가
-                row['DATE'] = current_date
-                rows.append(row)
-        
-        return rows
+            # 빈 DataFrame과 구분해서 호출하는 쪽이 실패로 처리하고 다시 요청하도록 함
+            logger.error(f"{current_date.strftime('%Y-%m-%d')} XML 파싱 오류: {e}")
+            return None
+        
+        df = target.to_dataframe()
+        if df.empty:
+            return df
+        # 날짜 컬럼 추가
+        df['DATE'] = current_date
+        return df
     
     def _process_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        DataFrame 전처리 (컬럼 제거, 데이터 타입 변환)
+        DataFrame 전처리 (불필요한 컬럼 제거, 숫자 변환은 파싱 단계에서 처리됨)
         
         Args:
             df (pd.DataFrame): 원본 DataFrame
@@ -168,19 +278,7 @@ class SeibroClient:
         Returns:
             pd.DataFrame: 전처리된 DataFrame
         """
-        # 불필요한 컬럼 제거
-        df = df.drop(columns=['RNUM', 'NATION_NM'], errors='ignore')
-        
-        # 숫자 컬럼 변환
-        for col in df.columns:
-            if col == 'DATE':
-                continue
-            try:
-                df[col] = pd.to_numeric(df[col].str.replace(',', ''), errors='raise')
-            except Exception:
-                pass
-        
-        return df
+        return df.drop(columns=['RNUM', 'NATION_NM'], errors='ignore')
     
     def _check_existing_dates(self, date_list: List[datetime]) -> List[datetime]:
         """
@@ -229,15 +327,16 @@ class SeibroClient:
             logger.warning("DB 확인을 건너뛰고 모든 날짜를 수집합니다.")
             return date_list
 
-    def update_data(self, days_back: int = 10):
+    def _get_update_range(self, days_back: int = 10):
         """
-        최신 데이터 업데이트 (DB에 없는 날짜만 수집)
+        DB 최신 날짜를 기준으로 수집 기간 계산
         
         Args:
-            days_back: DB에 데이터가 없을 때 몇 일 전부터 수집할지 (기본값: 10일)
+            days_back: DB에 데이터가 없을 때 몇 일 전부터 수집할지
+            
+        Returns:
+            Optional[tuple]: (start_date, end_date), 수집할 데이터가 없으면 None
         """
-        logger.info("=== SEIBRO 미국 주식 정산 데이터 업데이트 시작 ===")
-        
         # DB에서 가장 최근 날짜 조회
         latest_date = self.get_latest_date()
         
@@ -255,14 +354,82 @@ class SeibroClient:
         # 수집할 데이터가 없으면 종료
         if start_date > end_date:
             logger.info("이미 최신 데이터입니다. 업데이트할 데이터가 없습니다.")
-            return
+            return None
         
         logger.info(f"데이터 수집 기간: {start_date} ~ {end_date}")
+        return start_date, end_date
+
+    def update_data(self, days_back: int = 10, mode: str = "stream"):
+        """
+        최신 데이터 업데이트 (DB에 없는 날짜만 수집)
+        
+        Args:
+            days_back: DB에 데이터가 없을 때 몇 일 전부터 수집할지 (기본값: 10일)
+            mode: 수집 방식 (기본값: "stream")
+                - "stream": 하루씩 순차 요청하면서 배치 단위로 바로 저장 (collect_settlement_data_streaming)
+                - "daily": 하루씩 순차 요청 후 마지막에 한 번에 저장 (collect_settlement_data)
+                - "parallel": 여러 날짜 동시 요청 + 체크포인트 (collect_settlement_data_parallel)
+                - "range": 거래일만 기간 단위로 요청 (collect_settlement_data_range)
+        """
+        collectors = {
+            "stream": self.collect_settlement_data_streaming,
+            "daily": self.collect_settlement_data,
+            "parallel": self.collect_settlement_data_parallel,
+            "range": self.collect_settlement_data_range,
+        }
+        if mode not in collectors:
+            raise ValueError(f"지원하지 않는 mode입니다: {mode}")
+        
+        logger.info("=== SEIBRO 미국 주식 정산 데이터 업데이트 시작 ===")
+        
+        date_range = self._get_update_range(days_back)
+        if date_range is None:
+            return
+        start_date, end_date = date_range
         
         # 데이터 수집
-        df = self.collect_settlement_data(
+        if mode == "stream":
+            summary = self.collect_settlement_data_streaming(
+                start_date=start_date,
+                end_date=end_date,
+                skip_existing=True
+            )
+            n_rows = summary["rows"]
+        else:
+            df = collectors[mode](
+                start_date=start_date,
+                end_date=end_date,
+                save_to_db=True,
+                skip_existing=True
+            )
+            n_rows = len(df)
+        
+        if n_rows:
+            logger.info(f"데이터 업데이트 완료: {n_rows}건")
+        else:
+            logger.info("수집된 새로운 데이터가 없습니다.")
+        
+        logger.info("=== SEIBRO 미국 주식 정산 데이터 업데이트 완료 ===")
+
+    async def update_data_async(self, engine, days_back: int = 10):
+        """
+        update_data의 비동기 버전
+        
+        Args:
+            engine (AsyncHttpEngine): 공유 비동기 HTTP 엔진
+            days_back: DB에 데이터가 없을 때 몇 일 전부터 수집할지 (기본값: 10일)
+        """
+        logger.info("=== SEIBRO 미국 주식 정산 데이터 업데이트 시작 ===")
+        
+        date_range = await asyncio.to_thread(self._get_update_range, days_back)
+        if date_range is None:
+            return
+        start_date, end_date = date_range
+        
+        df = await self.collect_settlement_data_async(
             start_date=start_date,
             end_date=end_date,
+            engine=engine,
             save_to_db=True,
             skip_existing=True
         )
@@ -274,23 +441,19 @@ class SeibroClient:
         
         logger.info("=== SEIBRO 미국 주식 정산 데이터 업데이트 완료 ===")
 
-    def collect_settlement_data(self, start_date: Union[str, datetime], 
-                               end_date: Union[str, datetime],
-                               save_to_db: bool = True,
-                               sleep_range: tuple = (2.5, 10),
-                               skip_existing: bool = True) -> pd.DataFrame:
+    def _prepare_date_list(self, start_date: Union[str, datetime],
+                           end_date: Union[str, datetime],
+                           skip_existing: bool) -> List[datetime]:
         """
-        미국 주식 국내 정산 데이터 수집
+        수집 대상 날짜 리스트 생성 (skip_existing이면 DB에 있는 날짜 제외)
         
         Args:
             start_date (Union[str, datetime]): 시작 날짜
             end_date (Union[str, datetime]): 종료 날짜
-            save_to_db (bool): MongoDB에 저장할지 여부
-            sleep_range (tuple): 요청 간 대기 시간 범위 (초)
             skip_existing (bool): DB에 이미 존재하는 날짜를 건너뛸지 여부
             
         Returns:
-            pd.DataFrame: 수집된 데이터
+            List[datetime]: 수집할 날짜 리스트
         """
         # 날짜 변환
         if isinstance(start_date, str):
@@ -306,9 +469,139 @@ class SeibroClient:
             date_list = self._check_existing_dates(date_list)
             if not date_list:
                 logger.info("모든 날짜의 데이터가 이미 DB에 존재합니다.")
-                return pd.DataFrame()
         
-        all_rows = []
+        return date_list
+
+    def _finalize_frames(self, frames: List[pd.DataFrame], save_to_db: bool) -> pd.DataFrame:
+        """
+        날짜별로 파싱한 DataFrame을 합쳐 전처리하고 필요하면 MongoDB에 저장
+        
+        Args:
+            frames (List[pd.DataFrame]): 파싱된 DataFrame 리스트
+            save_to_db (bool): MongoDB에 저장할지 여부
+            
+        Returns:
+            pd.DataFrame: 전처리된 데이터
+        """
+        # DataFrame 생성 및 전처리
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            logger.warning("수집된 데이터가 없습니다.")
+            return pd.DataFrame()
+        
+        df = pd.concat(frames, ignore_index=True)
+        df = self._process_dataframe(df)
+        
+        logger.info(f"총 {len(df)}개 데이터 수집 완료")
+        
+        # MongoDB에 저장
+        if save_to_db:
+            self._save_dataframe(df)
+        
+        return df
+
+    def _ensure_index(self):
+        """(DATE, ISIN) 유니크 복합 인덱스가 있는지 확인하고 없으면 생성"""
+        if self._index_ready:
+            return
+        try:
+            self.collection.create_index(
+                [("DATE", ASCENDING), ("ISIN", ASCENDING)],
+                unique=True,
+                name="DATE_1_ISIN_1"
+            )
+        except Exception as e:
+            # 예전 insert_many로 쌓인 중복 데이터가 있으면 유니크 인덱스 생성이 실패할 수 있음
+            logger.warning(f"유니크 인덱스 생성 실패 (중복 데이터 확인 필요): {e}")
+        self._index_ready = True
+
+    def _upsert_dataframe(self, df: pd.DataFrame) -> tuple:
+        """
+        (DATE, ISIN) 기준으로 bulk upsert (같은 데이터를 다시 저장해도 중복되지 않음)
+        
+        Returns:
+            tuple: (새로 추가된 건수, 업데이트된 건수)
+        """
+        self._ensure_index()
+        operations = [
+            UpdateOne(
+                {"DATE": record["DATE"], "ISIN": record["ISIN"]},
+                {"$set": record},
+                upsert=True
+            )
+            for record in df.to_dict(orient='records')
+        ]
+        
+        inserted_count = 0
+        updated_count = 0
+        for i in range(0, len(operations), self.upsert_batch_size):
+            result = self.collection.bulk_write(operations[i:i + self.upsert_batch_size], ordered=False)
+            inserted_count += result.upserted_count
+            updated_count += result.modified_count
+        return inserted_count, updated_count
+
+    def _save_dataframe(self, df: pd.DataFrame) -> bool:
+        """
+        전처리된 DataFrame을 MongoDB에 저장 ((DATE, ISIN) 기준 upsert)
+        
+        Args:
+            df (pd.DataFrame): 저장할 데이터
+            
+        Returns:
+            bool: 저장 성공 여부 (MongoDB 미설정 시 False)
+        """
+        if self.collection is None:
+            logger.warning("MongoDB가 설정되지 않아 저장을 건너뜁니다.")
+            return False
+        
+        try:
+            inserted_count, updated_count = self._upsert_dataframe(df)
+            logger.info(f"MongoDB 저장 완료: 새로 추가 {inserted_count}건, 업데이트 {updated_count}건")
+            return True
+        except Exception as e:
+            logger.error(f"MongoDB 저장 오류: {e}")
+            return False
+
+    def _post_and_parse(self, session: requests.Session, payload: str, current_date: datetime) -> Optional[pd.DataFrame]:
+        """
+        요청을 보내고 응답 본문을 조각 단위로 받아 바로 파싱 (XML 파싱 실패 시 None)
+        
+        Raises:
+            requests.RequestException: 요청 실패 시
+        """
+        with session.post(
+            self.base_url,
+            headers=self.headers,
+            data=payload.encode('utf-8'),
+            timeout=30,
+            stream=True
+        ) as req:
+            req.raise_for_status()
+            return self._parse_xml_response(req.iter_content(chunk_size=64 * 1024), current_date)
+
+    def collect_settlement_data(self, start_date: Union[str, datetime], 
+                               end_date: Union[str, datetime],
+                               save_to_db: bool = True,
+                               sleep_range: tuple = (2.5, 10),
+                               skip_existing: bool = True) -> pd.DataFrame:
+        """
+        미국 주식 국내 정산 데이터 수집
+        
+        Args:
+            start_date (Union[str, datetime]): 시작 날짜
+            end_date (Union[str, datetime]): 종료 날짜
+            save_to_db (bool): MongoDB에 저장할지 여부
+            sleep_range (tuple): 요청 간 대기 시간 범위 (초)
+            skip_existing (bool): DB에 이미 존재하는 날짜를 건너뛸지 여부
+            
+        Returns:
+            pd.DataFrame: 수집된 데이터
+        """
+        date_list = self._prepare_date_list(start_date, end_date, skip_existing)
+        if not date_list:
+            return pd.DataFrame()
+        
+        frames = []
         
         try:
             for current_date in tqdm(date_list, desc="날짜별 데이터 수집 진행중"):
@@ -316,19 +609,12 @@ class SeibroClient:
                 payload = self._create_payload(date_str)
                 
                 try:
-                    req = self.session.post(
-                        self.base_url, 
-                        headers=self.headers, 
-                        data=payload.encode('utf-8'),
-                        timeout=30
-                    )
-                    req.raise_for_status()
+                    df = self._post_and_parse(self.session, payload, current_date)
+                    if df is None:
+                        continue
+                    frames.append(df)
                     
-                    xml_str = req.content.decode('utf-8')
-                    rows = self._parse_xml_response(xml_str, current_date)
-                    all_rows.extend(rows)
-                    
-                    logger.info(f"{date_str}: {len(rows)}개 데이터 수집 완료")
+                    logger.info(f"{date_str}: {len(df)}개 데이터 수집 완료")
                     
                 except requests.RequestException as e:
                     logger.error(f"{date_str} 요청 오류: {e}")
@@ -340,30 +626,528 @@ class SeibroClient:
         except KeyboardInterrupt:
             logger.info("사용자에 의해 중단되었습니다.")
         
-        # DataFrame 생성 및 전처리
-        if not all_rows:
-            logger.warning("수집된 데이터가 없습니다.")
+        return self._finalize_frames(frames, save_to_db)
+
+    def collect_settlement_data_streaming(self, start_date: Union[str, datetime],
+                                          end_date: Union[str, datetime],
+                                          sleep_range: tuple = (2.5, 10),
+                                          skip_existing: bool = True,
+                                          flush_rows: int = 5000,
+                                          flush_interval: float = 30.0,
+                                          queue_size: int = 8) -> Dict:
+        """
+        수집과 저장을 동시에 진행하는 정산 데이터 수집 (전체 기간을 메모리에 모으지 않음)
+        
+        메인 스레드가 날짜별로 요청/파싱한 DataFrame을 크기가 제한된 큐에 넣고,
+        저장 스레드가 큐에서 꺼내 flush_rows행이 모이거나 flush_interval초가 지나면
+        (DATE, ISIN) 기준 bulk upsert로 저장합니다. 중단되더라도 이미 받은 날짜는 저장됩니다.
+        
+        Args:
+            start_date (Union[str, datetime]): 시작 날짜
+            end_date (Union[str, datetime]): 종료 날짜
+            sleep_range (tuple): 요청 간 대기 시간 범위 (초)
+            skip_existing (bool): DB에 이미 존재하는 날짜를 건너뛸지 여부
+            flush_rows (int): 한 번에 저장할 최소 행 수
+            flush_interval (float): 이 시간(초)이 지나면 flush_rows보다 적어도 저장
+            queue_size (int): 저장 대기 중인 날짜 수 상한 (가득 차면 수집이 잠시 멈춤)
+            
+        Returns:
+            Dict: days(수집한 날짜 수), rows, inserted, updated, failed_dates
+            
+        Raises:
+            RuntimeError: 저장 스레드가 비정상 종료된 경우 (큐가 가득 찬 채로 멈추지 않도록)
+        """
+        summary = {"days": 0, "rows": 0, "inserted": 0, "updated": 0, "failed_dates": []}
+        
+        if self.collection is None:
+            logger.warning("MongoDB가 설정되지 않아 스트리밍 저장을 할 수 없습니다.")
+            return summary
+        
+        date_list = self._prepare_date_list(start_date, end_date, skip_existing)
+        if not date_list:
+            return summary
+        
+        frames_queue = queue.Queue(maxsize=queue_size)
+        done = object()
+        
+        def writer():
+            batch = []
+            batch_rows = 0
+            last_flush = time.monotonic()
+            
+            def flush():
+                nonlocal batch, batch_rows, last_flush
+                if batch:
+                    # 전처리/저장 중 어떤 예외가 나도 저장 스레드는 계속 큐를 비워야 수집 스레드가 멈추지 않음
+                    try:
+                        df = self._process_dataframe(pd.concat(batch, ignore_index=True))
+                        inserted_count, updated_count = self._upsert_dataframe(df)
+                        summary["inserted"] += inserted_count
+                        summary["updated"] += updated_count
+                        logger.info(f"MongoDB 저장 완료: 새로 추가 {inserted_count}건, 업데이트 {updated_count}건")
+                    except Exception as e:
+                        logger.error(f"MongoDB 저장 오류: {e}")
+                        summary["failed_dates"].extend(sorted({frame["DATE"].iloc[0] for frame in batch}))
+                batch, batch_rows = [], 0
+                last_flush = time.monotonic()
+            
+            while True:
+                try:
+                    item = frames_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if time.monotonic() - last_flush >= flush_interval:
+                        flush()
+                    continue
+                if item is done:
+                    flush()
+                    return
+                batch.append(item)
+                batch_rows += len(item)
+                if batch_rows >= flush_rows or time.monotonic() - last_flush >= flush_interval:
+                    flush()
+        
+        writer_thread = threading.Thread(target=writer, name="seibro-writer", daemon=True)
+        writer_thread.start()
+        
+        def put(item):
+            """저장 스레드가 살아 있는 동안만 큐에 넣음 (저장 스레드가 죽었으면 멈추지 않고 RuntimeError)"""
+            while True:
+                if not writer_thread.is_alive():
+                    raise RuntimeError("저장 스레드가 비정상 종료되어 수집을 중단합니다.")
+                try:
+                    frames_queue.put(item, timeout=1.0)
+                    return
+                except queue.Full:
+                    continue
+        
+        try:
+            for current_date in tqdm(date_list, desc="날짜별 데이터 수집 진행중"):
+                date_str = current_date.strftime("%Y%m%d")
+                try:
+                    df = self._post_and_parse(self.session, self._create_payload(date_str), current_date)
+                    if df is None:
+                        summary["failed_dates"].append(current_date)
+                    else:
+                        summary["days"] += 1
+                        if not df.empty:
+                            put(df)
+                            summary["rows"] += len(df)
+                        logger.info(f"{date_str}: {len(df)}개 데이터 수집 완료")
+                except requests.RequestException as e:
+                    logger.error(f"{date_str} 요청 오류: {e}")
+                    summary["failed_dates"].append(current_date)
+                
+                # 랜덤 슬립
+                time.sleep(random.uniform(*sleep_range))
+        except KeyboardInterrupt:
+            logger.info("사용자에 의해 중단되었습니다. 이미 받은 데이터를 저장합니다.")
+        finally:
+            try:
+                put(done)
+            except RuntimeError:
+                pass
+            writer_thread.join()
+        
+        logger.info(
+            f"총 {summary['rows']}개 데이터 수집 / 새로 추가 {summary['inserted']}건, "
+            f"업데이트 {summary['updated']}건"
+        )
+        return summary
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: Optional[str], scope: List[str]) -> set:
+        """
+        체크포인트 파일에서 수집 완료된 날짜(YYYYMMDD) 집합을 읽음
+        
+        같은 요청 기간(scope)으로 기록된 체크포인트만 사용합니다. 기간이 다른 예전 체크포인트가
+        나중의 재수집(backfill)에서 날짜를 건너뛰게 만들지 않도록 하기 위함입니다.
+        
+        Args:
+            checkpoint_path (str, optional): 체크포인트 파일 경로
+            scope (List[str]): 요청 기간 [시작일, 종료일] (YYYYMMDD)
+        """
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return set()
+        try:
+            with open(checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"체크포인트 파일을 읽지 못했습니다 ({checkpoint_path}): {e}")
+            return set()
+        if checkpoint.get("scope") != scope:
+            logger.info(f"요청 기간이 달라 기존 체크포인트를 사용하지 않습니다 ({checkpoint.get('scope')} → {scope})")
+            return set()
+        start, end = scope
+        return {d for d in checkpoint.get("completed_dates", []) if start <= d <= end}
+
+    @staticmethod
+    def _save_checkpoint(checkpoint_path: Optional[str], completed_dates: set, scope: List[str]):
+        """수집 완료된 날짜 집합을 요청 기간과 함께 체크포인트 파일에 기록 (임시 파일에 쓴 뒤 교체)"""
+        if not checkpoint_path:
+            return
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"scope": scope, "completed_dates": sorted(completed_dates)}, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def _fetch_day_paced(self, current_date: datetime, pacer: AdaptivePacer,
+                         session: requests.Session) -> Optional[pd.DataFrame]:
+        """
+        pacer 간격에 맞춰 하루치 데이터를 요청하고 응답 결과를 pacer에 반영
+        
+        Returns:
+            Optional[pd.DataFrame]: 파싱된 데이터, 요청 실패 또는 XML 파싱 실패 시 None
+        """
+        date_str = current_date.strftime("%Y%m%d")
+        pacer.wait()
+        started = time.monotonic()
+        try:
+            df = self._post_and_parse(session, self._create_payload(date_str), current_date)
+        except requests.RequestException as e:
+            pacer.record(success=False)
+            logger.error(f"{date_str} 요청 오류: {e} (다음 요청 간격 {pacer.delay:.1f}초)")
+            return None
+        
+        # 깨진 응답도 서버가 요청을 제대로 처리하지 못한 것으로 보고 간격을 늘림
+        pacer.record(success=df is not None, elapsed=time.monotonic() - started)
+        return df
+
+    def collect_settlement_data_parallel(self, start_date: Union[str, datetime],
+                                         end_date: Union[str, datetime],
+                                         save_to_db: bool = True,
+                                         max_in_flight: int = 3,
+                                         skip_existing: bool = True,
+                                         checkpoint_path: Optional[str] = ".seibro_checkpoint.json",
+                                         pacer: Optional[AdaptivePacer] = None) -> pd.DataFrame:
+        """
+        여러 날짜를 동시에 요청하는 정산 데이터 수집 (적응형 요청 간격 + 체크포인트)
+        
+        - 최대 max_in_flight개의 날짜를 동시에 요청
+        - 응답이 빠르고 성공적이면 요청 간격을 줄이고, 오류/느린 응답이면 지수적으로 늘림
+        - 날짜별로 수집이 끝나는 즉시 DB에 저장하고 체크포인트에 기록하므로
+          Ctrl-C나 프로세스 종료 후 같은 기간으로 다시 실행하면 남은 날짜부터 이어서 수집
+        - 체크포인트에는 데이터를 DB에 저장한 날짜와 휴장일(주말 포함)로 확인된 빈 날짜만 기록하고,
+          거래일인데 데이터가 비어 있거나 응답을 파싱하지 못한 날짜, 오늘 날짜는 다음 실행에서 다시 요청
+        
+        Args:
+            start_date (Union[str, datetime]): 시작 날짜
+            end_date (Union[str, datetime]): 종료 날짜
+            save_to_db (bool): MongoDB에 저장할지 여부 (False면 체크포인트도 사용하지 않음)
+            max_in_flight (int): 동시에 요청할 최대 날짜 수
+            skip_existing (bool): DB에 이미 존재하는 날짜를 건너뛸지 여부
+            checkpoint_path (str, optional): 체크포인트 파일 경로 (None이면 사용 안 함)
+            pacer (AdaptivePacer, optional): 요청 간격 조절기 (None이면 기본값으로 생성)
+            
+        Returns:
+            pd.DataFrame: 이번 실행에서 수집된 데이터
+        """
+        if not save_to_db:
+            checkpoint_path = None
+        
+        scope = [pd.Timestamp(start_date).strftime("%Y%m%d"), pd.Timestamp(end_date).strftime("%Y%m%d")]
+        date_list = self._prepare_date_list(start_date, end_date, skip_existing)
+        completed = self._load_checkpoint(checkpoint_path, scope)
+        if completed:
+            before = len(date_list)
+            date_list = [d for d in date_list if d.strftime("%Y%m%d") not in completed]
+            logger.info(f"체크포인트에서 {before - len(date_list)}개 날짜를 건너뜁니다.")
+        if not date_list:
             return pd.DataFrame()
         
-        df = pd.DataFrame(all_rows)
-        df = self._process_dataframe(df)
+        pacer = pacer or AdaptivePacer()
+        trading_days = set(self._filter_trading_days(date_list))
+        today_str = date.today().strftime("%Y%m%d")
+        local = threading.local()
+        sessions = []
+        sessions_lock = threading.Lock()
         
+        def worker(current_date):
+            # 스레드마다 Session을 따로 두어 keep-alive 연결 재사용
+            session = getattr(local, "session", None)
+            if session is None:
+                session = requests.Session()
+                local.session = session
+                with sessions_lock:
+                    sessions.append(session)
+            return self._fetch_day_paced(current_date, pacer, session)
+        
+        frames = []
+        executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        try:
+            futures = {executor.submit(worker, d): d for d in date_list}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="날짜별 데이터 수집 진행중"):
+                current_date = futures[future]
+                date_str = current_date.strftime("%Y%m%d")
+                df = future.result()
+                if df is None:
+                    # 실패한 날짜는 체크포인트에 남기지 않아 다음 실행에서 재시도
+                    continue
+                
+                if not df.empty:
+                    df = self._process_dataframe(df)
+                    if save_to_db and not self._save_dataframe(df):
+                        continue
+                    frames.append(df)
+                
+                logger.info(f"{date_str}: {len(df)}개 데이터 수집 완료")
+                # 오늘은 아직 데이터가 다 올라오지 않았을 수 있고, 거래일인데 빈 응답이면
+                # 일시적인 오류일 수 있으므로 체크포인트에 남기지 않음
+                if date_str >= today_str or (df.empty and current_date in trading_days):
+                    continue
+                completed.add(date_str)
+                self._save_checkpoint(checkpoint_path, completed, scope)
+        except KeyboardInterrupt:
+            logger.info("사용자에 의해 중단되었습니다. 완료된 날짜까지는 저장되었습니다.")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            for session in sessions:
+                session.close()
+        
+        if not frames:
+            logger.warning("수집된 데이터가 없습니다.")
+            return pd.DataFrame()
+        
+        df = pd.concat(frames, ignore_index=True)
         logger.info(f"총 {len(df)}개 데이터 수집 완료")
+        return df
+
+    @staticmethod
+    def _filter_trading_days(date_list: List[datetime],
+                             calendars: tuple = ("KR", "US")) -> List[datetime]:
+        """
+        주말과 휴장일을 제외한 날짜만 반환
         
-        # MongoDB에 저장
-        if save_to_db and self.collection is not None:
+        Args:
+            date_list (List[datetime]): 날짜 리스트
+            calendars (tuple): 휴장일로 볼 시장 ("KR": 한국거래소, "US": NYSE)
+                한 시장이라도 쉬는 날은 결제 데이터가 없으므로 제외
+            
+        Returns:
+            List[datetime]: 거래일 리스트
+        """
+        weekdays = [d for d in date_list if d.weekday() < 5]
+        if holidays is None or not weekdays:
+            if holidays is None and calendars:
+                logger.warning("holidays 패키지가 없어 주말만 제외합니다. (pip install holidays)")
+            return weekdays
+        
+        years = sorted({d.year for d in weekdays})
+        closed = set()
+        if "KR" in calendars:
+            closed.update(holidays.country_holidays("KR", years=years).keys())
+            # 한국거래소는 연말(12/31) 휴장
+            closed.update(date(year, 12, 31) for year in years)
+        if "US" in calendars:
+            closed.update(holidays.financial_holidays("NYSE", years=years).keys())
+        
+        return [d for d in weekdays if d.date() not in closed]
+
+    @staticmethod
+    def _group_windows(date_list: List[datetime], window_days: int) -> List[List[datetime]]:
+        """정렬된 날짜 리스트를 달력 기준 window_days일 이내 묶음으로 나눔"""
+        windows = []
+        for d in sorted(date_list):
+            if windows and (d - windows[-1][0]).days < window_days:
+                windows[-1].append(d)
+            else:
+                windows.append([d])
+        return windows
+
+    @staticmethod
+    def _parse_row_dates(values: pd.Series) -> pd.Series:
+        """YYYYMMDD / YYYY.MM.DD / YYYY-MM-DD 형태의 값을 날짜로 변환 (해석 불가 시 NaT)"""
+        return pd.to_datetime(
+            values.astype(str).str.replace(r'[./-]', '', regex=True),
+            format="%Y%m%d", errors='coerce'
+        )
+
+    @classmethod
+    def _detect_row_date_field(cls, df: pd.DataFrame, window: List[datetime]) -> Optional[str]:
+        """
+        응답 행에서 날짜를 나타내는 필드를 찾음
+        
+        모든 행의 값이 날짜로 해석되고 요청 구간 안에 들어가는 필드만 인정합니다.
+        
+        Returns:
+            Optional[str]: 날짜 필드 이름 (없으면 None)
+        """
+        if df.empty:
+            return None
+        start, end = min(window), max(window)
+        for key in df.columns:
+            if key == 'DATE':
+                continue
+            values = cls._parse_row_dates(df[key])
+            if values.notna().all() and values.between(start, end).all():
+                return key
+        return None
+
+    def _fetch_pages(self, start_dt: datetime, end_dt: datetime, page_size: int,
+                     sleep_range: tuple) -> pd.DataFrame:
+        """
+        하나의 기간 요청에 대해 결과가 끝날 때까지 페이지를 넘기며 수집
+        
+        Raises:
+            requests.RequestException: 요청 실패 또는 응답 XML 파싱 실패 시
+        """
+        start_str, end_str = start_dt.strftime("%Y%m%d"), end_dt.strftime("%Y%m%d")
+        pages = []
+        pg_start = 1
+        while True:
+            payload = self._create_payload(start_str, end_str, pg_start, pg_start + page_size - 1)
+            page = self._post_and_parse(self.session, payload, start_dt)
+            if page is None:
+                raise requests.RequestException(f"{start_str}~{end_str} 응답을 XML로 파싱하지 못했습니다.")
+            pages.append(page)
+            
+            if len(page) < page_size:
+                pages = [page for page in pages if not page.empty]
+                return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+            pg_start += page_size
+            time.sleep(random.uniform(*sleep_range))
+
+    def _fetch_days(self, days: List[datetime], sleep_range: tuple) -> pd.DataFrame:
+        """
+        하루 단위로 요청 (collect_settlement_data와 같은 PG 1~10 요청)
+        
+        요청이 실패한 날짜는 로그만 남기고 건너뛰므로 앞서 받은 날짜는 그대로 유지됩니다.
+        """
+        frames = []
+        for i, current_date in enumerate(days):
+            if i:
+                time.sleep(random.uniform(*sleep_range))
+            date_str = current_date.strftime("%Y%m%d")
             try:
-                records = df.to_dict(orient='records')
-                self.collection.insert_many(records)
-                logger.info(f"MongoDB에 {len(records)}개 데이터 저장 완료")
+                df = self._post_and_parse(self.session, self._create_payload(date_str), current_date)
+            except requests.RequestException as e:
+                logger.error(f"{date_str} 요청 오류: {e}")
+                continue
+            if df is not None and not df.empty:
+                frames.append(df)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def collect_settlement_data_range(self, start_date: Union[str, datetime],
+                                      end_date: Union[str, datetime],
+                                      save_to_db: bool = True,
+                                      window_days: int = 7,
+                                      page_size: int = 10,
+                                      sleep_range: tuple = (2.5, 10),
+                                      skip_existing: bool = True,
+                                      calendars: tuple = ("KR", "US")) -> pd.DataFrame:
+        """
+        여러 거래일을 한 번에 요청하는 정산 데이터 수집 (기간 요청 + 페이지 순회)
+        
+        - 주말/휴장일(calendars 기준)은 요청하지 않음
+        - 거래일을 window_days일 단위 구간으로 묶어 START_DT~END_DT 기간으로 요청하고,
+          결과가 끝날 때까지 PG_START/PG_END를 넘기며 수집
+        - 응답 행에 날짜 필드가 없어 날짜별로 나눌 수 없으면 하루 단위 요청(daily 모드와 같은 PG 1~10)으로 대체하고,
+          이후 구간은 기간 요청 없이 바로 하루 단위로 요청 (한 번 확인한 결과는 인스턴스에 기억)
+        
+        Args:
+            start_date (Union[str, datetime]): 시작 날짜
+            end_date (Union[str, datetime]): 종료 날짜
+            save_to_db (bool): MongoDB에 저장할지 여부
+            window_days (int): 한 번에 요청할 기간 (달력 기준 일수)
+            page_size (int): 페이지당 행 수
+            sleep_range (tuple): 요청 간 대기 시간 범위 (초)
+            skip_existing (bool): DB에 이미 존재하는 날짜를 건너뛸지 여부
+            calendars (tuple): 휴장일로 볼 시장 ("KR", "US")
+            
+        Returns:
+            pd.DataFrame: 수집된 데이터
+        """
+        date_list = self._prepare_date_list(start_date, end_date, skip_existing)
+        trading_days = self._filter_trading_days(date_list, calendars)
+        logger.info(f"휴장일 제외: {len(date_list)}일 중 {len(trading_days)}일 요청")
+        if not trading_days:
+            return pd.DataFrame()
+        
+        frames = []
+        
+        try:
+            for window in tqdm(self._group_windows(trading_days, window_days), desc="기간별 데이터 수집 진행중"):
+                label = f"{window[0].strftime('%Y%m%d')}~{window[-1].strftime('%Y%m%d')}"
+                try:
+                    if self._range_rows_dated is False:
+                        df = self._fetch_days(window, sleep_range)
+                    else:
+                        df = self._fetch_pages(window[0], window[-1], page_size, sleep_range)
+                        if len(window) > 1 and not df.empty:
+                            date_field = self._detect_row_date_field(df, window)
+                            self._range_rows_dated = date_field is not None
+                            if date_field is None:
+                                logger.warning(f"{label}: 응답에 행별 날짜가 없어 하루 단위로 다시 요청합니다. "
+                                               f"(이후 구간도 하루 단위로 요청)")
+                                time.sleep(random.uniform(*sleep_range))
+                                df = self._fetch_days(window, sleep_range)
+                            else:
+                                df['DATE'] = self._parse_row_dates(df[date_field])
+                    
+                    if not df.empty:
+                        df = df[df['DATE'].isin(window)]
+                        frames.append(df)
+                    logger.info(f"{label}: {len(df)}개 데이터 수집 완료")
+                    
+                except requests.RequestException as e:
+                    logger.error(f"{label} 요청 오류: {e}")
+                    continue
+                
+                # 랜덤 슬립
+                time.sleep(random.uniform(*sleep_range))
+        
+        except KeyboardInterrupt:
+            logger.info("사용자에 의해 중단되었습니다.")
+        
+        return self._finalize_frames(frames, save_to_db)
+
+    async def collect_settlement_data_async(self, start_date: Union[str, datetime],
+                                            end_date: Union[str, datetime],
+                                            engine,
+                                            save_to_db: bool = True,
+                                            skip_existing: bool = True) -> pd.DataFrame:
+        """
+        collect_settlement_data의 비동기 버전
+        
+        요청 간격은 랜덤 슬립 대신 engine의 seibro.or.kr 호스트 동시성/속도 제한으로 조절합니다.
+        
+        Args:
+            start_date (Union[str, datetime]): 시작 날짜
+            end_date (Union[str, datetime]): 종료 날짜
+            engine (AsyncHttpEngine): 공유 비동기 HTTP 엔진
+            save_to_db (bool): MongoDB에 저장할지 여부
+            skip_existing (bool): DB에 이미 존재하는 날짜를 건너뛸지 여부
+            
+        Returns:
+            pd.DataFrame: 수집된 데이터
+        """
+        date_list = await asyncio.to_thread(self._prepare_date_list, start_date, end_date, skip_existing)
+        if not date_list:
+            return pd.DataFrame()
+        
+        async def fetch_day(current_date):
+            date_str = current_date.strftime("%Y%m%d")
+            try:
+                resp = await engine.post(
+                    self.base_url,
+                    headers=self.headers,
+                    data=self._create_payload(date_str).encode('utf-8')
+                )
+                resp.raise_for_status()
+                df = self._parse_xml_response(resp.content, current_date)
+                if df is None:
+                    return pd.DataFrame()
+                logger.info(f"{date_str}: {len(df)}개 데이터 수집 완료")
+                return df
             except Exception as e:
-                logger.error(f"MongoDB 저장 오류: {e}")
-        elif save_to_db and self.collection is None:
-            logger.warning("MongoDB가 설정되지 않아 저장을 건너뜁니다.")
+                logger.error(f"{date_str} 요청 오류: {e}")
+                return pd.DataFrame()
         
-        return df
+        frames = await asyncio.gather(*(fetch_day(d) for d in date_list))
+        
+        return await asyncio.to_thread(self._finalize_frames, list(frames), save_to_db)
     
-    def get_data(self, start_date=None, end_date=None, limit=None):
+    def get_data(self, start_date=None, end_date=None, limit=None, use_cache: bool = False,
+                 columns: Optional[List[str]] = None):
         """
         DB에서 데이터 조회
         
@@ -371,6 +1155,8 @@ class SeibroClient:
             start_date (str): 시작 날짜 (YYYY-MM-DD 형식)
             end_date (str): 종료 날짜 (YYYY-MM-DD 형식)
             limit (int): 조회할 최대 레코드 수
+            use_cache (bool): True면 로컬 Parquet 캐시를 새 데이터만 갱신한 뒤 캐시에서 읽음
+            columns (List[str], optional): 가져올 컬럼 (None이면 전체)
             
         Returns:
             pd.DataFrame: 조회된 데이터
@@ -380,6 +1166,14 @@ class SeibroClient:
             return pd.DataFrame()
             
         try:
+            if use_cache:
+                self.cache.refresh()
+                df = self.cache.read(start_date, end_date, columns=columns)
+                if limit:
+                    df = df.head(limit)
+                logger.info(f"데이터 조회 완료 (캐시): {len(df)}개 레코드")
+                return df
+            
             query = {}
             if start_date:
                 query["DATE"] = {"$gte": pd.to_datetime(start_date)}
@@ -388,16 +1182,9 @@ class SeibroClient:
             elif end_date:
                 query["DATE"] = {"$lte": pd.to_datetime(end_date)}
             
-            cursor = self.collection.find(query).sort("DATE", 1)
-            if limit:
-                cursor = cursor.limit(limit)
-            
-            data = list(cursor)
-            if data:
-                df = pd.DataFrame(data)
-                # MongoDB의 _id 컬럼 제거
-                if '_id' in df.columns:
-                    df = df.drop('_id', axis=1)
+            # MongoDB의 _id 컬럼은 projection으로 제외
+            df = find_dataframe(self.collection, query, columns=columns, sort=[("DATE", 1)], limit=limit)
+            if not df.empty:
                 logger.info(f"데이터 조회 완료: {len(df)}개 레코드")
                 return df
             else:
@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class NetBuySignalEngine:
+    """
+    SEIBRO 결제 데이터(SeibroClient.get_data 결과)의 rolling 윈도우 순매수 시그널 엔진
+
+    종목별로 윈도우 안에서 순매수가 있었던 날 수를 rolling으로 세어 두고 시그널을 계산합니다.
+    - "only": 오늘 순매수 금액이 0이 아니고, 윈도우의 나머지 날은 모두 0 또는 데이터 없음
+      (기존 노트북의 `date_df.iloc[-1] / date_df.sum() == 1` 조건)
+    - "first": 오늘 순매수(> 0)이고, 윈도우 안에서 순매수(> 0)한 날이 오늘뿐
+
+    fit()은 전체 기간을 누적합으로 한 번에 계산하고, 이후 append()는 링 버퍼로
+    하루치만 갱신합니다 (날짜당 O(종목 수)).
+    시그널은 윈도우가 다 찬 날(window번째 날)부터 계산하며, 날짜 t의 시그널은 t까지의 데이터만 사용합니다.
+    """
+
+    KINDS = ("only", "first")
+
+    def __init__(self, window: int = 100, value_col: str = "SUM_FRSEC_NET_BUY_AMT", key_col: str = "ISIN"):
+        """
+        Args:
+            window (int): 윈도우 크기 (거래일)
+            value_col (str): 순매수 금액 컬럼
+            key_col (str): 종목 구분 컬럼 (ISIN, KOR_SECN_NM 등)
+        """
+        self.window = window
+        self.value_col = value_col
+        self.key_col = key_col
+        self._reset()
+
+    def _reset(self):
+        self.keys: List[str] = []
+        self._key_pos: Dict[str, int] = {}
+        self.dates: List[pd.Timestamp] = []
+        # 링 버퍼: 최근 window일의 (0이 아닌 날, 순매수한 날) 표시, 종목별 윈도우 합계
+        self._buffer = np.zeros((self.window, 0, 2), dtype=np.int8)
+        self._counts = np.zeros((0, 2), dtype=np.int32)
+        self._flag_rows: Dict[str, List[np.ndarray]] = {kind: [] for kind in self.KINDS}
+
+    def _add_keys(self, keys) -> np.ndarray:
+        """새 종목을 버퍼에 추가하고 keys의 컬럼 위치를 반환"""
+        new_keys = [key for key in dict.fromkeys(keys) if key not in self._key_pos]
+        if new_keys:
+            for key in new_keys:
+                self._key_pos[key] = len(self.keys)
+                self.keys.append(key)
+            pad = len(new_keys)
+            self._buffer = np.pad(self._buffer, ((0, 0), (0, pad), (0, 0)))
+            self._counts = np.pad(self._counts, ((0, pad), (0, 0)))
+        return np.array([self._key_pos[key] for key in keys], dtype=np.intp)
+
+    @staticmethod
+    def _indicators(values: np.ndarray) -> np.ndarray:
+        """순매수 금액 -> (0이 아닌 날, 순매수한 날) 표시 (NaN은 둘 다 0)"""
+        with np.errstate(invalid="ignore"):
+            return np.stack([(values != 0) & ~np.isnan(values), values > 0], axis=-1).astype(np.int8)
+
+    def fit(self, data: pd.DataFrame) -> "NetBuySignalEngine":
+        """
+        전체 기간 데이터로 시그널을 한 번에 계산하고 append용 상태를 만듭니다.
+
+        Args:
+            data (pd.DataFrame): DATE, key_col, value_col 컬럼을 포함한 long 형식 데이터
+
+        Returns:
+            NetBuySignalEngine: self
+        """
+        self._reset()
+        if data.empty:
+            return self
+
+        pivot = data.pivot_table(index="DATE", columns=self.key_col, values=self.value_col, aggfunc="last")
+        pivot = pivot.sort_index()
+        values = pivot.to_numpy(dtype=float)
+        n_days = len(pivot)
+
+        self._add_keys(list(pivot.columns))
+        self.dates = list(pd.to_datetime(pivot.index))
+
+        # 윈도우 합계 = 누적합 차이
+        indicators = self._indicators(values)
+        cumsum = np.zeros((n_days + 1,) + indicators.shape[1:], dtype=np.int32)
+        np.cumsum(indicators, axis=0, out=cumsum[1:])
+        lower = np.maximum(np.arange(1, n_days + 1) - self.window, 0)
+        counts = cumsum[1:] - cumsum[lower]
+
+        flags = self._flags(indicators, counts)
+        for kind in self.KINDS:
+            flags[kind][:self.window - 1] = False
+            self._flag_rows[kind] = list(flags[kind])
+
+        # 마지막 window일을 링 버퍼에 (날짜 i는 i % window 위치)
+        for i in range(max(n_days - self.window, 0), n_days):
+            self._buffer[i % self.window] = indicators[i]
+        self._counts = counts[-1].copy()
+        return self
+
+    @staticmethod
+    def _flags(indicators: np.ndarray, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        nonzero, positive = indicators[..., 0].astype(bool), indicators[..., 1].astype(bool)
+        return {
+            "only": nonzero & (counts[..., 0] == 1),
+            "first": positive & (counts[..., 1] == 1),
+        }
+
+    def append(self, day_data: pd.DataFrame, date=None) -> Dict[str, List[str]]:
+        """
+        하루치 데이터를 추가하고 그날의 시그널 종목을 반환합니다.
+
+        Args:
+            day_data (pd.DataFrame): 같은 날짜의 key_col, value_col 데이터 (비어 있으면 거래 없는 날)
+            date: 날짜 (None이면 day_data의 DATE)
+
+        Returns:
+            Dict[str, List[str]]: {"only": [...], "first": [...]}
+        """
+        if date is None:
+            dates = pd.to_datetime(day_data["DATE"]).unique()
+            if len(dates) != 1:
+                raise ValueError(f"append에는 하루치 데이터만 넣을 수 있습니다: {len(dates)}개 날짜")
+            date = dates[0]
+        date = pd.Timestamp(date)
+        if self.dates and date <= self.dates[-1]:
+            raise ValueError(f"마지막 날짜({self.dates[-1].date()}) 이후 날짜만 추가할 수 있습니다: {date.date()}")
+
+        day_data = day_data.drop_duplicates(subset=[self.key_col], keep="last")
+        positions = self._add_keys(list(day_data[self.key_col]))
+        values = np.full(len(self.keys), np.nan)
+        values[positions] = pd.to_numeric(day_data[self.value_col], errors="coerce").to_numpy(dtype=float)
+        indicators = self._indicators(values)
+
+        # 윈도우에서 빠지는 날을 빼고 새 날을 더함
+        slot = len(self.dates) % self.window
+        self._counts -= self._buffer[slot]
+        self._buffer[slot] = indicators
+        self._counts += indicators
+        self.dates.append(date)
+
+        flags = self._flags(indicators, self._counts)
+        ready = len(self.dates) >= self.window
+        result = {}
+        for kind in self.KINDS:
+            row = flags[kind] & ready
+            self._flag_rows[kind].append(row)
+            result[kind] = [self.keys[i] for i in np.flatnonzero(row)]
+        return result
+
+    def update(self, client, end_date: Optional[str] = None) -> Dict[pd.Timestamp, Dict[str, List[str]]]:
+        """
+        마지막 날짜 이후 데이터를 SeibroClient에서 읽어 하루씩 append합니다. (update_data 후 호출)
+
+        Args:
+            client: SeibroClient
+            end_date (str, optional): 종료 날짜 (YYYY-MM-DD 형식)
+
+        Returns:
+            Dict[pd.Timestamp, Dict[str, List[str]]]: 새로 추가된 날짜별 시그널 종목
+        """
+        start_date = (self.dates[-1] + pd.Timedelta(days=1)).strftime("%Y-%m-%d") if self.dates else None
+        data = client.get_data(start_date=start_date, end_date=end_date,
+                               columns=["DATE", self.key_col, self.value_col])
+        if data.empty:
+            return {}
+        if not self.dates:
+            self.fit(data)
+            result = {}
+            for kind in self.KINDS:
+                for date, keys in self.signals_by_date(kind).items():
+                    result.setdefault(date, {k: [] for k in self.KINDS})[kind] = keys
+            return result
+
+        return {
+            pd.Timestamp(date): self.append(day_data, date)
+            for date, day_data in data.groupby(pd.to_datetime(data["DATE"]), sort=True)
+        }
+
+    def flags(self, kind: str = "only") -> pd.DataFrame:
+        """
+        날짜 x 종목 시그널 행렬 (bool)
+
+        Args:
+            kind (str): "only" 또는 "first"
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"kind는 {self.KINDS} 중 하나여야 합니다: {kind}")
+        matrix = np.zeros((len(self.dates), len(self.keys)), dtype=bool)
+        for i, row in enumerate(self._flag_rows[kind]):
+            matrix[i, :len(row)] = row
+        return pd.DataFrame(matrix, index=pd.DatetimeIndex(self.dates, name="DATE"),
+                            columns=pd.Index(self.keys, name=self.key_col))
+
+    def signals_by_date(self, kind: str = "only") -> Dict[pd.Timestamp, List[str]]:
+        """시그널이 있는 날짜별 종목 리스트 (노트북의 filtered_stock_dict 형태)"""
+        flags = self.flags(kind)
+        rows, cols = np.nonzero(flags.to_numpy())
+        result: Dict[pd.Timestamp, List[str]] = {}
+        for row, col in zip(rows, cols):
+            result.setdefault(flags.index[row], []).append(flags.columns[col])
+        return result